@@ -0,0 +1,3 @@
+"""
+Benchmarks for performance-sensitive parts of the library
+"""
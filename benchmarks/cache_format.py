@@ -0,0 +1,65 @@
+"""
+Compares the cache formats and compression settings: the size of a cached
+split, the time taken to write it, and the rate at which it can be read back,
+both as raw records and as `ImageAnnotation`s.
+
+```bash
+python -m benchmarks.cache_format --count 100000 --polygons 8 --compression none gzip zstd zstd:9
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+from datatap.cache import CacheGenerator, SplitReader
+from datatap.cache.cache_file import read_cache_file
+from datatap.cache.cache_format import JSON_LINES, MSGPACK, msgpack
+from datatap.cache.compression import Compression
+from datatap.droplet import ImageAnnotation
+
+from tests._synthetic import synthetic_droplets
+
+def main():
+	parser = argparse.ArgumentParser(description = __doc__)
+	parser.add_argument("--count", type = int, default = 100_000)
+	parser.add_argument("--instances", type = int, default = 4)
+	parser.add_argument("--polygons", type = int, default = 0)
+	parser.add_argument("--compression", nargs = "+", default = ["none"])
+	args = parser.parse_args()
+
+	droplets = synthetic_droplets(args.count, instances = args.instances, polygons = args.polygons)
+	formats = [JSON_LINES] if msgpack is None else [JSON_LINES, MSGPACK]
+
+	with tempfile.TemporaryDirectory() as directory:
+		for cache_format, spec in ((cache_format, spec) for cache_format in formats for spec in args.compression):
+			compression = Compression.parse(spec)
+			file_name = os.path.join(directory, f"split-{spec.replace(':', '-')}{cache_format.extension}")
+
+			start = time.perf_counter()
+			for _ in CacheGenerator(file_name, lambda: iter(droplets), cache_format = cache_format, compression = compression):
+				pass
+			write = time.perf_counter() - start
+
+			start = time.perf_counter()
+			for _ in read_cache_file(file_name):
+				pass
+			read = time.perf_counter() - start
+
+			start = time.perf_counter()
+			for _ in SplitReader(file_name, ImageAnnotation.from_json):
+				pass
+			decode = time.perf_counter() - start
+
+			print(
+				f"{cache_format.name:>8} {spec:>8}: {os.path.getsize(file_name) / (1 << 20):8.1f}MB  "
+				f"write {args.count / write:9.0f}/s  "
+				f"read {args.count / read:9.0f}/s  "
+				f"read as annotations {args.count / decode:9.0f}/s"
+			)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,79 @@
+"""
+Measures time-to-first-item, throughput and peak RSS when reading a cached
+split, comparing the streaming reader against reading the file with
+`readlines` (the previous behavior).
+
+Each reader runs in its own process so that peak RSS is measured in isolation.
+
+```bash
+python -m benchmarks.cache_read --count 1000000
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Generator
+
+from datatap.cache.cache_file import DEFAULT_READ_AHEAD, read_cache_file
+from datatap.cache.cache_format import EOF_MARKER
+
+from tests._synthetic import write_synthetic_split
+
+def _read_with_readlines(file_name: str) -> Generator[Any, None, None]:
+	with open(file_name, "r") as f:
+		for line in f.readlines():
+			line = line.strip()
+			if line == "" or line == EOF_MARKER:
+				continue
+			yield json.loads(line)
+
+def _run(mode: str, file_name: str, read_ahead: int):
+	start = time.perf_counter()
+	stream = _read_with_readlines(file_name) if mode == "readlines" else read_cache_file(file_name, read_ahead)
+
+	next(stream)
+	first = time.perf_counter() - start
+	count = 1 + sum(1 for _ in stream)
+	total = time.perf_counter() - start
+
+	# `ru_maxrss` is reported in kilobytes on Linux and bytes on macOS
+	rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	rss_mb = rss / (1 << 20) if sys.platform == "darwin" else rss / (1 << 10)
+
+	print(
+		f"{mode:>10}: first item {first * 1000:9.2f}ms  "
+		f"{count / total:9.0f} droplets/s  peak RSS {rss_mb:8.1f}MB"
+	)
+
+def main():
+	parser = argparse.ArgumentParser(description = __doc__)
+	parser.add_argument("--count", type = int, default = 1_000_000)
+	parser.add_argument("--read-ahead", type = int, default = DEFAULT_READ_AHEAD)
+	parser.add_argument("--file", default = os.path.join(tempfile.gettempdir(), "datatap-benchmark", "split-{count}.jsonl"))
+	parser.add_argument("--mode", choices = ["readlines", "streaming"])
+	args = parser.parse_args()
+
+	file_name = args.file.format(count = args.count)
+
+	if args.mode is not None:
+		_run(args.mode, file_name, args.read_ahead)
+		return
+
+	write_synthetic_split(file_name, args.count)
+	print(f"{args.count} droplets, {os.path.getsize(file_name) / (1 << 20):.1f}MB on disk")
+	for mode in ("readlines", "streaming"):
+		subprocess.run(
+			[sys.executable, "-m", "benchmarks.cache_read", "--mode", mode, "--count", str(args.count), "--file", args.file, "--read-ahead", str(args.read_ahead)],
+			check = True
+		)
+
+if __name__ == "__main__":
+	main()
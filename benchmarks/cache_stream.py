@@ -0,0 +1,62 @@
+"""
+Measures throughput and CPU usage of `CacheGenerator` while it streams a split
+into the cache, for several flush granularities.
+
+The producer can be throttled with `--rate` to mimic a network stream, in which
+case the reader spends most of its time waiting for records; CPU usage then
+shows how much work is wasted while waiting.
+
+```bash
+python -m benchmarks.cache_stream --count 100000
+python -m benchmarks.cache_stream --count 20000 --rate 5000
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Any, Dict, Generator, List, Optional
+
+from datatap.cache import CacheGenerator
+
+from tests._synthetic import synthetic_droplets
+
+def _paced(droplets: List[Dict[str, Any]], rate: Optional[float]) -> Generator[Dict[str, Any], None, None]:
+	start = time.perf_counter()
+	for i, droplet in enumerate(droplets):
+		if rate is not None:
+			delay = start + i / rate - time.perf_counter()
+			if delay > 0:
+				time.sleep(delay)
+		yield droplet
+
+def main():
+	parser = argparse.ArgumentParser(description = __doc__)
+	parser.add_argument("--count", type = int, default = 100_000)
+	parser.add_argument("--rate", type = float, default = None, help = "droplets per second produced by the stand-in stream")
+	parser.add_argument("--flush-records", type = int, nargs = "+", default = [1, 16, 256, 4096])
+	parser.add_argument("--instances", type = int, default = 4, help = "instances per droplet; fewer makes JSON cheaper")
+	args = parser.parse_args()
+
+	droplets = synthetic_droplets(args.count, instances = args.instances)
+
+	for flush_records in args.flush_records:
+		with tempfile.TemporaryDirectory() as directory:
+			start, cpu_start = time.perf_counter(), time.process_time()
+			count = sum(1 for _ in CacheGenerator(
+				os.path.join(directory, "split.jsonl"),
+				lambda: _paced(droplets, args.rate),
+				flush_records = flush_records
+			))
+			wall, cpu = time.perf_counter() - start, time.process_time() - cpu_start
+
+		print(
+			f"flush every {flush_records:>5}: {count / wall:9.0f} droplets/s  "
+			f"cpu {cpu:6.2f}s over {wall:6.2f}s wall ({cpu / wall * 100:5.1f}% of a core)"
+		)
+
+if __name__ == "__main__":
+	main()
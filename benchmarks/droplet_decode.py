@@ -0,0 +1,74 @@
+"""
+Compares the ways of getting a training pipeline's arrays (image paths, boxes
+and labels) out of lines of droplet JSON: parsing them into
+`ImageAnnotation`s (eagerly or lazily) and collecting the boxes from those, or
+decoding them directly with a `DropletDecoder`.
+
+```bash
+python -m benchmarks.droplet_decode --count 20000 --polygons 16
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Callable, List, Mapping, Tuple
+
+import numpy as np
+
+from datatap.droplet import DropletDecoder, ImageAnnotation, LazyImageAnnotation
+from datatap.utils import json_backend
+
+from tests._synthetic import synthetic_droplets
+
+def from_annotation(parse: Callable[[Mapping[str, object]], ImageAnnotation], class_mapping: Mapping[str, int]):
+	def decode(line: bytes) -> Tuple[str, np.ndarray, np.ndarray]:
+		annotation = parse(json_backend.loads(line))
+		instances = [
+			(class_mapping[class_name], instance.bounding_box.rectangle)
+			for class_name, class_annotation in annotation.classes.items()
+			for instance in class_annotation.instances
+			if instance.bounding_box is not None
+		]
+		boxes = np.array([(r.p1.x, r.p1.y, r.p2.x, r.p2.y) for _, r in instances], dtype = np.float32).reshape((-1, 4))
+		labels = np.array([label for label, _ in instances], dtype = np.int64)
+		return annotation.image.paths[0], boxes, labels
+	return decode
+
+def from_decoder(decoder: DropletDecoder):
+	def decode(line: bytes) -> Tuple[str, np.ndarray, np.ndarray]:
+		arrays = decoder(line)
+		assert arrays.boxes is not None
+		has_box = ~np.isnan(arrays.boxes[:, 0])
+		return arrays.image_paths[0], arrays.boxes[has_box], arrays.labels[has_box]
+	return decode
+
+def measure(lines: List[bytes], decode: Callable[[bytes], object]) -> float:
+	start = time.perf_counter()
+	for line in lines:
+		decode(line)
+	return len(lines) / (time.perf_counter() - start)
+
+def main():
+	parser = argparse.ArgumentParser(description = __doc__)
+	parser.add_argument("--count", type = int, default = 20_000)
+	parser.add_argument("--instances", type = int, default = 4)
+	parser.add_argument("--polygons", type = int, default = 16)
+	args = parser.parse_args()
+
+	lines = [
+		json_backend.dumps(droplet)
+		for droplet in synthetic_droplets(args.count, instances = args.instances, polygons = args.polygons)
+	]
+	class_mapping = { "car": 0, "person": 1 }
+
+	for name, decode in [
+		("ImageAnnotation", from_annotation(ImageAnnotation.from_json, class_mapping)),
+		("LazyImageAnnotation", from_annotation(LazyImageAnnotation.from_json, class_mapping)),
+		("DropletDecoder", from_decoder(DropletDecoder(class_mapping))),
+	]:
+		print(f"{name:>19}: {measure(lines, decode):9.0f}/s")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,47 @@
+"""
+Measures the memory held by parsed annotations, and the time taken to parse
+them, for annotations with dense segmentations (such as those in COCO).
+
+```bash
+python -m benchmarks.droplet_memory --count 1000 --instances 20 --polygons 64
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from datatap.droplet import ImageAnnotation
+
+from tests._synthetic import synthetic_droplets
+
+def main():
+	parser = argparse.ArgumentParser(description = __doc__)
+	parser.add_argument("--count", type = int, default = 1000)
+	parser.add_argument("--instances", type = int, default = 20)
+	parser.add_argument("--polygons", type = int, default = 64)
+	args = parser.parse_args()
+
+	droplets = synthetic_droplets(args.count, instances = args.instances, polygons = args.polygons)
+
+	gc.collect()
+	start = time.perf_counter()
+	annotations = [ImageAnnotation.from_json(droplet) for droplet in droplets]
+	duration = time.perf_counter() - start
+	del annotations
+
+	gc.collect()
+	tracemalloc.start()
+	annotations = [ImageAnnotation.from_json(droplet) for droplet in droplets]
+	size, _ = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	print(f"{len(annotations)} annotations, {args.instances * 3 // 2} instances of {args.polygons}-gons each")
+	print(f"  memory: {size / len(annotations) / 1024:9.1f}KiB/annotation")
+	print(f"   parse: {duration / len(annotations) * 1e6:9.1f}us/annotation")
+
+if __name__ == "__main__":
+	main()
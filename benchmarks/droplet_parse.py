@@ -0,0 +1,50 @@
+"""
+Compares parsing droplets into `ImageAnnotation`s with parsing them into
+`LazyImageAnnotation`s, both when only the bounding boxes are read (as when
+training a detector) and when every attribute is read.
+
+```bash
+python -m benchmarks.droplet_parse --count 20000 --polygons 16
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Callable, List, Mapping
+
+from datatap.droplet import ImageAnnotation, LazyImageAnnotation
+
+from tests._synthetic import synthetic_droplets
+
+def read_boxes(annotation: ImageAnnotation) -> None:
+	for class_annotation in annotation.classes.values():
+		for instance in class_annotation.instances:
+			instance.bounding_box
+
+def read_all(annotation: ImageAnnotation) -> None:
+	annotation.to_json()
+
+def measure(droplets: List[Mapping[str, Any]], parse: Callable[[Mapping[str, Any]], ImageAnnotation], read: Callable[[ImageAnnotation], None]) -> float:
+	start = time.perf_counter()
+	for droplet in droplets:
+		read(parse(droplet))
+	return len(droplets) / (time.perf_counter() - start)
+
+def main():
+	parser = argparse.ArgumentParser(description = __doc__)
+	parser.add_argument("--count", type = int, default = 20_000)
+	parser.add_argument("--instances", type = int, default = 4)
+	parser.add_argument("--polygons", type = int, default = 16)
+	args = parser.parse_args()
+
+	droplets = synthetic_droplets(args.count, instances = args.instances, polygons = args.polygons)
+
+	for read in [read_boxes, read_all]:
+		for parse in [ImageAnnotation.from_json, LazyImageAnnotation.from_json]:
+			name = parse.__qualname__.split(".")[0]
+			print(f"{read.__name__:>10} {name:>19}: {measure(droplets, parse, read):9.0f}/s")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,71 @@
+"""
+Measures how long it takes to fetch a split into the cache with
+`Dataset.fetch_split`, for several levels of parallelism, against a local
+stand-in server whose streams are each throttled to `--stream-rate` droplets
+per second (mimicking a per-connection bandwidth limit). With
+`--content-encoding`, the server compresses its streams, and the bytes received
+are reported as well.
+
+```bash
+python -m benchmarks.fetch_split --count 50000 --stream-rate 10000 --parallelism 1 2 4 8
+python -m benchmarks.fetch_split --content-encoding zstd
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from typing import Dict, Iterable
+
+from datatap.api.endpoints import ApiEndpoints
+from datatap.cache import SplitCache
+
+from tests._server import StandInServer
+from tests._synthetic import synthetic_droplets
+
+def main():
+	parser = argparse.ArgumentParser(description = __doc__)
+	parser.add_argument("--count", type = int, default = 50_000)
+	parser.add_argument("--stream-rate", type = float, default = 10_000, help = "droplets per second served by each stream")
+	parser.add_argument("--parallelism", type = int, nargs = "+", default = [1, 2, 4, 8])
+	parser.add_argument("--content-encoding", choices = ["gzip", "deflate", "zstd"], default = None)
+	args = parser.parse_args()
+
+	lines = [(json.dumps(droplet) + "\n").encode("utf-8") for droplet in synthetic_droplets(args.count)]
+
+	def stream(query: Dict[str, str]) -> Iterable[bytes]:
+		chunk, nchunks = int(query["chunk"]), int(query["nchunks"])
+		start = time.perf_counter()
+		for i, line in enumerate(lines[chunk * len(lines) // nchunks:(chunk + 1) * len(lines) // nchunks]):
+			delay = start + i / args.stream_rate - time.perf_counter()
+			if delay > 0:
+				time.sleep(delay)
+			yield line
+
+	with StandInServer(args.content_encoding) as server:
+		server.streams["/api/database/db/repository/ns/repo/ds/split/training/stream"] = stream
+
+		for parallelism in args.parallelism:
+			with tempfile.TemporaryDirectory() as directory:
+				endpoints = ApiEndpoints("benchmark", server.uri, split_cache = SplitCache(directory))
+				start = time.perf_counter()
+				endpoints.dataset.fetch_split(
+					database_uid = "db",
+					namespace = "ns",
+					name = "repo",
+					uid = "ds",
+					split = "training",
+					parallelism = parallelism
+				)
+				elapsed = time.perf_counter() - start
+				stats = endpoints.transfer_stats
+				print(
+					f"parallelism {parallelism:>3}: {elapsed:7.2f}s  {args.count / elapsed:9.0f} droplets/s"
+					f"  {stats.wire_bytes / 2 ** 20:8.2f} MiB received ({stats.compression_ratio:.1f}x)"
+				)
+
+if __name__ == "__main__":
+	main()
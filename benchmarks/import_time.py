@@ -0,0 +1,51 @@
+"""
+Measures how long it takes to import `datatap` (and its commonly used
+submodules) in a fresh interpreter, as reported by `python -X importtime`, and
+which third-party packages each import pulls in.
+
+```bash
+python -m benchmarks.import_time --runs 5
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import List
+
+from tests._import_time import measure_import
+
+STATEMENTS = [
+	"import datatap",
+	"from datatap import Api",
+	"import datatap.droplet",
+	"import datatap.cache",
+]
+
+THIRD_PARTY = ["requests", "aiohttp", "shapely", "numpy", "PIL", "boto3", "msgpack", "zstandard", "msgspec", "orjson"]
+
+def main():
+	parser = argparse.ArgumentParser(description = __doc__)
+	parser.add_argument("--runs", type = int, default = 5)
+	args = parser.parse_args()
+
+	for statement in STATEMENTS:
+		totals: List[float] = []
+		for _ in range(args.runs):
+			total, _ = measure_import(statement)
+			totals.append(total)
+
+		loaded = subprocess.run(
+			[sys.executable, "-c", f"import sys; {statement}; print(' '.join(sorted(sys.modules)))"],
+			stdout = subprocess.PIPE,
+			universal_newlines = True,
+			check = True,
+		).stdout.split()
+		third_party = [name for name in THIRD_PARTY if name in loaded]
+		print(f"{statement:<28} {statistics.median(totals) * 1000:7.1f}ms  loads: {', '.join(third_party) or '-'}")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,65 @@
+"""
+Measures per-call latency of metadata requests, comparing a fresh connection
+per call (the previous behavior) against the pooled `SessionPool`.
+
+```bash
+python -m benchmarks.request_latency --calls 500
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from base64 import b64encode
+from typing import Callable, List
+
+import requests
+
+from datatap.api.endpoints import ApiEndpoints
+
+from tests._server import StandInServer
+
+def _measure(fn: Callable[[], object], calls: int) -> List[float]:
+	samples: List[float] = []
+	for _ in range(calls):
+		start = time.perf_counter()
+		fn()
+		samples.append(time.perf_counter() - start)
+	return samples
+
+def _report(name: str, samples: List[float]):
+	samples = sorted(samples)
+	p50 = samples[len(samples) // 2] * 1000
+	p99 = samples[int(len(samples) * 0.99)] * 1000
+	mean = statistics.mean(samples) * 1000
+	print(f"{name:>12}: mean {mean:7.3f}ms  p50 {p50:7.3f}ms  p99 {p99:7.3f}ms")
+
+def main():
+	parser = argparse.ArgumentParser(description = __doc__)
+	parser.add_argument("--calls", type = int, default = 500)
+	args = parser.parse_args()
+
+	user = { "uid": "u", "username": "bench", "email": "bench@example.com", "defaultDatabase": None }
+
+	with StandInServer() as server:
+		server.routes["/api/user"] = lambda: user
+		token = b64encode(b"bench-key").decode("ascii")
+
+		def unpooled():
+			response = requests.get(f"{server.uri}/api/user", headers = { "Authorization": f"Bearer {token}" })
+			response.json()
+
+		endpoints = ApiEndpoints("bench-key", server.uri)
+
+		before = server.connections
+		_report("unpooled", _measure(unpooled, args.calls))
+		print(f"{'':>12}  {server.connections - before} connections opened")
+
+		before = server.connections
+		_report("pooled", _measure(endpoints.user.current, args.calls))
+		print(f"{'':>12}  {server.connections - before} connections opened")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,65 @@
+"""
+Compares `ImageAnnotation.from_json` and `to_json` with an
+`ImageAnnotationCodec` compiled for the droplets' template, both for droplets
+with segmentations and for droplets with only bounding boxes.
+
+```bash
+python -m benchmarks.template_codec --count 5000 --polygons 16
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import time
+from typing import Any, Callable, Dict, List, Mapping
+
+from datatap.droplet import ImageAnnotation, ImageAnnotationCodec
+from datatap.template import ClassAnnotationTemplate, ImageAnnotationTemplate, InstanceTemplate
+
+from tests._synthetic import synthetic_droplets
+
+def measure(items: List[Any], functions: Mapping[str, Callable[[Any], object]], repeat: int) -> Dict[str, float]:
+	"""
+	Returns the best throughput of each function over `repeat` rounds, which
+	are interleaved so that they are all equally affected by any noise.
+	"""
+	best = { name: 0.0 for name in functions }
+	for _ in range(repeat):
+		for name, function in functions.items():
+			gc.collect()
+			start = time.perf_counter()
+			for item in items:
+				function(item)
+			best[name] = max(best[name], len(items) / (time.perf_counter() - start))
+	return best
+
+def main():
+	parser = argparse.ArgumentParser(description = __doc__)
+	parser.add_argument("--count", type = int, default = 5_000)
+	parser.add_argument("--instances", type = int, default = 4)
+	parser.add_argument("--polygons", type = int, default = 16)
+	parser.add_argument("--repeat", type = int, default = 10)
+	args = parser.parse_args()
+
+	# The collector's pauses dominate the differences otherwise
+	gc.disable()
+
+	for polygons in [args.polygons, 0]:
+		template = ImageAnnotationTemplate(classes = {
+			class_name: ClassAnnotationTemplate(instances = InstanceTemplate(bounding_box = True, segmentation = polygons > 0))
+			for class_name in ["person", "car"]
+		})
+		codec = ImageAnnotationCodec(template)
+		droplets = synthetic_droplets(args.count, instances = args.instances, polygons = polygons)
+		annotations = [ImageAnnotation.from_json(droplet) for droplet in droplets]
+
+		print(f"{polygons}-gon segmentations" if polygons > 0 else "bounding boxes only")
+		for name, rate in measure(droplets, { "generic": ImageAnnotation.from_json, "codec": codec.from_json }, args.repeat).items():
+			print(f"  from_json {name:>9}: {rate:9.0f}/s")
+		for name, rate in measure(annotations, { "generic": ImageAnnotation.to_json, "codec": codec.to_json }, args.repeat).items():
+			print(f"    to_json {name:>9}: {rate:9.0f}/s")
+
+if __name__ == "__main__":
+	main()
@@ -11,11 +11,31 @@ if _sys.version_info < (3, 7):
     print("\x1b[38;5;1mUsing an unsupported python version. Please install Python 3.7 or greater\x1b[0m")
     raise Exception("Invalid python version")
 
-from .api.entities import Api
+from typing import TYPE_CHECKING as _TYPE_CHECKING
+
+from .utils.lazy import lazy_exports as _lazy_exports
+
+if _TYPE_CHECKING:
+    from .api.entities import Api, AsyncApi
+
+# Everything is imported on first use, so that `import datatap` (which every spawned `DataLoader` worker repeats)
+# does not pay for `requests`, `aiohttp`, `shapely` and the like until they are needed.
+__getattr__, __dir__ = _lazy_exports(__name__, {
+    "Api": ".api.entities",
+    "AsyncApi": ".api.entities",
+    "api": ".api",
+    "cache": ".cache",
+    "droplet": ".droplet",
+    "geometry": ".geometry",
+    "template": ".template",
+    "utils": ".utils",
+})
 
 __all__ = [
     "Api",
+    "AsyncApi",
     "api",
+    "cache",
     "droplet",
     "geometry",
     "template",
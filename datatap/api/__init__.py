@@ -9,9 +9,18 @@ endpoints into python objects with convenience methods for accessing other
 entities.
 """
 
-from . import endpoints
-from . import entities
-from . import types
+from typing import TYPE_CHECKING
+
+from datatap.utils import lazy_exports
+
+if TYPE_CHECKING:
+    from . import endpoints, entities, types
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "endpoints": ".endpoints",
+    "entities": ".entities",
+    "types": ".types",
+})
 
 __all__ = [
     "endpoints",
@@ -13,10 +13,40 @@ api_endpoints = ApiEndpoints()
 print(api_endpoints.user.current())
 print(api_endpoints.database.list())
 ```
+
+`AsyncApiEndpoints` provides the same requests as coroutines, for use from
+`asyncio` code.
 """
 
+from typing import TYPE_CHECKING
+
 from .endpoints import ApiEndpoints
+from .instrumentation import RequestEvent, RequestMetrics
+from .metadata_cache import MetadataCache
+from .request import OfflineError
+from .session import SessionPool
+from .transfer_stats import TransferStats
+
+from datatap.utils import lazy_exports
+
+if TYPE_CHECKING:
+    from .async_endpoints import AsyncApiEndpoints
+    from .async_request import AsyncSessionPool
+
+# `aiohttp` is slow to import, so the asynchronous API is only imported when it is used.
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "AsyncApiEndpoints": ".async_endpoints",
+    "AsyncSessionPool": ".async_request",
+})
 
 __all__ = [
-    "ApiEndpoints"
+    "ApiEndpoints",
+    "MetadataCache",
+    "RequestEvent",
+    "RequestMetrics",
+    "OfflineError",
+    "SessionPool",
+    "TransferStats",
+    "AsyncApiEndpoints",
+    "AsyncSessionPool",
 ]
\ No newline at end of file
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import asyncio
+from itertools import islice
+from typing import Any, AsyncGenerator, Generator, List, Optional
+
+from datatap.cache import SplitCache
+from datatap.droplet import ImageAnnotationJson
+
+from .async_request import AsyncApiNamespace, AsyncRequest, AsyncSessionPool
+from .instrumentation import RequestListener
+from .metadata_cache import MetadataCache
+from .request import OfflineError
+from .transfer_stats import TransferStats
+from ..types import JsonDatabase, JsonDataset, JsonRepository, JsonUser
+
+_CACHE_BATCH_SIZE = 1000
+
+class AsyncUser(AsyncApiNamespace):
+    """
+    Raw asynchronous API for interacting with user endpoints.
+    """
+    async def current(self) -> JsonUser:
+        """
+        Returns a `JsonUser` representing the logged in user.
+        """
+        return await self._cached("user", lambda: self.get[JsonUser]("/user"))
+
+class AsyncDatabase(AsyncApiNamespace):
+    """
+    Raw asynchronous API for interacting with database endpoints.
+    """
+    async def list(self) -> List[JsonDatabase]:
+        """
+        Returns a list of `JsonDatabase`s that the current user has access to.
+        """
+        return await self._cached("database", lambda: self.get[List[JsonDatabase]]("/database"))
+
+    async def query_by_uid(self, database: str) -> JsonDatabase:
+        """
+        Returns a specific `JsonDatabase`, identified by UID.
+        """
+        return await self._cached(f"database/{database}", lambda: self.get[JsonDatabase](f"/database/{database}"))
+
+    async def query_by_name(self, database_name: str) -> List[JsonDatabase]:
+        """
+        Returns a list of `JsonDatabase`s with the name `database_name`.
+        """
+        return await self._cached(
+            f"database/query/{database_name}",
+            lambda: self.post[List[JsonDatabase]](f"/database/query", { "name": database_name }, idempotent = True)
+        )
+
+class AsyncRepository(AsyncApiNamespace):
+    """
+    Raw asynchronous API for interacting with repository endpoints.
+    """
+    async def list(self, database_uid: str) -> List[JsonRepository]:
+        """
+        Returns a list of `JsonRepository`s in the database specified by `database_uid`.
+        """
+        return await self._cached(
+            f"repository/{database_uid}",
+            lambda: self.get[List[JsonRepository]](f"/database/{database_uid}/repository")
+        )
+
+    async def query(self, database_uid: str, namespace: str, name: str) -> JsonRepository:
+        """
+        Queries the database for the repository with a given `namespace` and `name`, and
+        returns the corresponding `JsonRepository` list.
+        """
+        return await self._cached(
+            f"repository/{database_uid}/{namespace}/{name}",
+            lambda: self.get[JsonRepository](f"/database/{database_uid}/repository/{namespace}/{name}")
+        )
+
+class AsyncDataset(AsyncApiNamespace):
+    """
+    Raw asynchronous API for interacting with dataset endpoints.
+    """
+
+    split_cache: SplitCache
+    """
+    The cache from which fully cached splits are served.
+    """
+
+    def __init__(self, request: AsyncRequest, split_cache: Optional[SplitCache] = None):
+        super().__init__(request)
+        self.split_cache = split_cache or SplitCache()
+
+    async def query(self, database_uid: str, namespace: str, name: str, tag: str) -> JsonDataset:
+        """
+        Queries the database for a dataset with given `namespace`, `name`, and `tag`.
+        Returns a `JsonDataset`.
+        """
+        # As with `Dataset.query`, which version a tag points to is cached for a limited time, and the versions
+        # themselves indefinitely.
+        metadata_cache = self.request.metadata_cache
+        tag_key = self._cache_key(f"dataset/{database_uid}/{namespace}/{name}/{tag}")
+
+        uid = metadata_cache.get(tag_key, allow_expired = self.request.offline)
+        if uid is not None:
+            cached = metadata_cache.get(self._cache_key(f"dataset/{database_uid}/{uid}"))
+            if cached is not None:
+                return cached
+
+        if self.request.offline:
+            raise OfflineError(f"Dataset {namespace}/{name}:{tag} has not been cached, so it cannot be used offline")
+
+        dataset = await self.get[JsonDataset](f"/database/{database_uid}/repository/{namespace}/{name}/{tag}")
+        metadata_cache.put(self._cache_key(f"dataset/{database_uid}/{dataset['uid']}"), dataset, immutable = True)
+        metadata_cache.put(tag_key, dataset["uid"], immutable = dataset["uid"] == tag)
+        return dataset
+
+    async def stream_split(
+        self,
+        *,
+        database_uid: str,
+        namespace: str,
+        name: str,
+        uid: str,
+        split: str,
+        chunk: int,
+        nchunks: int
+    ) -> AsyncGenerator[ImageAnnotationJson, None]:
+        """
+        Streams a split of a dataset, as in `Dataset.stream_split`. The result is an asynchronous generator of
+        `ImageAnnotationJson`s.
+
+        If the full split is stored in `split_cache`, it is read from there (in batches, on the event loop's default
+        executor). Otherwise, it is streamed from the server. Unlike `Dataset.stream_split`, streamed splits are not
+        written to the cache; use `Dataset.cache_split` to cache a split ahead of time. For the same reason, only
+        fully cached splits can be streamed offline.
+        """
+        if chunk < 0 or chunk >= nchunks:
+            raise Exception(f"Invalid chunk specification. {chunk} must be in the range [0, {nchunks})")
+
+        loop = asyncio.get_running_loop()
+
+        def read_cached() -> Optional[Generator[Any, None, None]]:
+            self.split_cache.touch(database_uid = database_uid, dataset_uid = uid, split = split)
+            self.split_cache.consolidate(database_uid = database_uid, dataset_uid = uid, split = split, nchunks = nchunks)
+            return self.split_cache.read_chunk(
+                database_uid = database_uid,
+                dataset_uid = uid,
+                split = split,
+                chunk = chunk,
+                nchunks = nchunks
+            )
+
+        cached = await loop.run_in_executor(None, read_cached)
+        if cached is not None:
+            try:
+                while True:
+                    batch = await loop.run_in_executor(None, lambda: list(islice(cached, _CACHE_BATCH_SIZE)))
+                    if len(batch) == 0:
+                        return
+                    for droplet in batch:
+                        yield droplet
+            finally:
+                cached.close()
+
+        if self.request.offline:
+            raise OfflineError(f"Split {split} of dataset {uid} has not been fully cached, so it cannot be streamed offline")
+
+        async for droplet in self.stream[ImageAnnotationJson](
+            f"/database/{database_uid}/repository/{namespace}/{name}/{uid}/split/{split}/stream",
+            { "chunk": str(chunk), "nchunks": str(nchunks) }
+        ):
+            yield droplet
+
+class AsyncApiEndpoints:
+    """
+    Class for performing raw asynchronous API requests.
+
+    Requires the `aiohttp` package, which is available with the `datatap[async]` extra.
+    """
+
+    user: AsyncUser
+    """
+    User endpoints.
+    """
+
+    database: AsyncDatabase
+    """
+    Database endpoints.
+    """
+
+    repository: AsyncRepository
+    """
+    Repository endpoints.
+    """
+
+    dataset: AsyncDataset
+    """
+    Dataset endpoints.
+    """
+
+    transfer_stats: TransferStats
+    """
+    Counts the data received by these endpoints.
+    """
+
+    _request: AsyncRequest
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        uri: Optional[str] = None,
+        session_pool: Optional[AsyncSessionPool] = None,
+        split_cache: Optional[SplitCache] = None,
+        metadata_cache: Optional[MetadataCache] = None,
+        offline: Optional[bool] = None
+    ):
+        self._request = AsyncRequest(api_key, uri, session_pool, metadata_cache, offline)
+
+        self.user = AsyncUser(self._request)
+        self.database = AsyncDatabase(self._request)
+        self.repository = AsyncRepository(self._request)
+        self.dataset = AsyncDataset(self._request, split_cache)
+        self.transfer_stats = self._request.transfer_stats
+
+    def add_listener(self, listener: RequestListener) -> None:
+        """
+        Registers `listener` to be called with a `RequestEvent` after every
+        request made by these endpoints. See `datatap.api.endpoints.instrumentation`.
+        """
+        self._request.add_listener(listener)
+
+    def remove_listener(self, listener: RequestListener) -> None:
+        """
+        Stops calling `listener` after each request.
+        """
+        self._request.remove_listener(listener)
+
+    async def close(self) -> None:
+        """
+        Closes the connections held by this object's session pool.
+        """
+        await self._request.session_pool.close()
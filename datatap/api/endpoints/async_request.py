@@ -0,0 +1,457 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from base64 import b64encode
+from urllib.parse import urljoin, urlparse
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Awaitable, Callable, Dict, Generic, List, Optional, Type, TypeVar, cast
+
+if TYPE_CHECKING:
+    import aiohttp
+else:
+    # `aiohttp` is only used once an `AsyncSessionPool` has been created, which requires it.
+    try:
+        import aiohttp
+    except ImportError:
+        aiohttp = None
+
+from datatap.utils import CircuitBreaker, HttpError, RetryPolicy, json_backend
+from datatap.utils.environment import Environment
+from datatap.utils.retry import parse_retry_after
+
+from .content_encoding import get_supported_encodings
+from .instrumentation import RequestEvent, RequestListener, instrument_request
+from .metadata_cache import MetadataCache
+from .request import BodyDecoder, LineSplitter, OfflineError, resolve_scope
+from .transfer_stats import TransferStats
+
+_T = TypeVar("_T")
+_S = TypeVar("_S")
+_U = TypeVar("_U")
+
+# As with `Request`, requests that must not be retried are still made through a policy, for the circuit breaker.
+_NO_RETRIES = RetryPolicy(max_attempts = 1)
+
+class AsyncSessionPool:
+    """
+    The asynchronous counterpart of `SessionPool`: a pool of keep-alive HTTP
+    connections shared by every request made through an `AsyncRequest`.
+
+    A session cannot outlive the event loop it was created in, so the underlying
+    `aiohttp.ClientSession` is created lazily, and is recreated whenever the pool
+    is used from a new event loop (or process). The session is also dropped when
+    the pool is pickled.
+
+    Using the asynchronous API requires the `aiohttp` package, which is available
+    with the `datatap[async]` extra.
+    """
+
+    limit: int
+    """
+    The maximum number of connections open at once. Requests made once this many
+    connections are in use wait for one to become free.
+    """
+
+    limit_per_host: int
+    """
+    The maximum number of connections open at once to a single host.
+    """
+
+    keep_alive: bool
+    """
+    Whether connections should be kept alive between requests. When `False`,
+    every connection is closed once its request completes.
+    """
+
+    accept_encoding: str
+    """
+    The `Accept-Encoding` header sent with every request. As with `SessionPool`,
+    every encoding that can be decoded is accepted by default.
+    """
+
+    retry_policy: RetryPolicy
+    """
+    Determines which failed requests are retried, and how soon. By default,
+    requests are retried as with `SessionPool`, and on the connection errors
+    raised by `aiohttp`.
+    """
+
+    circuit_breaker: CircuitBreaker
+    """
+    Tracks failures for each host, as with `SessionPool`.
+    """
+
+    _session: Optional[aiohttp.ClientSession]
+    _loop: Optional[asyncio.AbstractEventLoop]
+    _pid: Optional[int]
+
+    def __init__(
+        self,
+        *,
+        limit: int = 100,
+        limit_per_host: int = 32,
+        keep_alive: bool = True,
+        accept_encoding: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None
+    ):
+        if aiohttp is None:
+            raise ImportError("The asynchronous API requires the `aiohttp` package; install `datatap[async]`")
+
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keep_alive = keep_alive
+        self.accept_encoding = accept_encoding if accept_encoding is not None else ", ".join(get_supported_encodings())
+        self.retry_policy = retry_policy or RetryPolicy(
+            retry_on = (OSError, asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)
+        )
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self._session = None
+        self._loop = None
+        self._pid = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        The `aiohttp.ClientSession` for the running event loop. This may only be
+        accessed from a coroutine.
+        """
+        loop = asyncio.get_running_loop()
+        pid = os.getpid()
+        if self._session is None or self._session.closed or self._loop is not loop or self._pid != pid:
+            # As with `SessionPool`, a session belonging to another event loop (or
+            # process) is abandoned rather than closed, as it cannot be closed here.
+            self._session = self._create_session()
+            self._loop = loop
+            self._pid = pid
+        return self._session
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit = self.limit,
+            limit_per_host = self.limit_per_host,
+            force_close = not self.keep_alive,
+        )
+        # Like `requests`, we do not time out requests by default, as a split may
+        # take arbitrarily long to stream. Responses are decoded by the requesters,
+        # as with `SessionPool`.
+        return aiohttp.ClientSession(
+            connector = connector,
+            timeout = aiohttp.ClientTimeout(total = None),
+            headers = { "Accept-Encoding": self.accept_encoding },
+            auto_decompress = False
+        )
+
+    async def close(self) -> None:
+        """
+        Closes all connections held by this pool in the running event loop.
+        """
+        if self._session is not None and self._loop is asyncio.get_running_loop() and self._pid == os.getpid():
+            await self._session.close()
+        self._session = None
+        self._loop = None
+        self._pid = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_session"] = None
+        state["_loop"] = None
+        state["_pid"] = None
+        return state
+
+class _AsyncBaseRequester:
+    """
+    Shared state and helpers for the typed asynchronous requesters. Requests are
+    reported, decoded and counted as with `Request`.
+    """
+    api_key: str
+    uri: str
+    session_pool: AsyncSessionPool
+    transfer_stats: TransferStats
+    listeners: List[RequestListener]
+    offline: bool
+
+    _headers: Dict[str, str]
+    _host: str
+
+    def __init__(
+        self,
+        api_key: str,
+        base_uri: str,
+        session_pool: AsyncSessionPool,
+        transfer_stats: TransferStats,
+        listeners: List[RequestListener],
+        offline: bool = False
+    ):
+        self.api_key = api_key
+        self.uri = base_uri
+        self.session_pool = session_pool
+        self.transfer_stats = transfer_stats
+        self.listeners = listeners
+        self.offline = offline
+
+        encoded_api_key = b64encode(bytes(self.api_key, "ascii")).decode("ascii")
+        self._headers = { "Authorization": f"Bearer {encoded_api_key}" }
+        self._host = urlparse(base_uri).netloc
+
+    def _qualify(self, endpoint: str) -> str:
+        if self.offline:
+            raise OfflineError(f"Cannot request {endpoint} while offline")
+        return urljoin(self.uri, "/api/" + endpoint)
+
+    async def _iter_content(self, response: aiohttp.ClientResponse, event: RequestEvent) -> AsyncGenerator[bytes, None]:
+        # Decodes the body of `response` as it is received, as with `Request`.
+        decoder = BodyDecoder(response.headers.get("Content-Encoding"), response.ok, self.transfer_stats, event)
+        async for data in response.content.iter_any():
+            decoded = decoder.decode(data)
+            if len(decoded) > 0:
+                yield decoded
+
+        decoded = decoder.flush()
+        if len(decoded) > 0:
+            yield decoded
+
+    async def _read(self, response: aiohttp.ClientResponse, event: RequestEvent) -> bytes:
+        return b"".join([data async for data in self._iter_content(response, event)])
+
+    async def _retry(self, request: Callable[[], Awaitable[_U]], event: RequestEvent, *, retry: bool = True) -> _U:
+        async def attempt() -> _U:
+            event.attempts += 1
+            return await request()
+
+        policy = self.session_pool.retry_policy if retry else _NO_RETRIES
+        return await policy.call_async(
+            attempt,
+            circuit_breaker=self.session_pool.circuit_breaker,
+            host=self._host
+        )
+
+    async def _send(self, method: str, uri: str, event: RequestEvent, **kwargs: Any) -> aiohttp.ClientResponse:
+        # Sends a request, raising an `HttpError` if it fails. The caller is responsible for releasing the response.
+        response = await self.session_pool.session.request(method, uri, headers=self._headers, **kwargs)
+        event.status = response.status
+        try:
+            await self._raise_for_error(response, event)
+        except:
+            response.release()
+            raise
+        return response
+
+    async def _fetch_json(self, method: str, endpoint: str, *, idempotent: bool, **kwargs: Any) -> Any:
+        # As with `Request`, requests that are not `idempotent` are not retried.
+        uri = self._qualify(endpoint)
+        with instrument_request(self.listeners, method, endpoint) as event:
+            async def fetch() -> Any:
+                async with await self._send(method, uri, event, **kwargs) as response:
+                    content = await self._read(response, event)
+                started = time.perf_counter()
+                value = json_backend.loads(content)
+                event.parse_time += time.perf_counter() - started
+                return value
+            return await self._retry(fetch, event, retry=idempotent)
+
+    async def _raise_for_error(self, response: aiohttp.ClientResponse, event: RequestEvent) -> None:
+        if not response.ok:
+            content = await self._read(response, event)
+            error: str
+            try:
+                error = json_backend.loads(content)["error"]
+            except:
+                error = content.decode("ascii", errors="replace")
+            raise HttpError(
+                error,
+                status=response.status,
+                retry_after=parse_retry_after(response.headers.get("Retry-After"))
+            )
+
+class AsyncGetRequester(_AsyncBaseRequester, Generic[_T]):
+    """
+    A callable-class for performing typed asynchronous `GET` requests to the API.
+    """
+
+    def __getitem__(self, s: Type[_S]) -> AsyncGetRequester[_S]:
+        return cast(AsyncGetRequester[_S], self)
+
+    async def __call__(self, endpoint: str, query_params: Optional[Dict[str, str]] = None) -> _T:
+        return await self._fetch_json("GET", endpoint, idempotent=True, params=query_params)
+
+class AsyncPostRequester(_AsyncBaseRequester, Generic[_T]):
+    """
+    A callable-class for performing typed asynchronous `POST` requests to the API.
+    """
+
+    def __getitem__(self, s: Type[_S]) -> AsyncPostRequester[_S]:
+        return cast(AsyncPostRequester[_S], self)
+
+    async def __call__(self, endpoint: str, body: Dict[str, Any], query_params: Optional[Dict[str, str]] = None, *, idempotent: bool = False) -> _T:
+        """
+        Posts `body` to `endpoint`. As with `PostRequester`, the request is only
+        retried if it is marked as `idempotent`.
+        """
+        return await self._fetch_json("POST", endpoint, idempotent=idempotent, params=query_params, json=body)
+
+class AsyncStreamRequester(_AsyncBaseRequester, Generic[_T]):
+    """
+    A callable-class for performing typed asynchronous stream requests to the API.
+    """
+
+    def __getitem__(self, s: Type[_S]) -> AsyncStreamRequester[_S]:
+        return cast(AsyncStreamRequester[_S], self)
+
+    async def __call__(self, endpoint: str, query_params: Optional[Dict[str, str]] = None, skip: int = 0) -> AsyncGenerator[_T, None]:
+        """
+        Streams the JSON lines returned by `endpoint`. The first `skip` lines are
+        discarded without being parsed.
+        """
+        uri = self._qualify(endpoint)
+        with instrument_request(self.listeners, "GET", endpoint, stream=True) as event:
+            async with await self._retry(lambda: self._send("GET", uri, event, params=query_params), event) as response:
+                # We split lines ourselves, as `aiohttp` refuses to read lines longer
+                # than its buffer, and a single droplet may be arbitrarily large.
+                loads = json_backend.loads
+                splitter = LineSplitter()
+                async for data in self._iter_content(response, event):
+                    for line in splitter.feed(data):
+                        if len(line) == 0:
+                            continue
+                        event.items += 1
+                        if skip > 0:
+                            skip -= 1
+                            continue
+                        started = time.perf_counter()
+                        value = loads(line)
+                        event.parse_time += time.perf_counter() - started
+                        yield value
+
+                line = splitter.close()
+                if len(line) > 0:
+                    event.items += 1
+                    if skip == 0:
+                        yield loads(line)
+
+class AsyncRequest:
+    """
+    The asynchronous counterpart of `Request`. It is passed an optional
+    `api_key`, which defaults to the `DATATAP_API_KEY` environment variable, and
+    an optional base `uri`.
+
+    All requests share the connections held by `session_pool`. If none is
+    provided, a default `AsyncSessionPool` is created. Metadata is cached in
+    `metadata_cache`, and requests are reported to `listeners` and counted in
+    `transfer_stats`, as with `Request`. Likewise, if `offline` is set, no
+    requests are made.
+    """
+
+    get: AsyncGetRequester[Any]
+    """
+    Function for typesafe asynchronous `GET` requests.
+    """
+
+    post: AsyncPostRequester[Any]
+    """
+    Function for typesafe asynchronous `POST` requests.
+    """
+
+    stream: AsyncStreamRequester[Any]
+    """
+    Function for typesafe asynchronous streaming requests.
+    """
+
+    session_pool: AsyncSessionPool
+    """
+    The pool of keep-alive connections shared by all requesters.
+    """
+
+    transfer_stats: TransferStats
+    """
+    Counts the data received by all requesters.
+    """
+
+    listeners: List[RequestListener]
+    """
+    The functions to which every request is reported once it completes (see
+    `datatap.api.endpoints.instrumentation`).
+    """
+
+    metadata_cache: MetadataCache
+    """
+    The cache in which metadata returned by the API is stored.
+    """
+
+    scope: str
+    """
+    Identifies the server and credentials that requests are made with, as with
+    `Request.scope`.
+    """
+
+    offline: bool
+    """
+    Whether requests are served entirely from the local caches.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_uri: Optional[str] = None,
+        session_pool: Optional[AsyncSessionPool] = None,
+        metadata_cache: Optional[MetadataCache] = None,
+        offline: Optional[bool] = None
+    ):
+        api_key = api_key or Environment.API_KEY
+        base_uri = base_uri or Environment.BASE_URI
+        self.offline = offline if offline is not None else Environment.OFFLINE
+        self.session_pool = session_pool or AsyncSessionPool()
+        self.metadata_cache = metadata_cache or MetadataCache()
+
+        self.scope, api_key = resolve_scope(api_key, base_uri, self.offline, self.metadata_cache)
+
+        self.transfer_stats = TransferStats()
+        self.listeners = []
+        requester_args = (api_key, base_uri, self.session_pool, self.transfer_stats, self.listeners, self.offline)
+        self.get = AsyncGetRequester[Any](*requester_args)
+        self.post = AsyncPostRequester[Any](*requester_args)
+        self.stream = AsyncStreamRequester[Any](*requester_args)
+
+    def add_listener(self, listener: RequestListener) -> None:
+        """
+        Registers `listener` to be called with a `RequestEvent` after every
+        request (or stream) completes.
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: RequestListener) -> None:
+        """
+        Stops calling `listener` after each request.
+        """
+        self.listeners.remove(listener)
+
+class AsyncApiNamespace:
+    """
+    Base class for asynchronous API endpoints.
+    """
+    def __init__(self, request: AsyncRequest):
+        self.request = request
+        self.get = request.get
+        self.post = request.post
+        self.stream = request.stream
+
+    def _cache_key(self, key: str) -> str:
+        return f"{self.request.scope}|{key}"
+
+    async def _cached(self, key: str, fetch: Callable[[], Awaitable[_T]], *, immutable: bool = False) -> _T:
+        # Caches the result of a request in the metadata cache, as with `ApiNamespace`.
+        if self.request.offline:
+            return self._get_offline(key)
+
+        value = self.request.metadata_cache.get(self._cache_key(key))
+        if value is None:
+            value = await fetch()
+            self.request.metadata_cache.put(self._cache_key(key), value, immutable = immutable)
+        return value
+
+    def _get_offline(self, key: str) -> Any:
+        value = self.request.metadata_cache.get(self._cache_key(key), allow_expired = True)
+        if value is None:
+            raise OfflineError(f"{key} has not been cached, so it cannot be used offline")
+        return value
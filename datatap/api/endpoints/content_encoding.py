@@ -0,0 +1,150 @@
+"""
+Decoding of compressed HTTP responses.
+
+Responses from the API (and split streams in particular, whose droplets repeat
+the same keys over and over) compress extremely well. The client therefore asks
+for every encoding it can decode, and decodes responses itself as they stream
+in, so that it can count both the bytes received and the bytes they decode to.
+
+`gzip` and `deflate` are always supported. `zstd` requires the `zstandard`
+package (available with the `datatap[cache]` extra), and `br` requires the
+`brotli` package.
+"""
+
+from __future__ import annotations
+
+import zlib
+from typing import Any, List, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+def get_supported_encodings() -> List[str]:
+    """
+    Returns the content encodings that can be decoded, from most to least
+    preferred.
+    """
+    encodings: List[str] = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.extend(["gzip", "deflate"])
+    return encodings
+
+class _Decoder:
+    def decompress(self, data: bytes) -> bytes:
+        raise NotImplementedError()
+
+    def flush(self) -> bytes:
+        return b""
+
+class _ZlibDecoder(_Decoder):
+    _decompressor: Any
+
+    def __init__(self, wbits: int):
+        self._decompressor = zlib.decompressobj(wbits)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.decompress(data)
+
+    def flush(self) -> bytes:
+        return self._decompressor.flush()
+
+class _DeflateDecoder(_Decoder):
+    # `deflate` is meant to be zlib-wrapped, but some servers send raw deflate
+    # data instead, so we fall back to that if the first block is not valid.
+    _decompressor: Any
+    _started: bool
+
+    def __init__(self):
+        self._decompressor = zlib.decompressobj()
+        self._started = False
+
+    def decompress(self, data: bytes) -> bytes:
+        if self._started:
+            return self._decompressor.decompress(data)
+
+        try:
+            result = self._decompressor.decompress(data)
+        except zlib.error:
+            self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            result = self._decompressor.decompress(data)
+        self._started = len(data) > 0
+        return result
+
+    def flush(self) -> bytes:
+        return self._decompressor.flush()
+
+class _BrotliDecoder(_Decoder):
+    _decompressor: Any
+
+    def __init__(self):
+        assert brotli is not None
+        self._decompressor = brotli.Decompressor()
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.process(data)
+
+class _ZstdDecoder(_Decoder):
+    _decompressor: Any
+
+    def __init__(self):
+        assert zstandard is not None
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.decompress(data)
+
+class ContentDecoder:
+    """
+    Incrementally decodes a response body sent with the given `Content-Encoding`
+    (which may list several encodings, in the order they were applied).
+
+    Raises a `ValueError` if an encoding is not supported.
+    """
+
+    _decoders: List[_Decoder]
+
+    def __init__(self, content_encoding: Optional[str]):
+        encodings = [
+            encoding.strip().lower()
+            for encoding in (content_encoding or "").split(",")
+            if encoding.strip().lower() not in ("", "identity")
+        ]
+        self._decoders = [_create_decoder(encoding) for encoding in reversed(encodings)]
+
+    def decode(self, data: bytes) -> bytes:
+        """
+        Decodes the next piece of the body.
+        """
+        for decoder in self._decoders:
+            data = decoder.decompress(data)
+        return data
+
+    def flush(self) -> bytes:
+        """
+        Returns whatever remains once the whole body has been decoded.
+        """
+        data = b""
+        for decoder in self._decoders:
+            data = decoder.decompress(data) + decoder.flush() if len(data) > 0 else decoder.flush()
+        return data
+
+def _create_decoder(encoding: str) -> _Decoder:
+    if encoding in ("gzip", "x-gzip"):
+        return _ZlibDecoder(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return _DeflateDecoder()
+    if encoding == "br" and brotli is not None:
+        return _BrotliDecoder()
+    if encoding == "zstd" and zstandard is not None:
+        return _ZstdDecoder()
+    raise ValueError(f"Unsupported content encoding {repr(encoding)}")
@@ -11,16 +11,19 @@ class Database(ApiNamespace):
         """
         Returns a list of `JsonDatabase`s that the current user has access to.
         """
-        return self.get[List[JsonDatabase]]("/database")
+        return self._cached("database", lambda: self.get[List[JsonDatabase]]("/database"))
 
     def query_by_uid(self, database: str) -> JsonDatabase:
         """
         Returns a specific `JsonDatabase`, identified by UID.
         """
-        return self.get[JsonDatabase](f"/database/{database}")
+        return self._cached(f"database/{database}", lambda: self.get[JsonDatabase](f"/database/{database}"))
 
     def query_by_name(self, database_name: str) -> List[JsonDatabase]:
         """
         Returns a list of `JsonDatabase`s with the name `database_name`.
         """
-        return self.post[List[JsonDatabase]](f"/database/query", { "name": database_name })
\ No newline at end of file
+        return self._cached(
+            f"database/query/{database_name}",
+            lambda: self.post[List[JsonDatabase]](f"/database/query", { "name": database_name }, idempotent = True)
+        )
\ No newline at end of file
@@ -1,31 +1,53 @@
 from __future__ import annotations
 from datatap.api.types.dataset import JsonDataset
 
-import tempfile
-import ctypes
-from typing import Generator
-from multiprocessing import Array, set_start_method
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, Generator, Iterable, Optional
 
 from datatap.droplet import ImageAnnotationJson
-from datatap.utils import CacheGenerator
+from datatap.cache import CacheGenerator, SplitCache, fill_cache
+from datatap.utils import resumable_stream
 
-from .request import ApiNamespace
-
-set_start_method("spawn", force = True)
-process_directory_value = Array(ctypes.c_char, tempfile.mkdtemp(prefix="datatap-").encode("ascii"))
-process_directory: str = process_directory_value.value.decode("ascii")
+from .request import ApiNamespace, OfflineError, Request
 
 class Dataset(ApiNamespace):
     """
     Raw API for interacting with dataset endpoints.
     """
 
+    split_cache: SplitCache
+    """
+    The cache in which streamed splits are stored.
+    """
+
+    def __init__(self, request: Request, split_cache: Optional[SplitCache] = None):
+        super().__init__(request)
+        self.split_cache = split_cache or SplitCache()
+
     def query(self, database_uid: str, namespace: str, name: str, tag: str) -> JsonDataset:
         """
         Queries the database for a dataset with given `namespace`, `name`, and `tag`.
         Returns a `JsonDataset`.
         """
-        return self.get[JsonDataset](f"/database/{database_uid}/repository/{namespace}/{name}/{tag}")
+        # Dataset versions never change, but tags may be moved to point at other versions. We therefore cache which
+        # version a tag points to for a limited time, and the versions themselves indefinitely.
+        metadata_cache = self.request.metadata_cache
+        tag_key = self._cache_key(f"dataset/{database_uid}/{namespace}/{name}/{tag}")
+
+        uid = metadata_cache.get(tag_key, allow_expired = self.request.offline)
+        if uid is not None:
+            cached = metadata_cache.get(self._cache_key(f"dataset/{database_uid}/{uid}"))
+            if cached is not None:
+                return cached
+
+        if self.request.offline:
+            raise OfflineError(f"Dataset {namespace}/{name}:{tag} has not been cached, so it cannot be used offline")
+
+        dataset = self.get[JsonDataset](f"/database/{database_uid}/repository/{namespace}/{name}/{tag}")
+        metadata_cache.put(self._cache_key(f"dataset/{database_uid}/{dataset['uid']}"), dataset, immutable = True)
+        metadata_cache.put(tag_key, dataset["uid"], immutable = dataset["uid"] == tag)
+        return dataset
 
     def stream_split(
         self,
@@ -43,18 +65,163 @@ class Dataset(ApiNamespace):
         `split`. Additionally, since this endpoint automatically shards the split, you must provide a chunk number
         (`chunk`) and the total number of chunks in the shard (`nchunks`).
 
-        The result is a generator of `ImageAnnotationJson`s.
+        The result is a generator of `ImageAnnotationJson`s. Streamed splits are stored in `split_cache`, and will
+        be served from there on subsequent calls. Once the full split has been cached, any chunking of it is served
+        locally (see `datatap.cache.SplitCache`).
         """
         if chunk < 0 or chunk >= nchunks:
             raise Exception(f"Invalid chunk specification. {chunk} must be in the range [0, {nchunks})")
 
-        dir_name = f"{process_directory}/{namespace}-{name}-{uid}-{split}-{nchunks}"
-        file_name = f"{dir_name}/chunk-{chunk}.jsonl"
+        self.split_cache.touch(database_uid = database_uid, dataset_uid = uid, split = split)
+
+        def consolidate() -> bool:
+            return self.split_cache.consolidate(database_uid = database_uid, dataset_uid = uid, split = split, nchunks = nchunks)
+
+        def on_complete():
+            consolidate()
+            # Makes room for the newly cached split, without evicting the split itself.
+            self.split_cache.evict(keep = [
+                self.split_cache.get_split_directory(database_uid = database_uid, dataset_uid = uid, split = split)
+            ])
+
+        consolidate()
+        cached = self.split_cache.read_chunk(
+            database_uid = database_uid,
+            dataset_uid = uid,
+            split = split,
+            chunk = chunk,
+            nchunks = nchunks
+        )
+        if cached is not None:
+            return cached
 
-        def create_stream():
-            return self.stream[ImageAnnotationJson](
+        file_name = self.split_cache.get_chunk_path(
+            database_uid = database_uid,
+            dataset_uid = uid,
+            split = split,
+            chunk = chunk,
+            nchunks = nchunks
+        )
+        if self.request.offline and not self.split_cache.is_cached(file_name):
+            raise OfflineError(f"Split {split} of dataset {uid} has not been cached, so it cannot be used offline")
+
+        resume_stream = self._resume_stream(
+            database_uid = database_uid,
+            namespace = namespace,
+            name = name,
+            uid = uid,
+            split = split,
+            chunk = chunk,
+            nchunks = nchunks
+        )
+
+        return CacheGenerator(
+            file_name,
+            lambda: resume_stream(0),
+            on_complete = on_complete,
+            read_ahead = self.split_cache.read_ahead,
+            flush_records = self.split_cache.flush_records,
+            flush_interval = self.split_cache.flush_interval,
+            cache_format = self.split_cache.cache_format,
+            compression = self.split_cache.compression,
+            resume_stream = resume_stream,
+            json_lines = True
+        )
+
+    def fetch_split(
+        self,
+        *,
+        database_uid: str,
+        namespace: str,
+        name: str,
+        uid: str,
+        split: str,
+        parallelism: int = 1,
+        progress: Optional[Callable[[int], object]] = None
+    ) -> str:
+        """
+        Ensures that the full split is stored in `split_cache`, streaming it if necessary, and returns the path of
+        its canonical cache file.
+
+        If `parallelism` is greater than one, the split is streamed as that many chunks over concurrent
+        connections, which are then assembled into the canonical cache file. If given, `progress` is periodically
+        called with the number of droplets cached since it was last called (e.g. `tqdm.update`). It may be called
+        from other threads, but never concurrently.
+        """
+        self.split_cache.touch(database_uid = database_uid, dataset_uid = uid, split = split)
+        split_path = self.split_cache.get_split_path(database_uid = database_uid, dataset_uid = uid, split = split)
+        if self.split_cache.consolidate(database_uid = database_uid, dataset_uid = uid, split = split, nchunks = 1):
+            return split_path
+        if self.request.offline:
+            raise OfflineError(f"Split {split} of dataset {uid} has not been cached, so it cannot be used offline")
+
+        progress_lock = Lock()
+        def report_progress(count: int):
+            if progress is not None:
+                with progress_lock:
+                    progress(count)
+
+        def fill_chunk(chunk: int, nchunks: int):
+            resume_stream = self._resume_stream(
+                database_uid = database_uid,
+                namespace = namespace,
+                name = name,
+                uid = uid,
+                split = split,
+                chunk = chunk,
+                nchunks = nchunks
+            )
+
+            fill_cache(
+                self.split_cache.get_chunk_path(database_uid = database_uid, dataset_uid = uid, split = split, chunk = chunk, nchunks = nchunks),
+                lambda: resume_stream(0),
+                cache_format = self.split_cache.cache_format,
+                compression = self.split_cache.compression,
+                progress = report_progress,
+                resume_stream = resume_stream,
+                json_lines = True
+            )
+
+        if parallelism > 1:
+            with ThreadPoolExecutor(parallelism) as executor:
+                for future in [executor.submit(fill_chunk, chunk, parallelism) for chunk in range(parallelism)]:
+                    future.result()
+
+        # If the canonical copy is being assembled elsewhere, we wait for it by (trying to) stream it ourselves.
+        if parallelism <= 1 or not self.split_cache.consolidate(database_uid = database_uid, dataset_uid = uid, split = split, nchunks = parallelism):
+            fill_chunk(0, 1)
+
+        # Makes room for the newly cached split, without evicting the split itself.
+        self.split_cache.evict(keep = [self.split_cache.get_split_directory(database_uid = database_uid, dataset_uid = uid, split = split)])
+        return split_path
+
+    def _resume_stream(
+        self,
+        *,
+        database_uid: str,
+        namespace: str,
+        name: str,
+        uid: str,
+        split: str,
+        chunk: int,
+        nchunks: int
+    ) -> Callable[[int], Iterable[bytes]]:
+        # Returns a function that streams a chunk of a split from the given droplet onwards, reconnecting (from the
+        # last droplet received) whenever the connection drops. The server has no way to start a stream partway
+        # through, so the droplets before that point are skipped as they arrive.
+        #
+        # Droplets are streamed as raw lines of JSON, so that they can be written to the cache without being parsed
+        # (see `CacheGenerator`). Failures to open the stream and dropped connections are both retried here, as the
+        # session pool's `retry_policy` allows, so the requester does not retry the stream itself.
+        def open_stream(skip: int) -> Iterable[bytes]:
+            return self.stream.lines(
                 f"/database/{database_uid}/repository/{namespace}/{name}/{uid}/split/{split}/stream",
-                { "chunk": str(chunk), "nchunks": str(nchunks) }
+                { "chunk": str(chunk), "nchunks": str(nchunks) },
+                skip = skip,
+                retry = False
             )
 
-        return CacheGenerator(file_name, create_stream)
\ No newline at end of file
+        def resume_stream(skip: int) -> Iterable[bytes]:
+            return resumable_stream(open_stream, skip = skip, retry_policy = self.request.session_pool.retry_policy)
+
+        return resume_stream
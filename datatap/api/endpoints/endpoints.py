@@ -1,7 +1,13 @@
 from datatap.api.endpoints.repository_endpoints import Repository
 from typing import Optional
 
+from datatap.cache import SplitCache
+
+from .instrumentation import RequestListener
+from .metadata_cache import MetadataCache
 from .request import Request
+from .session import SessionPool
+from .transfer_stats import TransferStats
 from .user_endpoints import User
 from .database_endpoints import Database
 from .dataset_endpoints import Dataset
@@ -31,12 +37,39 @@ class ApiEndpoints:
     Dataset endpoints.
     """
 
+    transfer_stats: TransferStats
+    """
+    Counts the data received by these endpoints.
+    """
+
     _request: Request
 
-    def __init__(self, api_key: Optional[str] = None, uri: Optional[str] = None):
-        self._request = Request(api_key, uri)
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        uri: Optional[str] = None,
+        session_pool: Optional[SessionPool] = None,
+        split_cache: Optional[SplitCache] = None,
+        metadata_cache: Optional[MetadataCache] = None,
+        offline: Optional[bool] = None
+    ):
+        self._request = Request(api_key, uri, session_pool, metadata_cache, offline)
 
         self.user = User(self._request)
         self.database = Database(self._request)
         self.repository = Repository(self._request)
-        self.dataset = Dataset(self._request)
\ No newline at end of file
+        self.dataset = Dataset(self._request, split_cache)
+        self.transfer_stats = self._request.transfer_stats
+
+    def add_listener(self, listener: RequestListener) -> None:
+        """
+        Registers `listener` to be called with a `RequestEvent` after every
+        request made by these endpoints. See `datatap.api.endpoints.instrumentation`.
+        """
+        self._request.add_listener(listener)
+
+    def remove_listener(self, listener: RequestListener) -> None:
+        """
+        Stops calling `listener` after each request.
+        """
+        self._request.remove_listener(listener)
\ No newline at end of file
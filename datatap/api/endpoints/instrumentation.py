@@ -0,0 +1,353 @@
+"""
+Instrumentation of the requests made to the API.
+
+Every request made through a `Request` (or an `AsyncRequest`) is reported,
+once it completes, to the listeners registered with `Request.add_listener` (or
+`ApiEndpoints.add_listener`) as a `RequestEvent`. A listener is any callable
+taking an event, so events can be forwarded to a tracing or metrics system
+(for instance, as OpenTelemetry spans, using `start_time` and `duration`).
+
+`RequestMetrics` is a listener that aggregates events in-process:
+
+```py
+metrics = RequestMetrics()
+api.endpoints.add_listener(metrics)
+...
+metrics.dump()
+```
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Generator, List, Optional, TextIO
+
+from datatap.utils import HttpError, basic_repr
+from datatap.utils.histogram import Histogram
+
+class RequestEvent:
+    """
+    Describes a completed (or failed) request.
+    """
+
+    method: str
+    """
+    The HTTP method of the request.
+    """
+
+    endpoint: str
+    """
+    The API endpoint requested, without its query parameters.
+    """
+
+    stream: bool
+    """
+    Whether the response was streamed as lines.
+    """
+
+    start_time: float
+    """
+    When the request was started, as a UNIX timestamp.
+    """
+
+    duration: float
+    """
+    The number of seconds from the start of the request until its response was
+    fully read (or, for streams, until the stream was closed).
+    """
+
+    time_to_first_byte: Optional[float]
+    """
+    The number of seconds from the start of the request until the first bytes
+    of a successful response's body were received, if any were.
+    """
+
+    parse_time: float
+    """
+    The number of seconds spent parsing JSON from the response.
+    """
+
+    status: Optional[int]
+    """
+    The status of the (last) response, if one was received.
+    """
+
+    attempts: int
+    """
+    The number of times the request was attempted (see `RetryPolicy`).
+    """
+
+    wire_bytes: int
+    """
+    The number of body bytes received, before they were decoded.
+    """
+
+    decoded_bytes: int
+    """
+    The number of body bytes received, after they were decoded.
+    """
+
+    items: int
+    """
+    The number of lines (such as droplets) received from a stream.
+    """
+
+    error: Optional[BaseException]
+    """
+    The exception that ended the request, if any.
+    """
+
+    def __init__(self, method: str, endpoint: str, *, stream: bool, start_time: float):
+        self.method = method
+        self.endpoint = endpoint
+        self.stream = stream
+        self.start_time = start_time
+        self.duration = 0.0
+        self.time_to_first_byte = None
+        self.parse_time = 0.0
+        self.status = None
+        self.attempts = 0
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+        self.items = 0
+        self.error = None
+
+    @property
+    def items_per_second(self) -> Optional[float]:
+        """
+        The rate at which lines were received from a stream.
+        """
+        return self.items / self.duration if self.stream and self.duration > 0 else None
+
+    def __repr__(self) -> str:
+        return basic_repr(
+            "RequestEvent",
+            self.method,
+            self.endpoint,
+            status = self.status,
+            duration = self.duration,
+            attempts = self.attempts,
+            decoded_bytes = self.decoded_bytes,
+            items = self.items,
+            error = self.error
+        )
+
+RequestListener = Callable[[RequestEvent], None]
+"""
+A function called with each completed `RequestEvent`.
+"""
+
+@contextmanager
+def instrument_request(listeners: List[RequestListener], method: str, endpoint: str, *, stream: bool = False) -> Generator[RequestEvent, None, None]:
+    """
+    Reports the request made within this context to `listeners` once it is done,
+    as a `RequestEvent` which the request fills in.
+    """
+    event = RequestEvent(method, endpoint, stream=stream, start_time=time.time())
+    started = time.perf_counter()
+    try:
+        yield event
+    except GeneratorExit:
+        # A stream that was closed early did not fail.
+        raise
+    except Exception as error:
+        event.error = error
+        if isinstance(error, HttpError):
+            event.status = error.status
+        raise
+    finally:
+        event.duration = time.perf_counter() - started
+        for listener in list(listeners):
+            listener(event)
+
+class EndpointMetrics:
+    """
+    Aggregated measurements of the requests to one endpoint.
+    """
+
+    latency: Histogram
+    """
+    The duration of each request, in seconds.
+    """
+
+    time_to_first_byte: Histogram
+    """
+    The time to first byte of each request, in seconds.
+    """
+
+    parse_time: Histogram
+    """
+    The time spent parsing JSON from each request, in seconds.
+    """
+
+    requests: int
+    """
+    The number of requests.
+    """
+
+    errors: int
+    """
+    The number of requests that failed.
+    """
+
+    retries: int
+    """
+    The number of times requests were retried.
+    """
+
+    wire_bytes: int
+    """
+    The number of body bytes received, before they were decoded.
+    """
+
+    decoded_bytes: int
+    """
+    The number of body bytes received, after they were decoded.
+    """
+
+    items: int
+    """
+    The number of lines received from streams.
+    """
+
+    stream_time: float
+    """
+    The total duration of the streams, in seconds.
+    """
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.time_to_first_byte = Histogram()
+        self.parse_time = Histogram()
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+        self.items = 0
+        self.stream_time = 0.0
+
+    @property
+    def items_per_second(self) -> Optional[float]:
+        """
+        The mean rate at which lines were received from streams.
+        """
+        return self.items / self.stream_time if self.stream_time > 0 else None
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Returns the metrics as a JSON-serializable dictionary.
+        """
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "wire_bytes": self.wire_bytes,
+            "decoded_bytes": self.decoded_bytes,
+            "items": self.items,
+            "items_per_second": self.items_per_second,
+            "latency": self.latency.summary(),
+            "time_to_first_byte": self.time_to_first_byte.summary(),
+            "parse_time": self.parse_time.summary(),
+        }
+
+class RequestMetrics:
+    """
+    A `RequestListener` that aggregates events by endpoint, as given by
+    `group_by` (which defaults to the method and endpoint of each request).
+    """
+
+    group_by: Callable[[RequestEvent], str]
+    """
+    Returns the name under which an event is aggregated.
+    """
+
+    endpoints: Dict[str, EndpointMetrics]
+    """
+    The metrics of each endpoint.
+    """
+
+    _lock: threading.Lock
+
+    def __init__(self, group_by: Optional[Callable[[RequestEvent], str]] = None):
+        self.group_by = group_by or _group_by_endpoint
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: RequestEvent) -> None:
+        name = self.group_by(event)
+        with self._lock:
+            metrics = self.endpoints.get(name)
+            if metrics is None:
+                metrics = self.endpoints[name] = EndpointMetrics()
+
+            metrics.requests += 1
+            metrics.errors += event.error is not None
+            metrics.retries += max(event.attempts - 1, 0)
+            metrics.wire_bytes += event.wire_bytes
+            metrics.decoded_bytes += event.decoded_bytes
+            if event.stream:
+                metrics.items += event.items
+                metrics.stream_time += event.duration
+
+        metrics.latency.record(event.duration)
+        metrics.parse_time.record(event.parse_time)
+        if event.time_to_first_byte is not None:
+            metrics.time_to_first_byte.record(event.time_to_first_byte)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the metrics of every endpoint as a JSON-serializable dictionary.
+        """
+        with self._lock:
+            endpoints = dict(self.endpoints)
+        return { name: metrics.summary() for name, metrics in endpoints.items() }
+
+    def dump(self, file: Optional[TextIO] = None) -> None:
+        """
+        Prints a table of the metrics of every endpoint to `file` (which defaults
+        to `stdout`).
+        """
+        file = file or sys.stdout
+        print(
+            f"{'endpoint':<48} {'requests':>8} {'errors':>6} {'retries':>7} {'p50 (ms)':>9} {'p99 (ms)':>9} "
+            f"{'ttfb (ms)':>9} {'parse (s)':>9} {'MiB':>9} {'items/s':>9}",
+            file = file
+        )
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+        for name, metrics in endpoints:
+            ttfb = metrics.time_to_first_byte.quantile(0.5)
+            rate = metrics.items_per_second
+            print(
+                f"{name[-48:]:<48} {metrics.requests:>8} {metrics.errors:>6} {metrics.retries:>7} "
+                f"{(metrics.latency.quantile(0.5) or 0) * 1000:>9.1f} {(metrics.latency.quantile(0.99) or 0) * 1000:>9.1f} "
+                f"{(ttfb or 0) * 1000:>9.1f} {metrics.parse_time.total:>9.3f} {metrics.decoded_bytes / 2 ** 20:>9.2f} "
+                f"{rate or 0:>9.0f}",
+                file = file
+            )
+
+    def reset(self) -> None:
+        """
+        Discards every measurement.
+        """
+        with self._lock:
+            self.endpoints = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return basic_repr("RequestMetrics", endpoints = list(self.endpoints))
+
+def _group_by_endpoint(event: RequestEvent) -> str:
+    return f"{event.method} {event.endpoint}"
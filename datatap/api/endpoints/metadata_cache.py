@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from datatap.utils import basic_repr
+from datatap.utils.environment import Environment
+
+_T = TypeVar("_T")
+
+class MetadataCache:
+    """
+    A cache of the metadata (databases, repositories, tags and datasets)
+    returned by the API.
+
+    Dataset versions (and their templates) never change, so they are cached
+    indefinitely. Everything else may change on the server, and is cached for
+    `ttl` seconds. With a `ttl` of zero, mutable metadata is always fetched
+    again (though it is still kept for use offline).
+
+    Entries are held in memory, and are carried along when the cache is pickled
+    (for instance, into a `DataLoader` worker). If a directory `path` is given
+    (or `$DATATAP_METADATA_CACHE_DIR` is set), they are also persisted to it, so
+    that they are shared by every process using it, and are available offline.
+
+    ```py
+    Api(metadata_cache = MetadataCache(ttl = 600, path = "/tmp/datatap-metadata"))
+    ```
+    """
+
+    ttl: float
+    """
+    The number of seconds for which mutable metadata is cached.
+    """
+
+    path: Optional[str]
+    """
+    The directory in which entries are persisted, if any.
+    """
+
+    _entries: Dict[str, Tuple[Any, Optional[float]]]
+    _lock: threading.Lock
+
+    def __init__(self, ttl: Optional[float] = None, path: Optional[str] = None):
+        self.ttl = ttl if ttl is not None else Environment.METADATA_TTL
+        self.path = (path if path is not None else Environment.METADATA_CACHE_DIR) or None
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, *, allow_expired: bool = False) -> Optional[Any]:
+        """
+        Returns the value cached under `key`, or `None` if there is none. If
+        `allow_expired` is set, values are returned even once they have expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and self.path is not None:
+            entry = self._load(key)
+            if entry is not None:
+                with self._lock:
+                    self._entries[key] = entry
+
+        if entry is None:
+            return None
+
+        value, expires = entry
+        if not allow_expired and expires is not None and expires <= time.time():
+            return None
+
+        # Callers are free to modify what they are given, so the cached value
+        # must never be handed out directly.
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value: Any, *, immutable: bool = False) -> None:
+        """
+        Caches `value`, which must be JSON-serializable, under `key`. Unless
+        `immutable` is set, the value expires after `ttl` seconds.
+        """
+        entry = (copy.deepcopy(value), None if immutable else time.time() + self.ttl)
+        with self._lock:
+            self._entries[key] = entry
+        if self.path is not None:
+            self._store(key, entry)
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], _T], *, immutable: bool = False) -> _T:
+        """
+        Returns the value cached under `key`, calling `fetch` (and caching its
+        result) if there is none.
+        """
+        value = self.get(key)
+        if value is None:
+            value = fetch()
+            self.put(key, value, immutable = immutable)
+        return value
+
+    def clear(self) -> None:
+        """
+        Removes every entry from the cache, including those persisted to `path`.
+        """
+        with self._lock:
+            self._entries.clear()
+        if self.path is not None and os.path.isdir(self.path):
+            for file_name in os.listdir(self.path):
+                if file_name.endswith(".json"):
+                    try:
+                        os.remove(os.path.join(self.path, file_name))
+                    except FileNotFoundError:
+                        pass
+
+    def _get_file_name(self, key: str) -> str:
+        assert self.path is not None
+        return os.path.join(self.path, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def _load(self, key: str) -> Optional[Tuple[Any, Optional[float]]]:
+        try:
+            with open(self._get_file_name(key), "r") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if stored.get("key") != key:
+            return None
+        return stored["value"], stored["expires"]
+
+    def _store(self, key: str, entry: Tuple[Any, Optional[float]]) -> None:
+        # Entries are written atomically, as other processes may be reading them.
+        file_name = self._get_file_name(key)
+        tmp_file_name = f"{file_name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.path, exist_ok = True) # type: ignore - path is set
+            with open(tmp_file_name, "w") as f:
+                json.dump({ "key": key, "expires": entry[1], "value": entry[0] }, f)
+            os.replace(tmp_file_name, file_name)
+        except OSError:
+            # The entry is still cached in memory, so a read-only directory is not an error.
+            pass
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        with self._lock:
+            state["_entries"] = dict(self._entries)
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return basic_repr("MetadataCache", ttl = self.ttl, path = self.path, entries = len(self._entries))
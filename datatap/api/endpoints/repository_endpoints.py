@@ -12,11 +12,17 @@ class Repository(ApiNamespace):
         """
         Returns a list of `JsonRepository`s in the database specified by `database_uid`.
         """
-        return self.get[List[JsonRepository]](f"/database/{database_uid}/repository")
+        return self._cached(
+            f"repository/{database_uid}",
+            lambda: self.get[List[JsonRepository]](f"/database/{database_uid}/repository")
+        )
 
     def query(self, database_uid: str, namespace: str, name: str) -> JsonRepository:
         """
         Queries the database for the repository with a given `namespace` and `name`, and
         returns the corresponding `JsonRepository` list.
         """
-        return self.get[JsonRepository](f"/database/{database_uid}/repository/{namespace}/{name}")
+        return self._cached(
+            f"repository/{database_uid}/{namespace}/{name}",
+            lambda: self.get[JsonRepository](f"/database/{database_uid}/repository/{namespace}/{name}")
+        )
@@ -1,127 +1,334 @@
 from __future__ import annotations
+from datatap.utils import HttpError, RetryPolicy, json_backend
 from datatap.utils.environment import Environment
+from datatap.utils.retry import parse_retry_after
 
-import json
+import hashlib
+import time
 from base64 import b64encode
-from urllib.parse import urljoin
-from typing import Generator, Optional, Dict, TypeVar, Generic, Type, Any, cast
+from urllib.parse import urljoin, urlparse
+from typing import Callable, Generator, Iterable, List, Optional, Dict, Tuple, TypeVar, Generic, Type, Any, cast
 
 import requests
+import urllib3
+
+from .content_encoding import ContentDecoder
+from .instrumentation import RequestEvent, RequestListener, instrument_request
+from .metadata_cache import MetadataCache
+from .session import SessionPool
+from .transfer_stats import TransferStats
 
 _T = TypeVar("_T")
 _S = TypeVar("_S")
+_U = TypeVar("_U")
+
+# `requests` reads streams 512 bytes at a time by default, which costs far more
+# than decoding them.
+_STREAM_CHUNK_SIZE = 1 << 16
+
+# Requests that must not be retried are still made through a policy, so that the circuit breaker sees them.
+_NO_RETRIES = RetryPolicy(max_attempts = 1)
 
-class GetRequester(Generic[_T]):
+class OfflineError(Exception):
     """
-    A callable-class for performing typed `GET` requests to the API.
+    Raised when the API is used offline, and something that is needed has not
+    been cached.
+    """
+
+class _BaseRequester:
+    """
+    Shared state and helpers for the typed requesters.
     """
     api_key: str
     uri: str
-
-    def __init__(self, api_key: str, base_uri: str):
+    session_pool: SessionPool
+    transfer_stats: TransferStats
+    listeners: List[RequestListener]
+    offline: bool
+
+    _headers: Dict[str, str]
+    _host: str
+
+    def __init__(
+        self,
+        api_key: str,
+        base_uri: str,
+        session_pool: SessionPool,
+        transfer_stats: TransferStats,
+        listeners: List[RequestListener],
+        offline: bool = False
+    ):
         self.api_key = api_key
         self.uri = base_uri
+        self.session_pool = session_pool
+        self.transfer_stats = transfer_stats
+        self.listeners = listeners
+        self.offline = offline
 
-    def __getitem__(self, s: Type[_S]) -> GetRequester[_S]:
-        return cast(GetRequester[_S], self)
-
-    def __call__(self, endpoint: str, query_params: Optional[Dict[str, str]] = None) -> _T:
-        qualified_uri = urljoin(self.uri, "/api/" + endpoint)
         encoded_api_key = b64encode(bytes(self.api_key, "ascii")).decode("ascii")
-
-        response = requests.get(
-            qualified_uri,
-            params=query_params,
-            headers={
-                "Authorization": f"Bearer {encoded_api_key}"
-            },
+        self._headers = { "Authorization": f"Bearer {encoded_api_key}" }
+        self._host = urlparse(base_uri).netloc
+
+    def _qualify(self, endpoint: str) -> str:
+        if self.offline:
+            raise OfflineError(f"Cannot request {endpoint} while offline")
+        return urljoin(self.uri, "/api/" + endpoint)
+
+    def _iter_content(self, response: requests.Response, event: RequestEvent) -> Generator[bytes, None, None]:
+        # Decodes the body of `response` as it is received. We decode it ourselves (rather than letting `requests`
+        # do so) so that we can support more encodings, and count the bytes received.
+        decoder = BodyDecoder(response.headers.get("Content-Encoding"), response.ok, self.transfer_stats, event)
+        for data in _read_raw(response):
+            decoded = decoder.decode(data)
+            if len(decoded) > 0:
+                yield decoded
+
+        decoded = decoder.flush()
+        if len(decoded) > 0:
+            yield decoded
+
+    def _retry(self, request: Callable[[], _U], event: RequestEvent, *, retry: bool = True) -> _U:
+        def attempt() -> _U:
+            event.attempts += 1
+            return request()
+
+        policy = self.session_pool.retry_policy if retry else _NO_RETRIES
+        return policy.call(
+            attempt,
+            circuit_breaker=self.session_pool.circuit_breaker,
+            host=self._host
         )
 
+    def _send(self, method: str, uri: str, event: RequestEvent, **kwargs: Any) -> requests.Response:
+        # Sends a request, raising an `HttpError` if it fails. The caller is responsible for closing the response.
+        response = self.session_pool.session.request(method, uri, headers=self._headers, stream=True, **kwargs)
+        event.status = response.status_code
+        try:
+            self._raise_for_error(response, event)
+        except:
+            response.close()
+            raise
+        return response
+
+    def _fetch_json(self, method: str, endpoint: str, *, idempotent: bool, **kwargs: Any) -> Any:
+        # Requests that are not `idempotent` are not retried, as they may have taken effect before failing.
+        uri = self._qualify(endpoint)
+        with instrument_request(self.listeners, method, endpoint) as event:
+            # The whole response is read within the retry, so that it is retried if the connection drops partway.
+            def fetch() -> Any:
+                with self._send(method, uri, event, **kwargs) as response:
+                    content = b"".join(self._iter_content(response, event))
+                started = time.perf_counter()
+                value = json_backend.loads(content)
+                event.parse_time += time.perf_counter() - started
+                return value
+            return self._retry(fetch, event, retry=idempotent)
+
+    def _raise_for_error(self, response: requests.Response, event: RequestEvent) -> None:
         if not response.ok:
+            content = b"".join(self._iter_content(response, event))
             error: str
             try:
-                error = response.json()["error"]
+                error = json_backend.loads(content)["error"]
             except:
-                error = response.content.decode("ascii")
-            raise Exception(error)
+                error = content.decode("ascii", errors="replace")
+            raise HttpError(
+                error,
+                status=response.status_code,
+                retry_after=parse_retry_after(response.headers.get("Retry-After"))
+            )
+
+class GetRequester(_BaseRequester, Generic[_T]):
+    """
+    A callable-class for performing typed `GET` requests to the API.
+    """
+
+    def __getitem__(self, s: Type[_S]) -> GetRequester[_S]:
+        return cast(GetRequester[_S], self)
 
-        return response.json()
+    def __call__(self, endpoint: str, query_params: Optional[Dict[str, str]] = None) -> _T:
+        return self._fetch_json("GET", endpoint, idempotent=True, params=query_params)
 
-class PostRequester(Generic[_T]):
+class PostRequester(_BaseRequester, Generic[_T]):
     """
     A callable-class for performing typed `Post` requests to the API.
     """
-    api_key: str
-    uri: str
-
-    def __init__(self, api_key: str, base_uri: str):
-        self.api_key = api_key
-        self.uri = base_uri
 
     def __getitem__(self, s: Type[_S]) -> PostRequester[_S]:
         return cast(PostRequester[_S], self)
 
-    def __call__(self, endpoint: str, body: Dict[str, Any], query_params: Optional[Dict[str, str]] = None) -> _T:
-        qualified_uri = urljoin(self.uri, "/api/" + endpoint)
-        encoded_api_key = b64encode(bytes(self.api_key, "ascii")).decode("ascii")
+    def __call__(self, endpoint: str, body: Dict[str, Any], query_params: Optional[Dict[str, str]] = None, *, idempotent: bool = False) -> _T:
+        """
+        Posts `body` to `endpoint`. The request is only retried if it fails when
+        it is marked as `idempotent` (such as a query that changes nothing).
+        """
+        return self._fetch_json("POST", endpoint, idempotent=idempotent, params=query_params, json=body)
 
-        response = requests.post(
-            qualified_uri,
-            params=query_params,
-            headers={
-                "Authorization": f"Bearer {encoded_api_key}"
-            },
-            json=body,
-        )
-
-        if not response.ok:
-            error: str
-            try:
-                error = response.json()["error"]
-            except:
-                error = response.content.decode("ascii")
-            raise Exception(error)
-
-        return response.json()
-
-class StreamRequester(Generic[_T]):
+class StreamRequester(_BaseRequester, Generic[_T]):
     """
     A callable-class for performing typed stream requests to the API.
     """
-    api_key: str
-    uri: str
-
-    def __init__(self, api_key: str, uri: str):
-        self.api_key = api_key
-        self.uri = uri
 
     def __getitem__(self, s: Type[_S]) -> StreamRequester[_S]:
         return cast(StreamRequester[_S], self)
 
-    def __call__(self, endpoint: str, query_params: Optional[Dict[str, str]] = None) -> Generator[_T, None, None]:
-        qualified_uri = urljoin(self.uri, "/api/" + endpoint)
-        encoded_api_key = b64encode(bytes(self.api_key, "ascii")).decode("ascii")
-
-        response = requests.get(
-            qualified_uri,
-            params=query_params,
-            headers={
-                "Authorization": f"Bearer {encoded_api_key}"
-            },
-            stream=True
-        )
-
-        if not response.ok:
-            error: str
-            try:
-                error = response.json()["error"]
-            except:
-                error = response.content.decode("ascii")
-            raise Exception(error)
+    def __call__(self, endpoint: str, query_params: Optional[Dict[str, str]] = None, skip: int = 0) -> Generator[_T, None, None]:
+        """
+        Streams the JSON lines returned by `endpoint`. The first `skip` lines are
+        discarded without being parsed.
+        """
+        return self._stream(endpoint, query_params, skip, parse=True, retry=True)
+
+    def lines(
+        self,
+        endpoint: str,
+        query_params: Optional[Dict[str, str]] = None,
+        skip: int = 0,
+        *,
+        retry: bool = True
+    ) -> Generator[bytes, None, None]:
+        """
+        Streams the lines returned by `endpoint` as raw bytes, without their line
+        endings. Empty lines are ignored, and the first `skip` lines are discarded.
+
+        If `retry` is `False`, the stream is opened only once, for callers that
+        retry the stream as a whole (see `resumable_stream`).
+        """
+        return self._stream(endpoint, query_params, skip, parse=False, retry=retry)
+
+    def _stream(self, endpoint: str, query_params: Optional[Dict[str, str]], skip: int, parse: bool, retry: bool) -> Generator[Any, None, None]:
+        uri = self._qualify(endpoint)
+        with instrument_request(self.listeners, "GET", endpoint, stream=True) as event:
+            response = self._retry(lambda: self._send("GET", uri, event, params=query_params), event, retry=retry)
+
+            # Closing the response returns its connection to the pool, even if the
+            # consumer abandons the stream partway through.
+            with response:
+                loads = json_backend.loads
+                for line in _split_lines(self._iter_content(response, event)):
+                    if len(line) == 0:
+                        continue
+                    event.items += 1
+                    if skip > 0:
+                        skip -= 1
+                        continue
+                    if parse:
+                        started = time.perf_counter()
+                        value = loads(line)
+                        event.parse_time += time.perf_counter() - started
+                        yield value
+                    else:
+                        yield line
+
+class BodyDecoder:
+    """
+    Decodes a response body a piece at a time (see `ContentDecoder`), counting
+    the bytes received in `transfer_stats` and `event`. This is shared by the
+    synchronous and asynchronous requesters.
+    """
 
-        for line in response.iter_lines(decode_unicode=True):
-            yield json.loads(line)
+    def __init__(self, content_encoding: Optional[str], ok: bool, transfer_stats: TransferStats, event: RequestEvent):
+        self._decoder = ContentDecoder(content_encoding)
+        self._ok = ok
+        self._transfer_stats = transfer_stats
+        self._event = event
+        transfer_stats.add(responses=1)
+
+    def decode(self, data: bytes) -> bytes:
+        """
+        Decodes the next piece of the body.
+        """
+        if self._event.time_to_first_byte is None and self._ok:
+            self._event.time_to_first_byte = time.time() - self._event.start_time
+        decoded = self._decoder.decode(data)
+        self._transfer_stats.add(wire_bytes=len(data), decoded_bytes=len(decoded))
+        self._event.wire_bytes += len(data)
+        self._event.decoded_bytes += len(decoded)
+        return decoded
+
+    def flush(self) -> bytes:
+        """
+        Returns whatever remains once the whole body has been decoded.
+        """
+        decoded = self._decoder.flush()
+        self._transfer_stats.add(decoded_bytes=len(decoded))
+        self._event.decoded_bytes += len(decoded)
+        return decoded
+
+def _read_raw(response: requests.Response) -> Generator[bytes, None, None]:
+    # Reads the body of `response` without decoding it, raising the same exceptions that `iter_content` would.
+    try:
+        yield from response.raw.stream(_STREAM_CHUNK_SIZE, decode_content=False)
+    except urllib3.exceptions.ProtocolError as error:
+        raise requests.exceptions.ChunkedEncodingError(error)
+    except urllib3.exceptions.ReadTimeoutError as error:
+        raise requests.exceptions.ConnectionError(error)
+    except urllib3.exceptions.SSLError as error:
+        raise requests.exceptions.SSLError(error)
+
+class LineSplitter:
+    """
+    Splits a stream of bytes, fed to it a chunk at a time, into lines without
+    their line endings. Pieces of a line that spans several chunks are only
+    joined once the line is complete, so long lines do not take quadratic time to
+    assemble.
+    """
 
+    _pieces: List[bytes]
+
+    def __init__(self):
+        self._pieces = []
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """
+        Returns the lines completed by `chunk`.
+        """
+        lines = chunk.split(b"\n")
+        if len(lines) == 1:
+            self._pieces.append(chunk)
+            return []
+
+        self._pieces.append(lines[0])
+        lines[0] = b"".join(self._pieces)
+        self._pieces = [lines.pop()]
+        return [line[:-1] if line.endswith(b"\r") else line for line in lines]
+
+    def close(self) -> bytes:
+        """
+        Returns the final line, which is not followed by a line ending (and so
+        may be empty).
+        """
+        line = b"".join(self._pieces)
+        self._pieces = []
+        return line[:-1] if line.endswith(b"\r") else line
+
+def _split_lines(chunks: Iterable[bytes]) -> Generator[bytes, None, None]:
+    # Splits a stream of bytes into lines, as with `LineSplitter`.
+    splitter = LineSplitter()
+    for chunk in chunks:
+        yield from splitter.feed(chunk)
+    yield splitter.close()
+
+def resolve_scope(api_key: Optional[str], base_uri: str, offline: bool, metadata_cache: MetadataCache) -> Tuple[str, str]:
+    """
+    Returns the scope that metadata is cached in for these credentials (see
+    `Request.scope`), and the API key to make requests with.
+    """
+    # Offline, we fall back to the credentials that were last used with this server, so that metadata cached with
+    # them can still be found.
+    scope_key = f"scope|{base_uri}"
+    if api_key is not None:
+        scope = f"{base_uri}|{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]}"
+        if not offline and metadata_cache.get(scope_key) != scope:
+            metadata_cache.put(scope_key, scope, immutable = True)
+        return scope, api_key
+    elif offline:
+        scope = metadata_cache.get(scope_key, allow_expired = True)
+        if scope is None:
+            raise OfflineError(f"Nothing has been cached for {base_uri}, so it cannot be used offline")
+        return scope, ""
+    else:
+        raise Exception("No API key available. Either provide it or use the [DATATAP_API_KEY] environment variable")
 
 class Request:
     """
@@ -130,6 +337,14 @@ class Request:
     the `DATATAP_API_KEY` environment variable. It can also be passed a base
     `uri` for connecting to a different dataTap server (such as through a
     proxy).
+
+    All requests share the connections held by `session_pool`. If none is
+    provided, a default `SessionPool` is created. Likewise, metadata is cached
+    in `metadata_cache`.
+
+    If `offline` is set, no requests are made. Instead, metadata is served from
+    `metadata_cache` (however old it is), and an `OfflineError` is raised for
+    anything that has not been cached. An API key is not required offline.
     """
 
     get: GetRequester[Any]
@@ -147,15 +362,74 @@ class Request:
     Function for typesafe streaming requests.
     """
 
-    def __init__(self, api_key: Optional[str] = None, base_uri: Optional[str] = None):
+    session_pool: SessionPool
+    """
+    The pool of keep-alive connections shared by all requesters.
+    """
+
+    transfer_stats: TransferStats
+    """
+    Counts the data received by all requesters.
+    """
+
+    listeners: List[RequestListener]
+    """
+    The functions to which every request is reported once it completes (see
+    `datatap.api.endpoints.instrumentation`).
+    """
+
+    metadata_cache: MetadataCache
+    """
+    The cache in which metadata returned by the API is stored.
+    """
+
+    scope: str
+    """
+    Identifies the server and credentials that requests are made with. Metadata
+    is cached separately for each scope, as different users may see different
+    metadata.
+    """
+
+    offline: bool
+    """
+    Whether requests are served entirely from the local caches.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_uri: Optional[str] = None,
+        session_pool: Optional[SessionPool] = None,
+        metadata_cache: Optional[MetadataCache] = None,
+        offline: Optional[bool] = None
+    ):
         api_key = api_key or Environment.API_KEY
         base_uri = base_uri or Environment.BASE_URI
-        if api_key is None:
-            raise Exception("No API key available. Either provide it or use the [DATATAP_API_KEY] environment variable")
-
-        self.get = GetRequester[Any](api_key, base_uri)
-        self.post = PostRequester[Any](api_key, base_uri)
-        self.stream = StreamRequester[Any](api_key, base_uri)
+        self.offline = offline if offline is not None else Environment.OFFLINE
+        self.session_pool = session_pool or SessionPool()
+        self.metadata_cache = metadata_cache or MetadataCache()
+
+        self.scope, api_key = resolve_scope(api_key, base_uri, self.offline, self.metadata_cache)
+
+        self.transfer_stats = TransferStats()
+        self.listeners = []
+        requester_args = (api_key, base_uri, self.session_pool, self.transfer_stats, self.listeners, self.offline)
+        self.get = GetRequester[Any](*requester_args)
+        self.post = PostRequester[Any](*requester_args)
+        self.stream = StreamRequester[Any](*requester_args)
+
+    def add_listener(self, listener: RequestListener) -> None:
+        """
+        Registers `listener` to be called with a `RequestEvent` after every
+        request (or stream) completes.
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: RequestListener) -> None:
+        """
+        Stops calling `listener` after each request.
+        """
+        self.listeners.remove(listener)
 
 class ApiNamespace:
     """
@@ -166,3 +440,18 @@ class ApiNamespace:
         self.get = request.get
         self.post = request.post
         self.stream = request.stream
+
+    def _cache_key(self, key: str) -> str:
+        return f"{self.request.scope}|{key}"
+
+    def _cached(self, key: str, fetch: Callable[[], _T], *, immutable: bool = False) -> _T:
+        # Caches the result of a request in the metadata cache (see `MetadataCache`).
+        if self.request.offline:
+            return self._get_offline(key)
+        return self.request.metadata_cache.get_or_fetch(self._cache_key(key), fetch, immutable = immutable)
+
+    def _get_offline(self, key: str) -> Any:
+        value = self.request.metadata_cache.get(self._cache_key(key), allow_expired = True)
+        if value is None:
+            raise OfflineError(f"{key} has not been cached, so it cannot be used offline")
+        return value
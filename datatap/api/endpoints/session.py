@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from datatap.utils import CircuitBreaker, RetryPolicy
+
+from .content_encoding import get_supported_encodings
+
+class SessionPool:
+    """
+    A process-aware pool of keep-alive HTTP connections.
+
+    All of the requesters owned by a `Request` share a single `SessionPool`, so
+    consecutive API calls reuse the same TCP (and TLS) connection instead of
+    performing a fresh handshake for every call.
+
+    Connections cannot be shared between processes, so the underlying session
+    is created lazily and is recreated whenever the pool is used from a new
+    process (for instance, in a forked or spawned `DataLoader` worker). The
+    session is also dropped when the pool is pickled.
+    """
+
+    pool_connections: int
+    """
+    The number of distinct hosts for which connection pools are kept.
+    """
+
+    pool_maxsize: int
+    """
+    The maximum number of connections kept alive per host.
+    """
+
+    pool_block: bool
+    """
+    If `True`, requests will block once `pool_maxsize` connections to a host
+    are in use, rather than opening (and then discarding) extra connections.
+    """
+
+    keep_alive: bool
+    """
+    Whether connections should be kept alive between requests. When `False`,
+    every request asks the server to close the connection once it completes.
+    """
+
+    accept_encoding: str
+    """
+    The `Accept-Encoding` header sent with every request. By default, every
+    encoding that can be decoded is accepted.
+    """
+
+    retry_policy: RetryPolicy
+    """
+    Determines which failed requests are retried, and how soon.
+    """
+
+    circuit_breaker: CircuitBreaker
+    """
+    Tracks failures for each host, so that requests to a host that keeps
+    failing are refused for a while rather than adding to its load.
+    """
+
+    _session: Optional[requests.Session]
+    _pid: Optional[int]
+    _lock: threading.Lock
+
+    def __init__(
+        self,
+        *,
+        pool_connections: int = 4,
+        pool_maxsize: int = 16,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        accept_encoding: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.accept_encoding = accept_encoding if accept_encoding is not None else ", ".join(get_supported_encodings())
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """
+        The `requests.Session` for the current process.
+        """
+        pid = os.getpid()
+        session = self._session
+        if session is not None and self._pid == pid:
+            return session
+
+        with self._lock:
+            if self._session is None or self._pid != pid:
+                # We intentionally do not close a session inherited from a parent
+                # process, as its sockets are still in use by the parent.
+                self._session = self._create_session()
+                self._pid = pid
+            return self._session
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections = self.pool_connections,
+            pool_maxsize = self.pool_maxsize,
+            pool_block = self.pool_block,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["Connection"] = "keep-alive" if self.keep_alive else "close"
+        session.headers["Accept-Encoding"] = self.accept_encoding
+        return session
+
+    def close(self) -> None:
+        """
+        Closes all idle connections held by this pool in the current process.
+        """
+        with self._lock:
+            if self._session is not None and self._pid == os.getpid():
+                self._session.close()
+            self._session = None
+            self._pid = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_session"] = None
+        state["_pid"] = None
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
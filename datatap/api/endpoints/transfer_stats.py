@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict
+
+from datatap.utils import basic_repr
+
+class TransferStats:
+    """
+    Counts the data received from the API. Response bodies may be compressed in
+    transit (see `datatap.api.endpoints.content_encoding`), so both the bytes
+    received and the bytes they decode to are counted.
+
+    ```py
+    api = Api()
+    ...
+    stats = api.endpoints.transfer_stats
+    print(f"{stats.wire_bytes} bytes received, {stats.compression_ratio:.1f}x compression")
+    ```
+    """
+
+    responses: int
+    """
+    The number of responses received.
+    """
+
+    wire_bytes: int
+    """
+    The number of body bytes received, before they were decoded.
+    """
+
+    decoded_bytes: int
+    """
+    The number of body bytes received, after they were decoded.
+    """
+
+    _lock: threading.Lock
+
+    def __init__(self):
+        self.responses = 0
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def compression_ratio(self) -> float:
+        """
+        The ratio of decoded bytes to bytes received.
+        """
+        return self.decoded_bytes / self.wire_bytes if self.wire_bytes > 0 else 1.0
+
+    def add(self, *, responses: int = 0, wire_bytes: int = 0, decoded_bytes: int = 0) -> None:
+        """
+        Adds to the counters.
+        """
+        with self._lock:
+            self.responses += responses
+            self.wire_bytes += wire_bytes
+            self.decoded_bytes += decoded_bytes
+
+    def reset(self) -> None:
+        """
+        Resets every counter to zero.
+        """
+        with self._lock:
+            self.responses = 0
+            self.wire_bytes = 0
+            self.decoded_bytes = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return basic_repr(
+            "TransferStats",
+            responses = self.responses,
+            wire_bytes = self.wire_bytes,
+            decoded_bytes = self.decoded_bytes
+        )
@@ -9,4 +9,4 @@ class User(ApiNamespace):
         """
         Returns a `JsonUser` representing the logged in user.
         """
-        return self.get[JsonUser]("/user")
+        return self._cached("user", lambda: self.get[JsonUser]("/user"))
@@ -3,6 +3,8 @@ The `datatap.api.entities` submodule contains several enttiies
 that provide a user-friendly abstraction for the dataTap API.
 """
 
+from typing import TYPE_CHECKING
+
 from .api import Api
 
 from .user import User
@@ -10,6 +12,23 @@ from .database import Database
 from .dataset import AnyDataset, Dataset
 from .repository import Repository, Tag, Split
 
+from datatap.utils import lazy_exports
+
+if TYPE_CHECKING:
+    from .async_api import AsyncApi
+    from .async_database import AsyncDatabase
+    from .async_dataset import AnyAsyncDataset, AsyncDataset
+    from .async_repository import AsyncRepository
+
+# `aiohttp` is slow to import, so the asynchronous API is only imported when it is used.
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "AsyncApi": ".async_api",
+    "AsyncDatabase": ".async_database",
+    "AnyAsyncDataset": ".async_dataset",
+    "AsyncDataset": ".async_dataset",
+    "AsyncRepository": ".async_repository",
+})
+
 __all__ = [
     "Api",
     "User",
@@ -19,4 +38,9 @@ __all__ = [
     "Repository",
     "Tag",
     "Split",
+    "AsyncApi",
+    "AsyncDatabase",
+    "AnyAsyncDataset",
+    "AsyncDataset",
+    "AsyncRepository",
 ]
\ No newline at end of file
@@ -1,12 +1,14 @@
-from typing import List, Optional, Union, overload
+from typing import List, Optional, Sequence, Tuple, Union, overload
 
 from typing_extensions import Literal
 
-from datatap.utils.helpers import assert_one
+from datatap.cache import SplitCache
+from datatap.utils.helpers import assert_one, map_concurrently
 
 from .user import User
 from .database import Database
-from ..endpoints import ApiEndpoints
+from .dataset import AnyDataset
+from ..endpoints import ApiEndpoints, MetadataCache, SessionPool
 
 class Api:
     """
@@ -24,6 +26,30 @@ class Api:
     are using a proxy to reach the API, you can use the `uri` argument to
     point toward your proxy.
 
+    Requests made through an `Api` reuse a pool of keep-alive connections. If
+    you need to tune it (for instance, to allow more concurrent connections),
+    you can pass your own `SessionPool` as `session_pool`.
+
+    Streamed splits are cached on disk, and reused across runs. The location
+    of this cache can be changed by passing a `SplitCache` as `split_cache`
+    (or by setting the `DATATAP_CACHE_DIR` environment variable).
+
+    Metadata returned by the API is cached as well: dataset versions
+    indefinitely, and everything else (such as which version a tag points to)
+    for a minute. This can be configured by passing a `MetadataCache` as
+    `metadata_cache`. Metadata is only kept in memory, unless it is given a
+    directory in which to persist it (or the `DATATAP_METADATA_CACHE_DIR`
+    environment variable is set).
+
+    If `offline` is set (or the `DATATAP_OFFLINE` environment variable is set
+    to `1`), the API is never contacted. Metadata and splits are then served
+    entirely from the local caches, whatever their age, and anything that has
+    not been cached raises an `OfflineError`. Neither an API key nor a network
+    connection is required offline, so training can be repeated on a machine
+    without network access once its datasets have been cached (for instance,
+    with `python -m datatap.cache warm`), provided that their metadata was
+    persisted.
+
     This object encapsulates most of the logic for interacting with API.
     For instance, to get a list of all datasets that a user has access to,
     you can run
@@ -42,8 +68,16 @@ class Api:
     For more details on the functionality provided by the Api object, take
     a look at its documentation.
     """
-    def __init__(self, api_key: Optional[str] = None, uri: Optional[str] = None):
-        self.endpoints = ApiEndpoints(api_key, uri)
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        uri: Optional[str] = None,
+        session_pool: Optional[SessionPool] = None,
+        split_cache: Optional[SplitCache] = None,
+        metadata_cache: Optional[MetadataCache] = None,
+        offline: Optional[bool] = None
+    ):
+        self.endpoints = ApiEndpoints(api_key, uri, session_pool, split_cache, metadata_cache, offline)
 
     def get_current_user(self) -> User:
         """
@@ -98,3 +132,51 @@ class Api:
             return database_list
         else:
             return assert_one(database_list)
+
+    def get_datasets(
+        self,
+        slugs: Sequence[str],
+        *,
+        database: Optional[Database] = None,
+        max_workers: int = 16
+    ) -> List[Union[AnyDataset, Exception]]:
+        """
+        Queries many datasets by their slugs (namespace/name:tag) at once, using up to `max_workers` concurrent
+        requests. Datasets are looked up in `database`, which defaults to the user's default database.
+
+        The results are returned in the same order as `slugs`. If a dataset cannot be queried, the exception raised
+        while querying it is returned in its place, so a single bad slug does not prevent the rest from resolving.
+
+        ```py
+        slugs = ["_/coco:latest", "_/wider-person:latest"]
+        datasets = api.get_datasets(slugs)
+        failed = [slug for slug, dataset in zip(slugs, datasets) if isinstance(dataset, Exception)]
+        ```
+        """
+        if database is None:
+            database = self.get_default_database()
+        return database.get_datasets(slugs, max_workers = max_workers)
+
+    def get_all_datasets(self, *, max_workers: int = 16) -> List[Union[AnyDataset, Exception]]:
+        """
+        Queries every dataset in every database that the current user has access to (as in
+        `Database.get_all_datasets`), using up to `max_workers` concurrent requests.
+        """
+        databases = self.get_database_list()
+        slug_lists = map_concurrently(Database.get_dataset_slugs, databases, max_workers = max_workers)
+
+        # A database whose datasets cannot be listed contributes its exception in place of its datasets.
+        requests: List[Tuple[Database, Union[str, Exception]]] = []
+        for database, slugs in zip(databases, slug_lists):
+            if isinstance(slugs, Exception):
+                requests.append((database, slugs))
+            else:
+                requests.extend((database, slug) for slug in slugs)
+
+        def query(request: Tuple[Database, Union[str, Exception]]) -> AnyDataset:
+            database, slug = request
+            if isinstance(slug, Exception):
+                raise slug
+            return database.get_dataset(slug)
+
+        return map_concurrently(query, requests, max_workers = max_workers)
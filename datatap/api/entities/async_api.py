@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from types import TracebackType
+from typing import List, Optional, Type, Union, overload
+
+from typing_extensions import Literal
+
+from datatap.cache import SplitCache
+from datatap.utils.helpers import assert_one
+
+from .user import User
+from .async_database import AsyncDatabase
+from ..endpoints import AsyncApiEndpoints, AsyncSessionPool, MetadataCache
+
+class AsyncApi:
+    """
+    The asynchronous counterpart of `Api`, for use from `asyncio` code. It takes
+    the same arguments as `Api` (with an `AsyncSessionPool` in place of a
+    `SessionPool`), and provides the same methods as coroutines. The entities it
+    returns (`AsyncDatabase`, `AsyncRepository` and `AsyncDataset`) are likewise
+    asynchronous.
+
+    Since requests do not block one another, many of them can be made at once
+    from a single thread. For instance, to list every dataset that a user has
+    access to,
+
+    ```py
+    import asyncio
+    from datatap import AsyncApi
+
+    async def main():
+        async with AsyncApi() as api:
+            databases = await api.get_database_list()
+            repositories = await asyncio.gather(*[database.get_repository_list() for database in databases])
+            print(repositories)
+
+    asyncio.run(main())
+    ```
+
+    The number of connections open at once is bounded by the `AsyncSessionPool`.
+
+    Metadata is cached, requests can be observed with `endpoints.add_listener`,
+    and `offline` is honoured, all as with `Api`. However, splits streamed from
+    the server are not cached, so offline, only splits that were fully cached
+    beforehand can be streamed.
+
+    The asynchronous API requires the `aiohttp` package, which is available with
+    the `datatap[async]` extra.
+    """
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        uri: Optional[str] = None,
+        session_pool: Optional[AsyncSessionPool] = None,
+        split_cache: Optional[SplitCache] = None,
+        metadata_cache: Optional[MetadataCache] = None,
+        offline: Optional[bool] = None
+    ):
+        self.endpoints = AsyncApiEndpoints(api_key, uri, session_pool, split_cache, metadata_cache, offline)
+
+    async def get_current_user(self) -> User:
+        """
+        Returns the current logged-in user.
+        """
+        return User.from_json(self.endpoints, await self.endpoints.user.current()) # type: ignore - users never use their endpoints
+
+    async def get_database_list(self) -> List[AsyncDatabase]:
+        """
+        Returns a list of all databases that the current user has access to.
+        """
+        return [
+            AsyncDatabase.from_json(self.endpoints, json_db)
+            for json_db in await self.endpoints.database.list()
+        ]
+
+    async def get_default_database(self) -> AsyncDatabase:
+        """
+        Returns the default database for the user (this defaults to the public
+        database).
+        """
+        current_user = await self.get_current_user()
+        if current_user.default_database is None:
+            raise Exception("Trying to find the default database, but none is specified")
+
+        return await self.get_database_by_uid(current_user.default_database)
+
+    async def get_database_by_uid(self, uid: str) -> AsyncDatabase:
+        """
+        Queries a database by its UID and returns it.
+        """
+        return AsyncDatabase.from_json(self.endpoints, await self.endpoints.database.query_by_uid(uid))
+
+    @overload
+    async def get_database_by_name(self, name: str, allow_multiple: Literal[True]) -> List[AsyncDatabase]: ...
+    @overload
+    async def get_database_by_name(self, name: str, allow_multiple: Literal[False] = False) -> AsyncDatabase: ...
+    async def get_database_by_name(self, name: str, allow_multiple: bool = False) -> Union[AsyncDatabase, List[AsyncDatabase]]:
+        """
+        Queries a database by its name and returns it. If `allow_multiple` is true, it will return
+        a list of databases.
+        """
+        database_list = [
+            AsyncDatabase.from_json(self.endpoints, database)
+            for database in await self.endpoints.database.query_by_name(name)
+        ]
+
+        if allow_multiple:
+            return database_list
+        else:
+            return assert_one(database_list)
+
+    async def close(self) -> None:
+        """
+        Closes the connections held by this API's session pool.
+        """
+        await self.endpoints.close()
+
+    async def __aenter__(self) -> AsyncApi:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType]
+    ) -> None:
+        await self.close()
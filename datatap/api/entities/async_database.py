@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from typing import Any, List, overload
+
+from datatap.utils import basic_repr
+
+from .async_dataset import AnyAsyncDataset, AsyncDataset
+from .async_repository import AsyncRepository
+from ..endpoints import AsyncApiEndpoints
+from ..types import JsonDatabase, JsonDatabaseOptions
+
+class AsyncDatabase:
+    """
+    The asynchronous counterpart of `Database`, as returned by an `AsyncApi`.
+    """
+    _endpoints: AsyncApiEndpoints
+
+    uid: str
+    """
+    The UID of this database.
+    """
+
+    name: str
+    """
+    The name of this database.
+    """
+
+    connection_options: JsonDatabaseOptions
+    """
+    How this database is configured. Sensitive details, such as database
+    credentials, are omitted.
+    """
+
+    @staticmethod
+    def from_json(endpoints: AsyncApiEndpoints, json: JsonDatabase) -> AsyncDatabase:
+        """
+        Creates an `AsyncDatabase` from a `JsonDatabase`.
+        """
+        return AsyncDatabase(
+            endpoints,
+            uid = json["uid"],
+            name = json["name"],
+            connection_options = json["connectionOptions"]
+        )
+
+    def __init__(self, endpoints: AsyncApiEndpoints, uid: str, *, name: str, connection_options: JsonDatabaseOptions):
+        self._endpoints = endpoints
+        self.uid = uid
+        self.name = name
+        self.connection_options = connection_options
+
+    async def get_repository_list(self) -> List[AsyncRepository]:
+        """
+        Returns a list of all `AsyncRepository`s that are stored in this database.
+        """
+        return [
+            AsyncRepository.from_json(self._endpoints, self.uid, repository_json)
+            for repository_json in await self._endpoints.repository.list(self.uid)
+        ]
+
+    @overload
+    async def get_repository(self, slug: str) -> AsyncRepository: ...
+    @overload
+    async def get_repository(self, namespace: str, name: str) -> AsyncRepository: ...
+    async def get_repository(self, *args: str, **kwargs: Any) -> AsyncRepository:
+        """
+        Queries an `AsyncRepository` by its namespace and name, or via its slug (namespace/name).
+        """
+        if len(kwargs) > 0:
+            raise ValueError("get_repository is positional-only")
+        elif len(args) == 1:
+            namespace, name = args[0].split("/")
+        else:
+            namespace, name = args
+
+        return AsyncRepository.from_json(self._endpoints, self.uid, await self._endpoints.repository.query(self.uid, namespace, name))
+
+    @overload
+    async def get_dataset(self, slug: str) -> AnyAsyncDataset: ...
+    @overload
+    async def get_dataset(self, namespace: str, name: str, tag: str) -> AnyAsyncDataset: ...
+    async def get_dataset(self, *args: str, **kwargs: Any) -> AnyAsyncDataset:
+        """
+        Queries an `AsyncDataset` by its namespace, name, and tag, or via its slug (namespace/name:tag).
+        """
+        if len(kwargs) > 0:
+            raise ValueError("get_dataset is positional-only")
+        elif len(args) == 1:
+            repo_slug, tag = args[0].split(":")
+            namespace, name = repo_slug.split("/")
+        else:
+            namespace, name, tag = args
+
+        return AsyncDataset.from_json(self._endpoints, await self._endpoints.dataset.query(self.uid, namespace, name, tag))
+
+    def __repr__(self):
+        return basic_repr("AsyncDatabase", self.uid, name = self.name)
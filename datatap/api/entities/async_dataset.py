@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from typing import AsyncGenerator, Generic, List, TypeVar, Union, cast, overload
+
+from datatap.droplet import ImageAnnotation, VideoAnnotation
+from datatap.template import ImageAnnotationTemplate, VideoAnnotationTemplate
+from datatap.utils import basic_repr
+
+from .dataset import DatasetRepository, get_annotation_parser, template_from_json
+from ..endpoints import AsyncApiEndpoints
+from ..types import JsonDataset
+
+T = TypeVar("T", ImageAnnotationTemplate, VideoAnnotationTemplate)
+
+class AsyncDataset(Generic[T]):
+    """
+    The asynchronous counterpart of `Dataset`, as returned by an `AsyncApi`.
+    """
+    _endpoints: AsyncApiEndpoints
+
+    uid: str
+    """
+    The UID of this `AsyncDataset`.
+    """
+
+    database: str
+    """
+    The UID of the database in which this dataset lives.
+    """
+
+    repository: DatasetRepository
+    """
+    The repository this dataset belongs to.
+    """
+
+    splits: List[str]
+    """
+    A list of all the splits that this dataset has. By default, this will be
+    `["training", "validation"]`.
+    """
+
+    template: T
+    """
+    The template that all annotations in this dataset version adhere to.
+    """
+
+    @staticmethod
+    def from_json(endpoints: AsyncApiEndpoints, json: JsonDataset) -> AnyAsyncDataset:
+        """
+        Creates a new `AsyncDataset` from a `JsonDataset`.
+        """
+        return AsyncDataset(
+            endpoints,
+            uid = json["uid"],
+            database = json["database"],
+            repository = DatasetRepository.from_json(json["repository"]),
+            splits = json["splits"],
+            template = template_from_json(json)
+        )
+
+    def __init__(
+        self,
+        endpoints: AsyncApiEndpoints,
+        uid: str,
+        *,
+        database: str,
+        repository: DatasetRepository,
+        splits: List[str],
+        template: Union[ImageAnnotationTemplate, VideoAnnotationTemplate]
+    ):
+        self._endpoints = endpoints
+        self.uid = uid
+        self.database = database
+        self.repository = repository
+        self.splits = splits
+        # The template decides what `T` is, which the type checker cannot follow.
+        self.template = cast(T, template)
+
+    @overload
+    def stream_split(
+        self: AsyncDataset[ImageAnnotationTemplate],
+        split: str,
+        *,
+        lazy: bool = False
+    ) -> AsyncGenerator[ImageAnnotation, None]: ...
+    @overload
+    def stream_split(
+        self: AsyncDataset[ImageAnnotationTemplate],
+        split: str,
+        chunk: int,
+        nchunks: int,
+        *,
+        lazy: bool = False
+    ) -> AsyncGenerator[ImageAnnotation, None]: ...
+    @overload
+    def stream_split(
+        self: AsyncDataset[VideoAnnotationTemplate],
+        split: str,
+        *,
+        lazy: bool = False
+    ) -> AsyncGenerator[VideoAnnotation, None]: ...
+    @overload
+    def stream_split(
+        self: AsyncDataset[VideoAnnotationTemplate],
+        split: str,
+        chunk: int,
+        nchunks: int,
+        *,
+        lazy: bool = False
+    ) -> AsyncGenerator[VideoAnnotation, None]: ...
+    async def stream_split(
+        self,
+        split: str,
+        chunk: int = 0,
+        nchunks: int = 1,
+        *,
+        lazy: bool = False
+    ) -> AsyncGenerator[Union[ImageAnnotation, VideoAnnotation], None]:
+        """
+        Streams a specific split of this dataset, as in `Dataset.stream_split`, for use with `async for`.
+
+        ```py
+        async for annotation in dataset.stream_split("training"):
+            ...
+        ```
+
+        Splits that have been fully cached (for instance, with `Dataset.cache_split`) are read from the split cache.
+        Other splits are streamed from the server, and are not written to the cache.
+
+        If `lazy` is true, then the annotations are parsed lazily, as in `Dataset.stream_split`.
+        """
+        parse = get_annotation_parser(self.template, lazy)
+        async for droplet in self._endpoints.dataset.stream_split(
+            database_uid = self.database,
+            namespace = self.repository.namespace,
+            name = self.repository.name,
+            uid = self.uid,
+            split = split,
+            chunk = chunk,
+            nchunks = nchunks,
+        ):
+            yield parse(droplet)
+
+    def get_stable_identifier(self) -> str:
+        return f"{self.repository.namespace}/{self.repository.name}:{self.uid}"
+
+    def __repr__(self) -> str:
+        return basic_repr(
+            "AsyncDataset",
+            self.get_stable_identifier(),
+            database = self.database,
+            splits = self.splits
+        )
+
+AnyAsyncDataset = Union[AsyncDataset[ImageAnnotationTemplate], AsyncDataset[VideoAnnotationTemplate]]
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+from datatap.utils import basic_repr
+
+from .async_dataset import AnyAsyncDataset, AsyncDataset
+from .repository import Tag
+from ..types import JsonRepository
+from ..endpoints import AsyncApiEndpoints
+
+class AsyncRepository:
+    """
+    The asynchronous counterpart of `Repository`, as returned by an `AsyncApi`.
+    """
+    _endpoints: AsyncApiEndpoints
+    _database: str
+
+    name: str
+    """
+    The name of this repository.
+    """
+
+    namespace: str
+    """
+    The namespace of this repository.
+    """
+
+    tags: Sequence[Tag]
+    """
+    The tags available for this repository.
+    """
+
+    @staticmethod
+    def from_json(endpoints: AsyncApiEndpoints, database: str, json: JsonRepository) -> AsyncRepository:
+        """
+        Creates an `AsyncRepository` from a `JsonRepository`.
+        """
+        return AsyncRepository(
+            endpoints,
+            database,
+            name = json["name"],
+            namespace = json["namespace"],
+            tags = [Tag.from_json(tag) for tag in json["tags"]],
+        )
+
+    def __init__(self, endpoints: AsyncApiEndpoints, database: str, *, name: str, namespace: str, tags: Sequence[Tag]):
+        self._endpoints = endpoints
+        self._database = database
+        self.name = name
+        self.namespace = namespace
+        self.tags = tags
+
+    async def get_dataset(self, tag: str) -> AnyAsyncDataset:
+        """
+        Fetches dataset by its tag (or UID).
+        """
+        return AsyncDataset.from_json(
+            self._endpoints,
+            await self._endpoints.dataset.query(self._database, self.namespace, self.name, tag)
+        )
+
+    def __repr__(self) -> str:
+        return basic_repr("AsyncRepository", name = self.name, namespace = self.namespace, tags = [tag.tag for tag in self.tags])
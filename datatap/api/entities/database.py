@@ -1,8 +1,9 @@
 from __future__ import annotations
-from datatap.api.entities.dataset import AnyDataset
-from typing import Any, List, overload
+from typing import Any, List, Sequence, Set, Union, overload
 
-from datatap.utils import basic_repr
+from datatap.utils import basic_repr, map_concurrently
+
+from .dataset import AnyDataset, Dataset
 
 from .repository import Repository
 from ..endpoints import ApiEndpoints
@@ -92,12 +93,43 @@ class Database:
             raise ValueError("get_repository is positional-only")
         elif len(args) == 1:
             repo_slug, tag = args[0].split(":")
-            repo = self.get_repository(repo_slug)
+            namespace, name = repo_slug.split("/")
         else:
             namespace, name, tag = args
-            repo = self.get_repository(namespace, name)
 
-        return repo.get_dataset(tag)
+        # Datasets are queried by the repository's namespace and name, so there is no need to query the repository
+        # itself first.
+        return Dataset.from_json(self._endpoints, self._endpoints.dataset.query(self.uid, namespace, name, tag))
+
+    def get_datasets(self, slugs: Sequence[str], *, max_workers: int = 16) -> List[Union[AnyDataset, Exception]]:
+        """
+        Queries many `Dataset`s by their slugs (namespace/name:tag) at once, using up to `max_workers` concurrent
+        requests. The results are returned in the same order as `slugs`. If a dataset cannot be queried, the
+        exception raised while querying it is returned in its place.
+        """
+        return map_concurrently(self.get_dataset, slugs, max_workers = max_workers)
+
+    def get_all_datasets(self, *, max_workers: int = 16) -> List[Union[AnyDataset, Exception]]:
+        """
+        Queries every `Dataset` that is tagged in a repository of this database (see `get_dataset_slugs`), using up
+        to `max_workers` concurrent requests. If a dataset cannot be queried, the exception raised while querying it
+        is returned in its place.
+        """
+        return self.get_datasets(self.get_dataset_slugs(), max_workers = max_workers)
+
+    def get_dataset_slugs(self) -> List[str]:
+        """
+        Returns a slug (namespace/name:tag) for every `Dataset` that is tagged in a repository of this database.
+        Datasets are ordered by repository, and then by tag. A dataset with several tags is only included once.
+        """
+        slugs: List[str] = []
+        for repository in self.get_repository_list():
+            uids: Set[str] = set()
+            for tag in repository.tags:
+                if tag.dataset not in uids:
+                    uids.add(tag.dataset)
+                    slugs.append(f"{repository.namespace}/{repository.name}:{tag.tag}")
+        return slugs
 
     def __repr__(self):
         return basic_repr("Database", self.uid, name = self.name)
@@ -1,9 +1,11 @@
 from __future__ import annotations
 from datatap.api.types.dataset import JsonDatasetRepository
 
-from typing import Generator, Generic, List, TypeVar, Union, overload
+from typing import Any, Callable, Generator, Generic, List, Mapping, Optional, TypeVar, Union, overload
 
-from datatap.droplet import ImageAnnotation, VideoAnnotation
+from datatap.cache import SplitReader
+from datatap.droplet import (ImageAnnotation, ImageAnnotationCodec, LazyImageAnnotation, LazyVideoAnnotation,
+                             VideoAnnotation, VideoAnnotationCodec)
 from datatap.template import ImageAnnotationTemplate, VideoAnnotationTemplate
 from datatap.utils import basic_repr
 
@@ -38,6 +40,34 @@ class DatasetRepository:
         self.name = name
         self.namespace = namespace
 
+def template_from_json(json: JsonDataset) -> Union[ImageAnnotationTemplate, VideoAnnotationTemplate]:
+    """
+    Parses the template of a `JsonDataset`.
+    """
+    template_json = json["template"]
+    if template_json["kind"] == "ImageAnnotationTemplate":
+        return ImageAnnotationTemplate.from_json(template_json)
+    elif template_json["kind"] == "VideoAnnotationTemplate":
+        return VideoAnnotationTemplate.from_json(template_json)
+    else:
+        raise ValueError(f"Unknown template kind: {template_json['kind']}")
+
+def get_annotation_parser(
+    template: Union[ImageAnnotationTemplate, VideoAnnotationTemplate],
+    lazy: bool = False
+) -> Callable[[Mapping[str, Any]], Union[ImageAnnotation, VideoAnnotation]]:
+    """
+    Returns the function that parses droplets adhering to `template`, which
+    parses them lazily if `lazy` is true, and otherwise with a codec compiled
+    for the template.
+    """
+    if isinstance(template, ImageAnnotationTemplate):
+        return LazyImageAnnotation.from_json if lazy else ImageAnnotationCodec(template).from_json
+    elif isinstance(template, VideoAnnotationTemplate): # type: ignore - isinstance is excessive
+        return LazyVideoAnnotation.from_json if lazy else VideoAnnotationCodec(template).from_json
+    else:
+        raise ValueError(f"Unknown template kind: {type(template)}")
+
 class Dataset(Generic[T]):
     """
     Represents a concrete version of a dataset. Critically, `Dataset`s cannot be changed
@@ -79,23 +109,13 @@ class Dataset(Generic[T]):
         """
         Creates a new `Dataset` from a `JsonDataset`.
         """
-        template_json = json["template"]
-        template: Union[ImageAnnotationTemplate, VideoAnnotationTemplate]
-
-        if template_json["kind"] == "ImageAnnotationTemplate":
-            template = ImageAnnotationTemplate.from_json(template_json)
-        elif template_json["kind"] == "VideoAnnotationTemplate":
-            template = VideoAnnotationTemplate.from_json(template_json)
-        else:
-            raise ValueError(f"Unknown template kind: {template_json['kind']}")
-
         return Dataset(
             endpoints,
             uid = json["uid"],
             database = json["database"],
             repository = DatasetRepository.from_json(json["repository"]),
             splits = json["splits"],
-            template = template
+            template = template_from_json(json)
         )
 
     def __init__(
@@ -118,32 +138,42 @@ class Dataset(Generic[T]):
     @overload
     def stream_split(
         self: Dataset[ImageAnnotationTemplate],
-        split: str
+        split: str,
+        *,
+        lazy: bool = False
     ) -> Generator[ImageAnnotation, None, None]: ...
     @overload
     def stream_split(
         self: Dataset[ImageAnnotationTemplate],
         split: str,
         chunk: int,
-        nchunks: int
+        nchunks: int,
+        *,
+        lazy: bool = False
     ) -> Generator[ImageAnnotation, None, None]: ...
     @overload
     def stream_split(
         self: Dataset[VideoAnnotationTemplate],
-        split: str
+        split: str,
+        *,
+        lazy: bool = False
     ) -> Generator[VideoAnnotation, None, None]: ...
     @overload
     def stream_split(
         self: Dataset[VideoAnnotationTemplate],
         split: str,
         chunk: int,
-        nchunks: int
+        nchunks: int,
+        *,
+        lazy: bool = False
     ) -> Generator[VideoAnnotation, None, None]: ...
     def stream_split(
         self,
         split: str,
         chunk: int = 0,
-        nchunks: int = 1
+        nchunks: int = 1,
+        *,
+        lazy: bool = False
     ) -> Generator[Union[ImageAnnotation, VideoAnnotation], None, None]:
         """
         Streams a specific split of this dataset from the database. All yielded annotations will adhere to this
@@ -151,8 +181,26 @@ class Dataset(Generic[T]):
 
         If `chunk` and `nchunks` are omitted, then the full split will be streamed. Otherwise, the split will be
         broken into `nchunks` pieces, and only the chunk identified by `chunk` will be streamed.
+
+        If `lazy` is true, then each annotation is a `datatap.droplet.LazyImageAnnotation` (or
+        `LazyVideoAnnotation`), which only parses the parts of the droplet that are accessed. This is much faster
+        for consumers that only read some of each annotation (such as its bounding boxes).
+        """
+        parse = get_annotation_parser(self.template, lazy)
+        for droplet in self.stream_split_droplets(split, chunk, nchunks):
+            yield parse(droplet)
+
+    def stream_split_droplets(
+        self,
+        split: str,
+        chunk: int = 0,
+        nchunks: int = 1
+    ) -> Generator[Mapping[str, Any], None, None]:
         """
-        for droplet in self._endpoints.dataset.stream_split(
+        Streams a specific split of this dataset, as in `stream_split`, but yields each droplet as parsed JSON
+        rather than as an annotation. This is useful alongside a `datatap.droplet.DropletDecoder`.
+        """
+        return self._endpoints.dataset.stream_split(
             database_uid = self.database,
             namespace = self.repository.namespace,
             name = self.repository.name,
@@ -160,13 +208,75 @@ class Dataset(Generic[T]):
             split = split,
             chunk = chunk,
             nchunks = nchunks,
-        ):
-            if isinstance(self.template, ImageAnnotationTemplate):
-                yield ImageAnnotation.from_json(droplet)
-            elif isinstance(self.template, VideoAnnotationTemplate): # type: ignore - isinstance is excessive
-                yield VideoAnnotation.from_json(droplet)
-            else:
-                raise ValueError(f"Unknown template kind: {type(self.template)}")
+        )
+
+    def cache_split(
+        self,
+        split: str,
+        *,
+        parallelism: int = 1,
+        progress: Optional[Callable[[int], object]] = None
+    ) -> None:
+        """
+        Ensures that a specific split of this dataset is stored in the local split cache, streaming it if it has
+        not yet been cached. This can be used to warm the cache ahead of training.
+
+        If `parallelism` is greater than one, the split is streamed over that many concurrent connections. If
+        given, `progress` is periodically called with the number of annotations cached since it was last called.
+
+        ```py
+        with tqdm(unit = "droplets") as bar:
+            dataset.cache_split("training", parallelism = 8, progress = bar.update)
+        ```
+        """
+        self._endpoints.dataset.fetch_split(
+            database_uid = self.database,
+            namespace = self.repository.namespace,
+            name = self.repository.name,
+            uid = self.uid,
+            split = split,
+            parallelism = parallelism,
+            progress = progress,
+        )
+
+    @overload
+    def get_split_reader(
+        self: Dataset[ImageAnnotationTemplate],
+        split: str,
+        *,
+        lazy: bool = False
+    ) -> SplitReader[ImageAnnotation]: ...
+    @overload
+    def get_split_reader(
+        self: Dataset[VideoAnnotationTemplate],
+        split: str,
+        *,
+        lazy: bool = False
+    ) -> SplitReader[VideoAnnotation]: ...
+    def get_split_reader(
+        self,
+        split: str,
+        *,
+        lazy: bool = False
+    ) -> Union[SplitReader[ImageAnnotation], SplitReader[VideoAnnotation]]:
+        """
+        Returns a `datatap.cache.SplitReader` that provides random access to the annotations in a specific split
+        of this dataset. If the split has not yet been cached, it is streamed in full before this method returns.
+
+        This can be used to build map-style datasets, shuffle across the whole split, or resume partway through
+        an epoch.
+
+        If `lazy` is true, then the annotations are parsed lazily, as in `stream_split`.
+        """
+        file_name = self._endpoints.dataset.fetch_split(
+            database_uid = self.database,
+            namespace = self.repository.namespace,
+            name = self.repository.name,
+            uid = self.uid,
+            split = split,
+        )
+
+        return SplitReader(file_name, get_annotation_parser(self.template, lazy)) # type: ignore - the overloads are correct
 
     def get_stable_identifier(self) -> str:
         return f"{self.repository.namespace}/{self.repository.name}:{self.uid}"
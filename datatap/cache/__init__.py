@@ -0,0 +1,48 @@
+"""
+The `datatap.cache` module manages the local, on-disk cache of dataset splits.
+
+Whenever a split is streamed, it is written to the cache, and subsequent
+streams of the same split are served from disk. By default, the cache is stored
+in `~/.cache/datatap`, but this can be changed with the `DATATAP_CACHE_DIR`
+environment variable, or by passing a `SplitCache` to the `Api`:
+
+```py
+from datatap import Api
+from datatap.cache import SplitCache
+
+api = Api(split_cache = SplitCache("/mnt/scratch/datatap"))
+```
+
+Splits are cached as JSON lines by default. Installing `datatap[cache]` enables
+a binary format that is several times faster to read, which can be selected
+with `SplitCache(cache_format = "msgpack")` or by setting the
+`DATATAP_CACHE_FORMAT` environment variable to `msgpack`.
+
+Cached splits can also be compressed, with either `zstd` (which also requires
+`datatap[cache]`) or `gzip`, using `SplitCache(compression = "zstd:9")` or the
+`DATATAP_CACHE_COMPRESSION` environment variable. Compressed splits are still
+read as streams, and still support random access through `SplitReader`.
+
+The cache can be bounded in size with `SplitCache(max_size = "50G")` or the
+`DATATAP_CACHE_MAX_SIZE` environment variable, in which case the least
+recently used splits are evicted as new splits are cached. Splits can be
+listed, warmed, verified, pinned and purged with `python -m datatap.cache`.
+"""
+
+from .cache_entry import CacheEntry
+from .cache_format import CacheFormat, get_cache_format
+from .cache_generator import CacheGenerator, fill_cache
+from .compression import Compression
+from .split_cache import SplitCache
+from .split_reader import SplitReader
+
+__all__ = [
+    "CacheEntry",
+    "CacheFormat",
+    "get_cache_format",
+    "CacheGenerator",
+    "Compression",
+    "SplitCache",
+    "SplitReader",
+    "fill_cache",
+]
@@ -0,0 +1,166 @@
+"""
+Manages the local split cache from the command line.
+
+```bash
+python -m datatap.cache list
+python -m datatap.cache size
+python -m datatap.cache warm my-namespace/my-repository:latest training validation --pin -j 8
+python -m datatap.cache verify --remove
+python -m datatap.cache purge --max-size 50G
+python -m datatap.cache purge --older-than 30
+python -m datatap.cache unpin --dataset 0123456789abcdef
+```
+
+Every command accepts `--root` to select a cache other than the default, and
+all but `size` and `warm` accept `--database`, `--dataset` and `--split` to
+select particular entries.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from typing import List, Optional
+
+from datatap.api.entities import Api
+
+from .cache_entry import CacheEntry
+from .split_cache import SplitCache
+
+def _format_size(size: int) -> str:
+    if size < 1024:
+        return f"{size}B"
+    scaled = float(size)
+    for unit in ("KiB", "MiB", "GiB"):
+        scaled /= 1024
+        if scaled < 1024:
+            return f"{scaled:.1f}{unit}"
+    return f"{scaled / 1024:.1f}TiB"
+
+def _select(cache: SplitCache, args: argparse.Namespace) -> List[CacheEntry]:
+    return [
+        entry
+        for entry in cache.get_entries()
+        if (args.database is None or entry.database_uid == args.database)
+        and (args.dataset is None or entry.dataset_uid == args.dataset)
+        and (args.split is None or entry.split == args.split)
+    ]
+
+def _list(cache: SplitCache, args: argparse.Namespace) -> int:
+    entries = _select(cache, args)
+    for entry in entries:
+        print(
+            f"{entry.database_uid}  {entry.dataset_uid}  {entry.split:<16} {_format_size(entry.size):>10}  "
+            f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(entry.last_access))}"
+            f"{'  pinned' if entry.pinned else ''}{'' if entry.complete else '  partial'}"
+        )
+    print(f"{len(entries)} entries, {_format_size(sum(entry.size for entry in entries))}")
+    return 0
+
+def _size(cache: SplitCache, args: argparse.Namespace) -> int:
+    size = cache.get_size()
+    budget = f" of {_format_size(cache.max_size)}" if cache.max_size is not None else ""
+    print(f"{cache.root}: {_format_size(size)}{budget}")
+    return 0
+
+def _warm(cache: SplitCache, args: argparse.Namespace) -> int:
+    api = Api(split_cache = cache)
+    database = api.get_database_by_name(args.database) if args.database is not None else api.get_default_database()
+    dataset = database.get_dataset(args.slug)
+    for split in args.splits or dataset.splits:
+        if args.pin:
+            cache.pin(database_uid = dataset.database, dataset_uid = dataset.uid, split = split)
+
+        start = time.monotonic()
+        count = 0
+        def progress(increment: int):
+            nonlocal count
+            count += increment
+            print(f"\r{split}: {count} droplets ({count / max(time.monotonic() - start, 1e-3):.0f}/s)", end = "", file = sys.stderr)
+
+        dataset.cache_split(split, parallelism = args.parallelism, progress = progress)
+        print(f"\rCached {dataset.get_stable_identifier()} {split} in {time.monotonic() - start:.1f}s", " " * 20)
+    return 0
+
+def _verify(cache: SplitCache, args: argparse.Namespace) -> int:
+    failed = 0
+    for entry in _select(cache, args):
+        problems = cache.verify(entry)
+        if len(problems) == 0:
+            continue
+
+        failed += 1
+        for problem in problems:
+            print(f"{entry.database_uid}/{entry.dataset_uid}/{entry.split}: {problem}")
+        if args.remove and not cache.remove(entry):
+            print(f"{entry.database_uid}/{entry.dataset_uid}/{entry.split}: in use, not removed")
+    print(f"{failed} invalid entries")
+    return 1 if failed > 0 and not args.remove else 0
+
+def _purge(cache: SplitCache, args: argparse.Namespace) -> int:
+    if args.max_size is not None:
+        removed = cache.evict(args.max_size)
+    else:
+        cutoff: Optional[float] = time.time() - args.older_than * 86400 if args.older_than is not None else None
+        removed = [
+            entry
+            for entry in _select(cache, args)
+            if (args.include_pinned or not entry.pinned)
+            and (cutoff is None or entry.last_access < cutoff)
+            and cache.remove(entry)
+        ]
+    print(f"Removed {len(removed)} entries, {_format_size(sum(entry.size for entry in removed))}")
+    return 0
+
+def _pin(cache: SplitCache, args: argparse.Namespace) -> int:
+    for entry in _select(cache, args):
+        if args.command == "pin":
+            cache.pin(database_uid = entry.database_uid, dataset_uid = entry.dataset_uid, split = entry.split)
+        else:
+            cache.unpin(database_uid = entry.database_uid, dataset_uid = entry.dataset_uid, split = entry.split)
+        print(f"{args.command.capitalize()}ned {entry.database_uid}/{entry.dataset_uid}/{entry.split}")
+    return 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog = "python -m datatap.cache", description = "Manages the local split cache.")
+    parser.add_argument("--root", help = "the cache directory (defaults to $DATATAP_CACHE_DIR)")
+    commands = parser.add_subparsers(dest = "command", required = True)
+
+    def add_command(name: str, help: str, select: bool = True) -> argparse.ArgumentParser:
+        command = commands.add_parser(name, help = help)
+        if select:
+            command.add_argument("--database", help = "only include entries from this database UID")
+            command.add_argument("--dataset", help = "only include entries from this dataset UID")
+            command.add_argument("--split", help = "only include entries for this split")
+        return command
+
+    add_command("list", "lists cached splits, from least to most recently used").set_defaults(run = _list)
+    add_command("size", "prints the size of the cache", select = False).set_defaults(run = _size)
+
+    warm = add_command("warm", "streams splits of a dataset into the cache", select = False)
+    warm.add_argument("slug", help = "the dataset, as `namespace/repository:tag`")
+    warm.add_argument("splits", nargs = "*", help = "the splits to cache (defaults to every split)")
+    warm.add_argument("--database", help = "the database name (defaults to the default database)")
+    warm.add_argument("-j", "--parallelism", type = int, default = 1, help = "the number of concurrent streams per split")
+    warm.add_argument("--pin", action = "store_true", help = "pin the splits, so that they are never evicted")
+    warm.set_defaults(run = _warm)
+
+    verify = add_command("verify", "checks that cached splits are readable")
+    verify.add_argument("--remove", action = "store_true", help = "remove invalid entries")
+    verify.set_defaults(run = _verify)
+
+    purge = add_command("purge", "removes cached splits")
+    purge.add_argument("--max-size", help = "evict least recently used splits until the cache is at most this size (e.g. 50G)")
+    purge.add_argument("--older-than", type = float, help = "only remove splits last used more than this many days ago")
+    purge.add_argument("--include-pinned", action = "store_true", help = "also remove pinned splits")
+    purge.set_defaults(run = _purge)
+
+    add_command("pin", "prevents cached splits from being evicted").set_defaults(run = _pin)
+    add_command("unpin", "allows cached splits to be evicted").set_defaults(run = _pin)
+
+    args = parser.parse_args(argv)
+    return args.run(SplitCache(args.root), args)
+
+if __name__ == "__main__":
+    sys.exit(main())
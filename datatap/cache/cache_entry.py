@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import time
+
+from datatap.utils import basic_repr
+
+class CacheEntry:
+    """
+    Every cached chunking of a single split, as found in a `SplitCache`. Entries
+    are the unit in which the cache is sized, pinned and evicted.
+    """
+
+    database_uid: str
+    """
+    The UID of the database the split belongs to.
+    """
+
+    dataset_uid: str
+    """
+    The UID of the dataset the split belongs to.
+    """
+
+    split: str
+    """
+    The name of the split.
+    """
+
+    path: str
+    """
+    The directory holding the entry.
+    """
+
+    size: int
+    """
+    The number of bytes the entry occupies on disk.
+    """
+
+    last_access: float
+    """
+    The time (in seconds since the epoch) at which the split was last read
+    from, or written to, the cache.
+    """
+
+    pinned: bool
+    """
+    Whether the entry is pinned. Pinned entries are never evicted.
+    """
+
+    complete: bool
+    """
+    Whether the full split is cached.
+    """
+
+    def __init__(
+        self,
+        *,
+        database_uid: str,
+        dataset_uid: str,
+        split: str,
+        path: str,
+        size: int,
+        last_access: float,
+        pinned: bool,
+        complete: bool
+    ):
+        self.database_uid = database_uid
+        self.dataset_uid = dataset_uid
+        self.split = split
+        self.path = path
+        self.size = size
+        self.last_access = last_access
+        self.pinned = pinned
+        self.complete = complete
+
+    def __repr__(self) -> str:
+        return basic_repr(
+            "CacheEntry",
+            f"{self.database_uid}/{self.dataset_uid}/{self.split}",
+            size = self.size,
+            last_access = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.last_access)),
+            pinned = self.pinned,
+            complete = self.complete
+        )
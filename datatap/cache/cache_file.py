@@ -0,0 +1,201 @@
+"""
+Helpers for reading cache files and their record-offset indices.
+
+A cache file holds a sequence of records in one of the layouts described in
+`datatap.cache.cache_format`, which is identified by the file's header. Cache
+files may also be compressed (see `datatap.cache.compression`), in which case
+everything here applies to their decompressed contents.
+
+Cache files are always read sequentially through a fixed-size buffer, so
+reading a split takes constant memory regardless of its size.
+
+Each cache file also has a lock file (`{file_name}.lock`). The lock is held
+exclusively while the cache file is being written, and shared while it is
+being read, so that cache files in use are never evicted.
+
+An index is a sidecar file (`{file_name}.idx`) containing `n + 1` little-endian
+unsigned 64-bit integers for a cache file holding `n` records: the byte offset
+at which each record begins, followed by the offset at which the last record
+ends.
+
+A cache file assembled from the chunks of a split also records where each of
+those chunks begins, in a JSON sidecar file (`{file_name}.chunks`) holding the
+index of the first record of each chunk, followed by the number of records.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from array import array
+from typing import Any, Generator, Iterable, Optional
+
+from datatap.utils import FileLock
+
+from .cache_format import CacheFormat, get_file_format, read_header
+from .compression import open_cache_file
+
+DEFAULT_READ_AHEAD = 1 << 20
+"""
+The default number of bytes read from a cache file at a time.
+"""
+
+def read_cache_file(file_name: str, read_ahead: int = DEFAULT_READ_AHEAD) -> Generator[Any, None, None]:
+    """
+    Reads every record from an authoritative cache file, `read_ahead` bytes at
+    a time.
+    """
+    return read_cache_range(file_name, None, None, read_ahead)
+
+def read_cache_range(
+    file_name: str,
+    start: Optional[int],
+    end: Optional[int],
+    read_ahead: int = DEFAULT_READ_AHEAD
+) -> Generator[Any, None, None]:
+    """
+    Reads the records stored between byte offsets `start` and `end` of a cache
+    file, `read_ahead` bytes at a time. Both offsets should be taken from the
+    file's index. If `start` is `None`, reads from the first record, and if
+    `end` is `None`, reads until the end of the file.
+    """
+    lock = acquire_read_lock(file_name)
+    try:
+        yield from _read_range(file_name, start, end, read_ahead)
+    finally:
+        if lock is not None:
+            lock.release()
+
+def _read_range(file_name: str, start: Optional[int], end: Optional[int], read_ahead: int) -> Generator[Any, None, None]:
+    with open_cache_file(file_name, buffering = 0) as f:
+        cache_format = _read_format(f, file_name)
+        if start is None:
+            start = f.tell()
+
+        if hasattr(os, "posix_fadvise"):
+            # Lets the OS read ahead more aggressively than it otherwise would.
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+        f.seek(start)
+        remaining = end - start if end is not None else None
+        pending = b""
+        while remaining is None or remaining > 0:
+            data = f.read(read_ahead if remaining is None else min(read_ahead, remaining))
+            if data == b"":
+                break
+            if remaining is not None:
+                remaining -= len(data)
+
+            records, pending = cache_format.split(pending + data)
+            for record in records:
+                yield cache_format.decode(record)
+
+        for record in cache_format.finish(pending):
+            yield cache_format.decode(record)
+
+def get_lock_path(file_name: str) -> str:
+    """
+    Returns the path of the lock file for the cache file `file_name`.
+    """
+    return f"{file_name}.lock"
+
+def acquire_read_lock(file_name: str) -> Optional[FileLock]:
+    """
+    Acquires a shared lock on the cache file `file_name`. Returns `None` if the
+    lock file cannot be created (for instance, in a read-only cache).
+    """
+    lock = FileLock(get_lock_path(file_name))
+    try:
+        lock.acquire(shared = True)
+    except OSError:
+        return None
+    return lock
+
+def is_cache_current(file_name: str, cache_format: CacheFormat) -> bool:
+    """
+    Returns whether `file_name` is a complete cache file written in the current
+    version of `cache_format`. Cache files written in any other layout are
+    removed, along with their sidecar files.
+    """
+    try:
+        if get_file_format(file_name) is cache_format:
+            return True
+    except FileNotFoundError:
+        return False
+
+    for stale_file_name in (file_name, get_index_path(file_name), get_chunks_path(file_name)):
+        try:
+            os.remove(stale_file_name)
+        except FileNotFoundError:
+            pass
+    return False
+
+def get_index_path(file_name: str) -> str:
+    """
+    Returns the path of the index for the cache file `file_name`.
+    """
+    return f"{file_name}.idx"
+
+def get_chunks_path(file_name: str) -> str:
+    """
+    Returns the path of the file recording the chunks that the cache file
+    `file_name` was assembled from.
+    """
+    return f"{file_name}.chunks"
+
+def write_index(file_name: str, offsets: Iterable[int]) -> None:
+    """
+    Atomically writes the index for the cache file `file_name`.
+    """
+    index = array("Q", offsets)
+    if sys.byteorder != "little":
+        index.byteswap()
+
+    index_path = get_index_path(file_name)
+    tmp_index_path = f"{index_path}.tmp"
+    with open(tmp_index_path, "wb") as f:
+        index.tofile(f)
+    os.replace(tmp_index_path, index_path)
+
+def build_index(file_name: str) -> "array[int]":
+    """
+    Builds an index by scanning the cache file `file_name`.
+    """
+    with open_cache_file(file_name) as f:
+        return _read_format(f, file_name).scan(f)
+
+def load_index(file_name: str) -> "array[int]":
+    """
+    Loads the index for the cache file `file_name`, building (and storing) it
+    if it does not yet exist.
+    """
+    index_path = get_index_path(file_name)
+    offsets = array("Q")
+
+    try:
+        with open(index_path, "rb") as f:
+            offsets.frombytes(f.read())
+        if sys.byteorder != "little":
+            offsets.byteswap()
+    except FileNotFoundError:
+        pass
+
+    if len(offsets) == 0 or offsets[-1] > get_content_size(file_name):
+        offsets = build_index(file_name)
+        write_index(file_name, offsets)
+
+    return offsets
+
+def get_content_size(file_name: str) -> int:
+    """
+    Returns the size of the contents of the cache file `file_name`, once
+    decompressed.
+    """
+    with open_cache_file(file_name, buffering = 0) as f:
+        return f.seek(0, os.SEEK_END)
+
+def _read_format(f: Any, file_name: str) -> CacheFormat:
+    cache_format = read_header(f)
+    if cache_format is None:
+        raise ValueError(f"Cache file {file_name} was written in an unsupported layout")
+    return cache_format
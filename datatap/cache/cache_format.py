@@ -0,0 +1,268 @@
+"""
+The layouts in which records can be stored in a cache file.
+
+The default layout, `JSON_LINES`, stores one JSON-encoded record per line. It
+has no header, so that caches written by older versions of this library remain
+readable.
+
+The binary layout, `MSGPACK`, is considerably faster to read and write, and
+roughly half the size. It requires the `msgpack` package (available with the
+`datatap[cache]` extra). A binary cache file begins with a header naming its
+layout and the layout's version, followed by records that each consist of a
+little-endian unsigned 32-bit length and that many bytes of MessagePack.
+Whenever the layout changes, its version is incremented, and cache files
+written with any other version are treated as missing.
+"""
+
+from __future__ import annotations
+
+import struct
+from array import array
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from datatap.utils import basic_repr, json_backend
+
+from .compression import open_cache_file
+
+EOF_MARKER = "EOF"
+"""
+Files written by older versions of this library end with this line, which is
+not a record.
+"""
+
+HEADER_PREFIX = b"\x00datatap-cache:"
+"""
+Every cache file with a header begins with these bytes. JSON lines cannot begin
+with a null byte, so this also distinguishes headerless files.
+"""
+
+_EOF_MARKER_BYTES = EOF_MARKER.encode("ascii")
+
+_MAX_HEADER_SIZE = 64
+
+_LENGTH = struct.Struct("<I")
+
+_MSGPACK_REQUIRED = "The msgpack cache format requires the `msgpack` package; install `datatap[cache]`"
+
+class CacheFormat:
+    """
+    A layout in which records can be stored in a cache file.
+
+    The framed bytes of each record are located through the cache file's index,
+    which stores the offset at which each record begins.
+    """
+
+    name: str
+    """
+    The name of this format, as accepted by `get_cache_format`.
+    """
+
+    version: int
+    """
+    The version of this format's layout. Cache files written with a different
+    version cannot be read.
+    """
+
+    extension: str
+    """
+    The file extension used for cache files of this format.
+    """
+
+    def __init__(self, name: str, version: int, extension: str):
+        self.name = name
+        self.version = version
+        self.extension = extension
+
+    @property
+    def header(self) -> bytes:
+        """
+        The bytes with which every cache file of this format begins.
+        """
+        return HEADER_PREFIX + f"{self.name}:{self.version}\n".encode("ascii")
+
+    def encode(self, element: Any) -> bytes:
+        """
+        Encodes a single record, including its framing.
+        """
+        raise NotImplementedError()
+
+    def decode(self, record: bytes) -> Any:
+        """
+        Decodes a single record, including its framing.
+        """
+        raise NotImplementedError()
+
+    def encode_json(self, line: bytes) -> bytes:
+        """
+        Encodes a single record given as a line of JSON, including its framing.
+        Layouts that store JSON do so without parsing the line.
+        """
+        return self.encode(json_backend.loads(line))
+
+    def split(self, data: bytes) -> Tuple[List[bytes], bytes]:
+        """
+        Splits `data` into the framed records it contains, and whatever trails
+        the last complete record.
+        """
+        raise NotImplementedError()
+
+    def finish(self, rest: bytes) -> List[bytes]:
+        """
+        Returns the framed records contained in `rest`, which trails the last
+        complete record of a file.
+        """
+        return []
+
+    def scan(self, f: BinaryIO) -> "array[int]":
+        """
+        Builds an index by scanning the records of the file `f`, starting from its
+        current position.
+        """
+        raise NotImplementedError()
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Formats are singletons, and are compared by identity.
+        return (get_cache_format, (self.name,))
+
+    def __repr__(self) -> str:
+        return basic_repr("CacheFormat", self.name, version = self.version)
+
+class _JsonLinesFormat(CacheFormat):
+    @property
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, element: Any) -> bytes:
+        return json_backend.dumps(element) + b"\n"
+
+    def decode(self, record: bytes) -> Any:
+        return json_backend.loads(record)
+
+    def encode_json(self, line: bytes) -> bytes:
+        return line + b"\n"
+
+    def split(self, data: bytes) -> Tuple[List[bytes], bytes]:
+        *lines, rest = data.split(b"\n")
+        return [line for line in lines if _is_record_line(line)], rest
+
+    def finish(self, rest: bytes) -> List[bytes]:
+        # The last line of a file need not be terminated.
+        return [rest] if _is_record_line(rest) else []
+
+    def scan(self, f: BinaryIO) -> "array[int]":
+        offsets = array("Q")
+        position = f.tell()
+        records_end = position
+        for line in f:
+            if _is_record_line(line):
+                offsets.append(position)
+                records_end = position + len(line)
+            position += len(line)
+        offsets.append(records_end)
+        return offsets
+
+class _MsgpackFormat(CacheFormat):
+    def encode(self, element: Any) -> bytes:
+        if msgpack is None:
+            raise ImportError(_MSGPACK_REQUIRED)
+        data = msgpack.packb(element, use_bin_type = True)
+        return _LENGTH.pack(len(data)) + data
+
+    def decode(self, record: bytes) -> Any:
+        # Files already in the cache may be in this format even if it was not selected.
+        if msgpack is None:
+            raise ImportError(_MSGPACK_REQUIRED)
+        return msgpack.unpackb(memoryview(record)[_LENGTH.size:], raw = False)
+
+    def split(self, data: bytes) -> Tuple[List[bytes], bytes]:
+        records: List[bytes] = []
+        position = 0
+        while position + _LENGTH.size <= len(data):
+            (length,) = _LENGTH.unpack_from(data, position)
+            end = position + _LENGTH.size + length
+            if end > len(data):
+                break
+            records.append(data[position:end])
+            position = end
+        return records, data[position:]
+
+    def scan(self, f: BinaryIO) -> "array[int]":
+        offsets = array("Q")
+        position = f.tell()
+        while True:
+            prefix = f.read(_LENGTH.size)
+            if len(prefix) < _LENGTH.size:
+                break
+            (length,) = _LENGTH.unpack(prefix)
+            # A truncated final record is not part of the index.
+            if len(f.read(length)) < length:
+                break
+            offsets.append(position)
+            position += _LENGTH.size + length
+        offsets.append(position)
+        return offsets
+
+JSON_LINES: CacheFormat = _JsonLinesFormat("json", 1, ".jsonl")
+"""
+Stores one JSON-encoded record per line.
+"""
+
+MSGPACK: CacheFormat = _MsgpackFormat("msgpack", 1, ".msgpack")
+"""
+Stores length-prefixed MessagePack records. Requires the `msgpack` package.
+"""
+
+_FORMATS: Dict[str, CacheFormat] = { fmt.name: fmt for fmt in (JSON_LINES, MSGPACK) }
+
+def get_cache_format(name: str) -> CacheFormat:
+    """
+    Returns the cache format with the given name.
+    """
+    if name not in _FORMATS:
+        raise ValueError(f"Unknown cache format {repr(name)}; expected one of {', '.join(_FORMATS)}")
+    if name == MSGPACK.name and msgpack is None:
+        raise ImportError(_MSGPACK_REQUIRED)
+    return _FORMATS[name]
+
+def read_header(f: BinaryIO) -> Optional[CacheFormat]:
+    """
+    Reads the header from the beginning of the file `f`, leaving `f` positioned
+    at its first record. Returns `None` if the file was written in a layout that
+    cannot be read (for instance, an older version of a binary format).
+    """
+    f.seek(0)
+    head = f.read(_MAX_HEADER_SIZE)
+    if not head.startswith(HEADER_PREFIX):
+        f.seek(0)
+        return JSON_LINES
+
+    end = head.find(b"\n")
+    if end == -1:
+        return None
+    f.seek(end + 1)
+
+    name, _, version = head[len(HEADER_PREFIX):end].decode("ascii", "replace").partition(":")
+    cache_format = _FORMATS.get(name)
+    if cache_format is None or str(cache_format.version) != version:
+        return None
+    return get_cache_format(name)
+
+def get_file_format(file_name: str) -> Optional[CacheFormat]:
+    """
+    Returns the format in which the cache file `file_name` was written, or
+    `None` if it cannot be read.
+    """
+    try:
+        with open_cache_file(file_name) as f:
+            return read_header(f)
+    except ValueError:
+        return None
+
+def _is_record_line(line: bytes) -> bool:
+    data = line.strip()
+    return data != b"" and data != _EOF_MARKER_BYTES
@@ -0,0 +1,467 @@
+from __future__ import annotations
+
+import os
+import time
+from array import array
+from functools import partial
+from threading import Condition, Thread
+from os import path
+from typing import Any, BinaryIO, Callable, Generator, Iterable, Optional, Tuple
+
+from datatap.utils import DeletableGenerator, FileLock
+
+from .cache_file import DEFAULT_READ_AHEAD, get_lock_path, is_cache_current, read_cache_file, write_index
+from .cache_format import JSON_LINES, CacheFormat, read_header
+from .compression import BlockWriter, Compression, open_cache_file, read_codec_name
+
+
+DEFAULT_FLUSH_RECORDS = 256
+"""
+The default maximum number of records buffered by the writer before they are
+handed to the reader.
+"""
+
+DEFAULT_FLUSH_INTERVAL = 0.1
+"""
+The default maximum number of seconds for which the writer buffers records
+before they are handed to the reader.
+"""
+
+class _StreamState:
+    """
+    State shared between the writer thread and the reader of a stream file.
+    All fields are guarded by `condition`.
+    """
+    condition: Condition
+    committed: int
+    done: bool
+    waiting: bool
+    error: Optional[Exception]
+
+    def __init__(self):
+        self.condition = Condition()
+        self.committed = 0
+        self.done = False
+        self.waiting = False
+        self.error = None
+
+def CacheGenerator(
+    file_name: str,
+    create_stream: Callable[[], Iterable[Any]],
+    on_complete: Optional[Callable[[], object]] = None,
+    read_ahead: int = DEFAULT_READ_AHEAD,
+    flush_records: int = DEFAULT_FLUSH_RECORDS,
+    flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    cache_format: CacheFormat = JSON_LINES,
+    compression: Optional[Compression] = None,
+    resume_stream: Optional[Callable[[int], Iterable[Any]]] = None,
+    json_lines: bool = False
+) -> Generator[Any, None, None]:
+    # We can't just naively stream from the server, unfortunately. Due to the sheer
+    # volume of data, and the fact that training can be such a slow process, if we
+    # try to stream the data directly from server to training process, we will end
+    # up filling the OS' buffer, causing significant backpressure for the server.
+    #
+    # Likewise, we cannot necessarily stream from the server into a local buffer,
+    # as a large dataset could be greater than our available RAM.
+    #
+    # As a result, this method streams data from the server to a temp file in a
+    # background thread. The main thread then streams from that tempfile to the
+    # consumer of the stream. Finally, once all data has been written, the stream
+    # file is atomically renamed to become the authoritative cache file for this
+    # particular stream. Subsequent calls to this function with the same arguments
+    # (from this process or any other) will then pull from that file.
+    #
+    # The writer buffers records, and only flushes them to the file (and hands them
+    # to the reader) once `flush_records` records are buffered, `flush_interval`
+    # seconds have passed, or the reader has run out of records. The reader sleeps
+    # on a condition variable until that happens, and then reads every complete
+    # record that was handed over in bulk.
+    #
+    # Only one process may populate a given cache file at a time. The writer holds
+    # an exclusive lock on the cache file (see `get_lock_path`) until the file has
+    # been promoted (or the stream has failed), and other processes wait on that
+    # lock rather than opening their own stream to the server.
+    #
+    # Records are written in `cache_format`. Cache files written in an outdated
+    # version of that format are discarded and streamed again. If `compression`
+    # is given, the stream file is compressed in blocks as it is written, and the
+    # reader follows it block by block. The writer then hands records over as
+    # each block is completed, and only cuts a block short (at most once every
+    # `flush_interval` seconds) if the reader has run out of records.
+    #
+    # If `json_lines` is set, the streams yield each record as a line of JSON (in
+    # bytes, without its newline) rather than as an element. Such records are
+    # written without being parsed if `cache_format` stores JSON, and are only
+    # parsed once they are read back.
+    #
+    # If `resume_stream` is given, a stream that fails (or is abandoned by its
+    # consumer) leaves its partial stream file behind. The next attempt to stream
+    # the same file keeps every complete record in it, and calls `resume_stream`
+    # with their number to stream the rest. Otherwise, partial stream files are
+    # discarded, and every attempt begins with `create_stream`.
+    #
+    # While streaming, we also record the byte offset of every record, and store
+    # this index alongside the cache file so that it can later be read in pieces.
+    # Once the cache file has been promoted, `on_complete` is called (from the
+    # writer thread), and any error it raises is raised to the consumer once it
+    # has read every record.
+
+    dir_name = path.dirname(file_name)
+    tmp_file_name = f"{file_name}.stream"
+    os.makedirs(dir_name, exist_ok=True)
+
+    # Checks for an authoritative cache, using it if it exists.
+    if is_cache_current(file_name, cache_format):
+        return read_cache_file(file_name, read_ahead)
+
+    lock = FileLock(get_lock_path(file_name))
+    state = _StreamState()
+
+    # `dead` is a flag that allows us to terminate our stream early
+    dead = False
+
+    def stream_target(f: BinaryIO, block_writer: Optional[BlockWriter], offsets: Optional["array[int]"]):
+        last_flush = time.monotonic()
+
+        def commit(committed: int, now: float):
+            nonlocal last_flush
+            # Note that we flush to the OS, but do not synchronize, as `fsync`
+            # incurs a 10x slowdown.
+            f.flush()
+            last_flush = now
+            with state.condition:
+                state.committed = committed
+                state.condition.notify()
+
+        def on_record(offsets: "array[int]"):
+            if dead:
+                raise Exception("Premature termination")
+
+            now = time.monotonic()
+            if block_writer is None:
+                if state.waiting or len(offsets) % flush_records == 0 or now - last_flush >= flush_interval:
+                    commit(offsets[-1], now)
+            else:
+                if state.waiting and now - last_flush >= flush_interval:
+                    block_writer.flush()
+                if block_writer.flushed_size > state.committed:
+                    commit(block_writer.flushed_size, now)
+
+        try:
+            try:
+                written = _write_cache_file(
+                    f,
+                    block_writer,
+                    file_name,
+                    _get_create_elements(create_stream, resume_stream, offsets),
+                    cache_format,
+                    on_record,
+                    offsets = offsets,
+                    keep_partial = resume_stream is not None,
+                    json_lines = json_lines
+                )
+            finally:
+                lock.release()
+
+            # The reader may read every record while `on_complete` runs, but is
+            # only told that the stream is done once it has returned, so that it
+            # sees any error raised there.
+            with state.condition:
+                state.committed = written[-1]
+                state.condition.notify()
+            if on_complete is not None:
+                on_complete()
+        except Exception as e:
+            state.error = e
+        finally:
+            with state.condition:
+                state.done = True
+                state.condition.notify()
+
+    def generator() -> Generator[Any, None, None]:
+        lock.acquire()
+
+        # Another process may have populated the cache while we were waiting
+        # for the lock.
+        if is_cache_current(file_name, cache_format):
+            lock.release()
+            yield from read_cache_file(file_name, read_ahead)
+            return
+
+        # Both ends of the stream file are opened before the writer starts, as
+        # the writer may otherwise finish (and promote the file) before we have
+        # a chance to open it.
+        try:
+            writer, block_writer, offsets = _open_stream_file(
+                tmp_file_name,
+                cache_format,
+                compression,
+                resume = resume_stream is not None,
+                buffering = read_ahead
+            )
+        except:
+            lock.release()
+            raise
+        try:
+            reader = open(tmp_file_name, "rb", buffering = 0)
+            if block_writer is not None:
+                reader = block_writer.follow(reader)
+        except:
+            writer.close()
+            lock.release()
+            raise
+
+        # Records recovered from an earlier attempt can be read right away (once
+        # they are in complete blocks, if the file is compressed).
+        if offsets is not None:
+            state.committed = offsets[-1] if block_writer is None else block_writer.flushed_size
+
+        thread = Thread(target = stream_target, args = (writer, block_writer, offsets))
+        thread.start()
+
+        with reader as f:
+            position = len(cache_format.header)
+            f.seek(position)
+            pending = b""
+            while True:
+                with state.condition:
+                    while state.committed <= position and not state.done:
+                        state.waiting = True
+                        state.condition.wait()
+                    state.waiting = False
+                    committed = state.committed
+                    done = state.done
+
+                if committed <= position and done:
+                    break
+
+                # Everything before `committed` consists of complete records, but
+                # we may read it in several pieces.
+                data = f.read(min(committed - position, read_ahead))
+                if data == b"":
+                    raise EOFError(f"Stream file {tmp_file_name} is shorter than expected")
+                position += len(data)
+                records, pending = cache_format.split(pending + data)
+                for record in records:
+                    yield cache_format.decode(record)
+
+        thread.join()
+
+        if state.error is not None:
+            # This error came from the data loading thread
+            raise state.error
+
+    def stop_processing():
+        # This is a rather gross way of killing it, but unlike `Process`, `Thread`
+        # has no `terminate` method.
+        nonlocal dead
+        dead = True
+
+    return DeletableGenerator(generator(), stop_processing)
+
+
+def fill_cache(
+    file_name: str,
+    create_stream: Callable[[], Iterable[Any]],
+    on_complete: Optional[Callable[[], object]] = None,
+    cache_format: CacheFormat = JSON_LINES,
+    compression: Optional[Compression] = None,
+    progress: Optional[Callable[[int], object]] = None,
+    progress_interval: int = 1000,
+    resume_stream: Optional[Callable[[int], Iterable[Any]]] = None,
+    json_lines: bool = False
+) -> None:
+    """
+    Streams `create_stream` into the cache file `file_name` without reading it
+    back, unless the file has already been cached. If another process is
+    populating the same file, this waits for it to finish instead. Partial
+    streams are resumed with `resume_stream`, and `json_lines` is interpreted,
+    as in `CacheGenerator`.
+
+    If given, `progress` is called with the number of records written since it
+    was last called, every `progress_interval` records and once the stream
+    ends. `on_complete` is called once the file has been promoted.
+    """
+    if is_cache_current(file_name, cache_format):
+        return
+
+    os.makedirs(path.dirname(file_name), exist_ok = True)
+    reported = 0
+
+    def on_record(offsets: "array[int]"):
+        nonlocal reported
+        if progress is not None and len(offsets) - reported >= progress_interval:
+            progress(len(offsets) - reported)
+            reported = len(offsets)
+
+    with FileLock(get_lock_path(file_name)):
+        if is_cache_current(file_name, cache_format):
+            return
+
+        tmp_file_name = f"{file_name}.stream"
+        f, block_writer, offsets = _open_stream_file(
+            tmp_file_name,
+            cache_format,
+            compression,
+            resume = resume_stream is not None,
+            buffering = DEFAULT_READ_AHEAD
+        )
+        reported = len(offsets) if offsets is not None else 1
+
+        offsets = _write_cache_file(
+            f,
+            block_writer,
+            file_name,
+            _get_create_elements(create_stream, resume_stream, offsets),
+            cache_format,
+            on_record,
+            offsets = offsets,
+            keep_partial = resume_stream is not None,
+            json_lines = json_lines
+        )
+        if progress is not None and len(offsets) > reported:
+            progress(len(offsets) - reported)
+
+    if on_complete is not None:
+        on_complete()
+
+def _open_stream_file(
+    tmp_file_name: str,
+    cache_format: CacheFormat,
+    compression: Optional[Compression],
+    *,
+    resume: bool,
+    buffering: int
+) -> Tuple[BinaryIO, Optional[BlockWriter], Optional["array[int]"]]:
+    # Opens the stream file for writing, along with the `BlockWriter` through
+    # which it must be written if it is compressed. If `resume` is set, the
+    # complete records of a stream file left behind by an earlier attempt are
+    # kept, and their offsets are returned; otherwise (or if there is no usable
+    # stream file), the file is started anew and the offsets are `None`.
+    offsets = _recover_stream_file(tmp_file_name, cache_format, compression) if resume else None
+
+    if offsets is None:
+        f = open(tmp_file_name, "wb", buffering = buffering)
+        return f, BlockWriter(f, compression) if compression is not None else None, None
+
+    if compression is None:
+        return open(tmp_file_name, "ab", buffering = buffering), None, offsets
+
+    f = open(tmp_file_name, "r+b", buffering = buffering)
+    try:
+        return f, BlockWriter.reopen(f, compression, offsets[-1]), offsets
+    except:
+        f.close()
+        raise
+
+def _get_create_elements(
+    create_stream: Callable[[], Iterable[Any]],
+    resume_stream: Optional[Callable[[int], Iterable[Any]]],
+    offsets: Optional["array[int]"]
+) -> Callable[[], Iterable[Any]]:
+    # Returns the function opening the rest of a stream, given the offsets of the
+    # records recovered from an earlier attempt (if any).
+    if offsets is None or resume_stream is None:
+        return create_stream
+    return partial(resume_stream, len(offsets) - 1)
+
+def _write_cache_file(
+    f: BinaryIO,
+    block_writer: Optional[BlockWriter],
+    file_name: str,
+    create_elements: Callable[[], Iterable[Any]],
+    cache_format: CacheFormat,
+    on_record: Callable[["array[int]"], object],
+    *,
+    offsets: Optional["array[int]"] = None,
+    keep_partial: bool = False,
+    json_lines: bool = False
+) -> "array[int]":
+    # Writes the elements of the stream opened by `create_elements` to `f`, which
+    # must be the open stream file for `file_name` (through `block_writer`, if it
+    # is compressed), and then promotes it to become `file_name`. `on_record` is
+    # called with the offsets written so far after each record. The caller must
+    # hold the file's lock. Returns the offsets of the records in the file.
+    #
+    # If `offsets` is given, `f` already holds those records, and is appended to.
+    # If `keep_partial` is set, the stream file is kept (for a later attempt to
+    # resume) if writing fails, including if the stream cannot be opened. If
+    # `json_lines` is set, the elements are lines of JSON.
+    tmp_file_name = f"{file_name}.stream"
+    out = block_writer if block_writer is not None else f
+
+    try:
+        if offsets is None:
+            header = cache_format.header
+            out.write(header)
+            offsets = array("Q", [len(header)])
+
+        encode = cache_format.encode_json if json_lines else cache_format.encode
+        for element in create_elements():
+            record = encode(element)
+            out.write(record)
+            offsets.append(offsets[-1] + len(record))
+            on_record(offsets)
+
+        if block_writer is not None:
+            block_writer.close()
+        f.close()
+
+        # The index must be in place before the cache file is, since the
+        # existence of the cache file marks the entry as complete.
+        write_index(file_name, offsets)
+        os.replace(tmp_file_name, file_name)
+        return offsets
+    except:
+        # A partial stream file must never be promoted. We either discard it, or
+        # make sure that what we have written survives until it is resumed. A
+        # compressed stream file can only be resumed once its block table has
+        # been written.
+        if not f.closed:
+            try:
+                if keep_partial:
+                    if block_writer is not None:
+                        block_writer.close()
+                    f.flush()
+                    os.fsync(f.fileno())
+            finally:
+                f.close()
+        if not keep_partial and path.exists(tmp_file_name):
+            os.remove(tmp_file_name)
+        raise
+
+def _recover_stream_file(tmp_file_name: str, cache_format: CacheFormat, compression: Optional[Compression]) -> Optional["array[int]"]:
+    # Returns the offsets of the complete records in a stream file left behind by
+    # an earlier attempt, truncating anything after the last of them if the file
+    # is not compressed (a `BlockWriter` does so for compressed files). Returns
+    # `None` (and discards the file) if there is no usable stream file.
+    try:
+        with open(tmp_file_name, "rb") as f:
+            if read_codec_name(f) != (compression.codec.name if compression is not None else None):
+                raise ValueError(f"Stream file {tmp_file_name} was compressed differently")
+
+        with open_cache_file(tmp_file_name) as f:
+            if read_header(f) is not cache_format:
+                raise ValueError(f"Stream file {tmp_file_name} was written in a different layout")
+            offsets = cache_format.scan(f)
+
+            # A record may have been cut short (or never made it to disk), in which
+            # case it cannot be decoded.
+            while len(offsets) > 1:
+                f.seek(offsets[-2])
+                try:
+                    cache_format.decode(f.read(offsets[-1] - offsets[-2]))
+                    break
+                except Exception:
+                    offsets.pop()
+
+        if compression is None:
+            with open(tmp_file_name, "r+b") as f:
+                f.truncate(offsets[-1])
+        return offsets
+    except FileNotFoundError:
+        return None
+    except Exception:
+        os.remove(tmp_file_name)
+        return None
@@ -0,0 +1,426 @@
+"""
+Transparent block compression for cache files.
+
+A compressed cache file stores the bytes of an uncompressed cache file (its
+"contents") as a sequence of independently compressed blocks, so that any range
+of the contents can be read by decompressing only the blocks that hold it. The
+offsets in a cache file's index always refer to its contents, and are the same
+whether or not the file is compressed.
+
+A compressed cache file consists of a header naming its codec, the compressed
+blocks, a block table, and a trailer locating the block table. The block table
+holds `n + 1` little-endian unsigned 64-bit integers giving the offset in the
+contents at which each of the `n` blocks begins (followed by the size of the
+contents), and then `n + 1` more giving the offset in the file at which each
+block begins (followed by the offset of the block table).
+
+Two codecs are supported: `zstd`, which requires the `zstandard` package
+(available with the `datatap[cache]` extra), and `gzip`.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_right
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from datatap.utils import basic_repr
+
+HEADER_PREFIX = b"\x00datatap-compressed:"
+"""
+Every compressed cache file begins with these bytes.
+"""
+
+_VERSION = 1
+
+_TRAILER = struct.Struct("<QQ8s")
+_TRAILER_MAGIC = b"dtblocks"
+
+_ZSTD_REQUIRED = "The zstd codec requires the `zstandard` package; install `datatap[cache]`"
+
+DEFAULT_BLOCK_SIZE = 1 << 18
+"""
+The default number of bytes of contents compressed into each block. Larger
+blocks compress better, but make random access slower.
+"""
+
+class Codec:
+    """
+    A compression algorithm with which blocks can be compressed.
+    """
+
+    name: str
+    """
+    The name of this codec, as accepted by `Compression`.
+    """
+
+    default_level: int
+    """
+    The compression level used if none is given.
+    """
+
+    def __init__(self, name: str, default_level: int):
+        self.name = name
+        self.default_level = default_level
+
+    def compress(self, data: bytes, level: int) -> bytes:
+        """
+        Compresses a single block.
+        """
+        raise NotImplementedError()
+
+    def decompress(self, data: bytes) -> bytes:
+        """
+        Decompresses a single block.
+        """
+        raise NotImplementedError()
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (get_codec, (self.name,))
+
+    def __repr__(self) -> str:
+        return basic_repr("Codec", self.name)
+
+class _ZstdCodec(Codec):
+    def compress(self, data: bytes, level: int) -> bytes:
+        if zstandard is None:
+            raise ImportError(_ZSTD_REQUIRED)
+        return zstandard.ZstdCompressor(level = level).compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        if zstandard is None:
+            raise ImportError(_ZSTD_REQUIRED)
+        return zstandard.ZstdDecompressor().decompress(data)
+
+class _GzipCodec(Codec):
+    def compress(self, data: bytes, level: int) -> bytes:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data, 31)
+
+_CODECS: Dict[str, Codec] = { codec.name: codec for codec in (_ZstdCodec("zstd", 3), _GzipCodec("gzip", 6)) }
+
+def get_codec(name: str) -> Codec:
+    """
+    Returns the codec with the given name.
+    """
+    if name not in _CODECS:
+        raise ValueError(f"Unknown compression codec {repr(name)}; expected one of {', '.join(_CODECS)}")
+    if name == "zstd" and zstandard is None:
+        raise ImportError(_ZSTD_REQUIRED)
+    return _CODECS[name]
+
+class Compression:
+    """
+    The compression settings with which cache files are written.
+
+    ```py
+    SplitCache(compression = Compression("zstd", level = 9))
+    SplitCache(compression = "zstd:9")
+    ```
+    """
+
+    codec: Codec
+    """
+    The codec used to compress each block.
+    """
+
+    level: int
+    """
+    The compression level passed to the codec.
+    """
+
+    block_size: int
+    """
+    The number of bytes of contents compressed into each block.
+    """
+
+    @staticmethod
+    def parse(spec: Union[str, Compression, None]) -> Optional[Compression]:
+        """
+        Parses a compression spec of the form `codec` or `codec:level`. The spec
+        `none` (or an empty spec) disables compression.
+        """
+        if spec is None or isinstance(spec, Compression):
+            return spec
+        if spec.strip().lower() in ("", "none"):
+            return None
+
+        name, _, level = spec.strip().lower().partition(":")
+        return Compression(name, level = int(level) if level != "" else None)
+
+    def __init__(self, codec: str, *, level: Optional[int] = None, block_size: int = DEFAULT_BLOCK_SIZE):
+        self.codec = get_codec(codec)
+        self.level = level if level is not None else self.codec.default_level
+        self.block_size = block_size
+
+    def __repr__(self) -> str:
+        return basic_repr("Compression", self.codec.name, level = self.level, block_size = self.block_size)
+
+class BlockWriter:
+    """
+    Writes the contents of a cache file to `f` in compressed blocks. The file is
+    incomplete until `close` has been called, but the blocks written so far can
+    be read as they are written (see `follow`).
+    """
+
+    _file: BinaryIO
+    _compression: Compression
+    _buffer: bytearray
+    _content_offsets: "array[int]"
+    _file_offsets: "array[int]"
+
+    def __init__(self, f: BinaryIO, compression: Compression):
+        header = _get_header(compression.codec)
+        f.write(header)
+
+        self._file = f
+        self._compression = compression
+        self._buffer = bytearray()
+        self._content_offsets = array("Q", [0])
+        self._file_offsets = array("Q", [len(header)])
+
+    @staticmethod
+    def reopen(f: BinaryIO, compression: Compression, size: int) -> BlockWriter:
+        """
+        Reopens a compressed cache file that was closed before it was complete
+        (such as an interrupted stream), keeping the first `size` bytes of its
+        contents so that more can be appended to them. `f` must be open for both
+        reading and writing.
+
+        Raises a `ValueError` if the file was not compressed with the codec of
+        `compression`, or if it was never closed.
+        """
+        f.seek(0)
+        if f.read(len(_get_header(compression.codec))) != _get_header(compression.codec):
+            raise ValueError(f"Compressed cache file {getattr(f, 'name', '')} was not written with {compression.codec.name}")
+        content_offsets, file_offsets = _read_block_table(f)
+        if size > content_offsets[-1]:
+            raise ValueError(f"Compressed cache file {getattr(f, 'name', '')} holds fewer than {size} bytes")
+
+        # The block holding the end of the kept contents is rewritten from its start.
+        index = bisect_right(content_offsets, size) - 1
+        kept = b""
+        if size > content_offsets[index]:
+            f.seek(file_offsets[index])
+            block = compression.codec.decompress(f.read(file_offsets[index + 1] - file_offsets[index]))
+            kept = block[:size - content_offsets[index]]
+        f.seek(file_offsets[index])
+        f.truncate()
+
+        writer = BlockWriter.__new__(BlockWriter)
+        writer._file = f
+        writer._compression = compression
+        writer._buffer = bytearray(kept)
+        writer._content_offsets = content_offsets[:index + 1]
+        writer._file_offsets = file_offsets[:index + 1]
+        return writer
+
+    @property
+    def flushed_size(self) -> int:
+        """
+        The size of the contents that have been written in complete blocks.
+        """
+        return self._content_offsets[-1]
+
+    def write(self, data: bytes) -> None:
+        """
+        Appends `data` to the contents of the file.
+        """
+        self._buffer += data
+        while len(self._buffer) >= self._compression.block_size:
+            self._write_block(self._compression.block_size)
+
+    def flush(self) -> None:
+        """
+        Compresses the buffered contents into a block, even if it is smaller than
+        the block size, so that they can be read before the file is complete.
+        """
+        if len(self._buffer) > 0:
+            self._write_block(len(self._buffer))
+
+    def follow(self, f: BinaryIO) -> BlockReader:
+        """
+        Returns a `BlockReader` that reads the blocks written so far (including
+        any written later) from `f`, another handle on the same file. The
+        underlying file must be flushed before its blocks can be read.
+        """
+        return BlockReader(f, self._compression.codec, block_table = (self._content_offsets, self._file_offsets))
+
+    def close(self) -> None:
+        """
+        Writes the final block and the block table. This does not close the
+        underlying file.
+        """
+        self.flush()
+
+        count = len(self._content_offsets) - 1
+        table = array("Q", self._content_offsets)
+        table.extend(self._file_offsets)
+        if sys.byteorder != "little":
+            table.byteswap()
+        self._file.write(table.tobytes())
+        self._file.write(_TRAILER.pack(count, self._file_offsets[-1], _TRAILER_MAGIC))
+
+    def _write_block(self, size: int) -> None:
+        block = self._compression.codec.compress(bytes(self._buffer[:size]), self._compression.level)
+        del self._buffer[:size]
+        self._file.write(block)
+        self._content_offsets.append(self._content_offsets[-1] + size)
+        self._file_offsets.append(self._file_offsets[-1] + len(block))
+
+class BlockReader(io.RawIOBase):
+    """
+    A read-only, seekable view of the contents of a compressed cache file.
+
+    The most recently decompressed block is kept in memory, so reading the
+    contents sequentially decompresses each block only once.
+    """
+
+    _file: BinaryIO
+    _codec: Codec
+    _content_offsets: "array[int]"
+    _file_offsets: "array[int]"
+    _position: int
+    _block_index: int
+    _block: bytes
+
+    def __init__(self, f: BinaryIO, codec: Codec, *, block_table: Optional[Tuple["array[int]", "array[int]"]] = None):
+        super().__init__()
+        self._file = f
+        self._codec = codec
+        self._content_offsets, self._file_offsets = block_table if block_table is not None else _read_block_table(f)
+        self._position = 0
+        self._block_index = -1
+        self._block = b""
+
+    @property
+    def size(self) -> int:
+        """
+        The size of the contents.
+        """
+        return self._content_offsets[-1]
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self.size
+        self._position = max(offset, 0)
+        return self._position
+
+    def readinto(self, buffer: Any) -> int:
+        data = self.pread(self._position, self._position + len(buffer), single_block = True)
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def pread(self, start: int, end: int, *, single_block: bool = False) -> bytes:
+        """
+        Returns the contents between offsets `start` and `end`, without moving
+        the stream position. If `single_block` is set, stops at the end of the
+        block holding `start`.
+        """
+        end = min(end, self.size)
+        pieces: List[bytes] = []
+        while start < end:
+            index = bisect_right(self._content_offsets, start) - 1
+            block = self._get_block(index)
+            block_start = self._content_offsets[index]
+            piece = block[start - block_start:min(end, self._content_offsets[index + 1]) - block_start]
+            pieces.append(piece)
+            start += len(piece)
+            if single_block:
+                break
+        return pieces[0] if len(pieces) == 1 else b"".join(pieces)
+
+    def close(self) -> None:
+        self._file.close()
+        self._block = b""
+        super().close()
+
+    def _get_block(self, index: int) -> bytes:
+        if index != self._block_index:
+            self._file.seek(self._file_offsets[index])
+            self._block = self._codec.decompress(self._file.read(self._file_offsets[index + 1] - self._file_offsets[index]))
+            self._block_index = index
+        return self._block
+
+def _get_header(codec: Codec) -> bytes:
+    return HEADER_PREFIX + f"{codec.name}:{_VERSION}\n".encode("ascii")
+
+def _read_block_table(f: BinaryIO) -> Tuple["array[int]", "array[int]"]:
+    f.seek(-_TRAILER.size, os.SEEK_END)
+    count, table_offset, magic = _TRAILER.unpack(f.read(_TRAILER.size))
+    if magic != _TRAILER_MAGIC:
+        raise ValueError(f"Compressed cache file {getattr(f, 'name', '')} is incomplete")
+
+    f.seek(table_offset)
+    table = array("Q")
+    table.frombytes(f.read(2 * (count + 1) * table.itemsize))
+    if sys.byteorder != "little":
+        table.byteswap()
+    return table[:count + 1], table[count + 1:]
+
+def read_codec_name(f: BinaryIO) -> Optional[str]:
+    """
+    Reads the header from the beginning of the file `f`, returning the name of
+    the codec with which it was compressed, or `None` if it is not compressed.
+
+    Raises a `ValueError` if the file was compressed in a layout that cannot be
+    read.
+    """
+    f.seek(0)
+    if f.read(len(HEADER_PREFIX)) != HEADER_PREFIX:
+        return None
+
+    name, _, version = f.readline()[:-1].decode("ascii", "replace").partition(":")
+    if version != str(_VERSION):
+        raise ValueError(f"Compressed cache file {getattr(f, 'name', '')} was written in an unsupported layout")
+    return name
+
+def open_cache_file(file_name: str, buffering: int = -1) -> BinaryIO:
+    """
+    Opens a cache file for reading its contents, decompressing it if necessary.
+
+    Raises a `ValueError` if the file was compressed in a layout that cannot be
+    read.
+    """
+    f = open(file_name, "rb")
+    try:
+        name = read_codec_name(f)
+        if name is None:
+            f.close()
+            return open(file_name, "rb", buffering = buffering)
+        reader = BlockReader(f, get_codec(name))
+    except:
+        f.close()
+        raise
+
+    if buffering == 0:
+        return reader # type: ignore
+    return io.BufferedReader(reader, buffering if buffering > 0 else io.DEFAULT_BUFFER_SIZE) # type: ignore
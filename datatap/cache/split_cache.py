@@ -0,0 +1,478 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+from os import path
+from typing import Any, Collection, Generator, List, Optional, Union
+from urllib.parse import quote, unquote
+
+from datatap.utils import Environment, FileLock, basic_repr
+
+from .cache_generator import DEFAULT_FLUSH_INTERVAL, DEFAULT_FLUSH_RECORDS
+from .cache_entry import CacheEntry
+from .cache_file import (
+    DEFAULT_READ_AHEAD, build_index, get_chunks_path, get_index_path, get_lock_path, is_cache_current, load_index,
+    read_cache_file, read_cache_range, write_index
+)
+from .cache_format import CacheFormat, get_cache_format, get_file_format
+from .compression import BlockWriter, Compression, open_cache_file
+
+_ACCESS_MARKER = ".last-access"
+_PIN_MARKER = ".pinned"
+_SOURCE_MARKER = ".source"
+
+class SplitCache:
+    """
+    A persistent, on-disk cache of streamed dataset splits.
+
+    Since datasets are immutable, a split that has been streamed once can be
+    served from disk in every subsequent run, and by every process on the same
+    machine. Entries are keyed by the database, the dataset's UID, the split,
+    and how the split was chunked.
+
+    Once every chunk of a split has been cached (either by streaming the whole
+    split at once, or by streaming each of its chunks), the cache holds a single
+    canonical copy of the split, from which other chunkings of the split can be
+    served. See `read_chunk` for how this is kept consistent with the chunks
+    that the server would have streamed.
+
+    The cache lives in `root`, which defaults to the `DATATAP_CACHE_DIR`
+    environment variable. Splits are stored in `cache_format`, which defaults to
+    the `DATATAP_CACHE_FORMAT` environment variable (see
+    `datatap.cache.cache_format`), and are compressed according to
+    `compression`, which defaults to the `DATATAP_CACHE_COMPRESSION` environment
+    variable (see `datatap.cache.compression`); pass `"none"` to store splits
+    uncompressed regardless.
+
+    If `max_size` is set (or the `DATATAP_CACHE_MAX_SIZE` environment variable
+    is), the least recently used splits are evicted whenever a newly streamed
+    split brings the cache above that many bytes. Splits that are pinned, or
+    that are being read or written, are never evicted. The cache can also be
+    managed from the command line with `python -m datatap.cache`.
+    """
+
+    root: str
+    """
+    The directory in which all cache entries are stored.
+    """
+
+    cache_format: CacheFormat
+    """
+    The layout in which splits are stored. Splits cached in other layouts are
+    not visible to this cache.
+    """
+
+    compression: Optional[Compression]
+    """
+    How splits are compressed when they are written to the cache, or `None` if
+    they are stored uncompressed. Splits are readable regardless of how they
+    were compressed.
+    """
+
+    max_size: Optional[int]
+    """
+    The number of bytes the cache may occupy before splits are evicted, or
+    `None` if its size is unbounded.
+    """
+
+    read_ahead: int
+    """
+    The number of bytes read from a cache file at a time when streaming from
+    the cache.
+    """
+
+    flush_records: int
+    """
+    While a split is being streamed into the cache, the maximum number of
+    records that are buffered before being handed to the consumer.
+    """
+
+    flush_interval: float
+    """
+    While a split is being streamed into the cache, the maximum number of
+    seconds for which records are buffered before being handed to the consumer.
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        *,
+        cache_format: Union[str, CacheFormat, None] = None,
+        compression: Union[str, Compression, None] = None,
+        max_size: Union[int, str, None] = None,
+        read_ahead: int = DEFAULT_READ_AHEAD,
+        flush_records: int = DEFAULT_FLUSH_RECORDS,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL
+    ):
+        self.root = path.abspath(path.expanduser(root or Environment.CACHE_DIR))
+        if not isinstance(cache_format, CacheFormat):
+            cache_format = get_cache_format(cache_format or Environment.CACHE_FORMAT)
+        self.cache_format = cache_format
+        self.compression = Compression.parse(compression if compression is not None else Environment.CACHE_COMPRESSION)
+        self.max_size = parse_size(max_size if max_size is not None else Environment.CACHE_MAX_SIZE)
+        self.read_ahead = read_ahead
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+
+    def is_cached(self, file_name: str) -> bool:
+        """
+        Returns whether `file_name` is a complete cache file in `cache_format`.
+        Cache files written in an outdated version of the format are removed.
+        """
+        return is_cache_current(file_name, self.cache_format)
+
+    def get_split_directory(self, *, database_uid: str, dataset_uid: str, split: str) -> str:
+        """
+        Returns the directory holding every cached chunking of a particular split.
+        """
+        return path.join(self.root, _safe(database_uid), _safe(dataset_uid), _safe(split))
+
+    def get_chunk_path(self, *, database_uid: str, dataset_uid: str, split: str, chunk: int, nchunks: int) -> str:
+        """
+        Returns the path of the cache file for one chunk of a split.
+        """
+        split_directory = self.get_split_directory(database_uid = database_uid, dataset_uid = dataset_uid, split = split)
+        return path.join(split_directory, f"{nchunks}", f"chunk-{chunk}{self.cache_format.extension}")
+
+    def get_split_path(self, *, database_uid: str, dataset_uid: str, split: str) -> str:
+        """
+        Returns the path of the canonical cache file for a split.
+        """
+        return self.get_chunk_path(database_uid = database_uid, dataset_uid = dataset_uid, split = split, chunk = 0, nchunks = 1)
+
+    def read_chunk(
+        self,
+        *,
+        database_uid: str,
+        dataset_uid: str,
+        split: str,
+        chunk: int,
+        nchunks: int
+    ) -> Optional[Generator[Any, None, None]]:
+        """
+        Reads one chunk of a split from its canonical copy. Returns `None` if the
+        chunk should be streamed from the server instead.
+
+        The chunks that the canonical copy was assembled from (and the whole
+        split) are served exactly as the server streamed them. Any other
+        chunking is served by dividing the canonical copy into contiguous
+        pieces, which hold different annotations than the server's chunks of the
+        same numbers would. So that the chunks of such a chunking never mix the
+        two sources (for instance, if the canonical copy is completed by another
+        process while its chunks are being read), the source is decided the
+        first time that any of its chunks is read, and recorded in the cache.
+        """
+        split_path = self.get_split_path(database_uid = database_uid, dataset_uid = dataset_uid, split = split)
+        cached = self.is_cached(split_path)
+
+        boundaries = _load_chunk_boundaries(split_path) if cached else None
+        if nchunks > 1 and (boundaries is None or len(boundaries) != nchunks + 1):
+            if not self._choose_local_source(database_uid = database_uid, dataset_uid = dataset_uid, split = split, nchunks = nchunks, available = cached):
+                return None
+            boundaries = None
+
+        if not cached:
+            return None
+
+        offsets = load_index(split_path)
+        if boundaries is None or len(boundaries) != nchunks + 1:
+            count = len(offsets) - 1
+            boundaries = [i * count // nchunks for i in range(nchunks + 1)]
+        return read_cache_range(split_path, offsets[boundaries[chunk]], offsets[boundaries[chunk + 1]], self.read_ahead)
+
+    def _choose_local_source(self, *, database_uid: str, dataset_uid: str, split: str, nchunks: int, available: bool) -> bool:
+        # Returns whether every chunk of this chunking is served from the canonical copy, deciding (if it has not
+        # been decided yet) according to whether the canonical copy is `available`.
+        chunking_directory = path.join(self.get_split_directory(database_uid = database_uid, dataset_uid = dataset_uid, split = split), f"{nchunks}")
+        os.makedirs(chunking_directory, exist_ok = True)
+        marker = path.join(chunking_directory, _SOURCE_MARKER)
+        with FileLock(get_lock_path(marker)):
+            try:
+                with open(marker) as f:
+                    return f.read() == "local"
+            except FileNotFoundError:
+                pass
+
+            with open(f"{marker}.tmp", "w") as f:
+                f.write("local" if available else "server")
+            os.replace(f"{marker}.tmp", marker)
+            return available
+
+    def consolidate(self, *, database_uid: str, dataset_uid: str, split: str, nchunks: int) -> bool:
+        """
+        Assembles the canonical copy of a split from its chunks, if all `nchunks`
+        chunks have been cached. The chunk files are removed once the canonical
+        copy is in place.
+
+        Returns whether a canonical copy of the split exists.
+        """
+        split_path = self.get_split_path(database_uid = database_uid, dataset_uid = dataset_uid, split = split)
+        if self.is_cached(split_path):
+            return True
+
+        chunk_paths = [
+            self.get_chunk_path(database_uid = database_uid, dataset_uid = dataset_uid, split = split, chunk = chunk, nchunks = nchunks)
+            for chunk in range(nchunks)
+        ]
+        if not all(self.is_cached(chunk_path) for chunk_path in chunk_paths):
+            return False
+
+        # If the lock is held, the canonical copy is already being streamed or
+        # assembled elsewhere.
+        os.makedirs(path.dirname(split_path), exist_ok = True)
+        lock = FileLock(get_lock_path(split_path))
+        if not lock.acquire(blocking = False):
+            return False
+
+        try:
+            if self.is_cached(split_path):
+                return True
+
+            tmp_split_path = f"{split_path}.consolidate"
+            header = self.cache_format.header
+            offsets: List[int] = [len(header)]
+            chunk_boundaries: List[int] = [0]
+            with open(tmp_split_path, "wb") as tmp_split_file:
+                out = BlockWriter(tmp_split_file, self.compression) if self.compression is not None else tmp_split_file
+                out.write(header)
+                for chunk_path in chunk_paths:
+                    chunk_offsets = load_index(chunk_path)
+                    base = offsets[-1] - chunk_offsets[0]
+                    offsets.extend(base + offset for offset in chunk_offsets[1:])
+                    chunk_boundaries.append(len(offsets) - 1)
+
+                    with open_cache_file(chunk_path) as f:
+                        f.seek(chunk_offsets[0])
+                        _copy_bytes(f, out, chunk_offsets[-1] - chunk_offsets[0])
+
+                if isinstance(out, BlockWriter):
+                    out.close()
+
+            write_index(split_path, offsets)
+            _write_chunk_boundaries(split_path, chunk_boundaries)
+            os.replace(tmp_split_path, split_path)
+
+            for chunk_path in chunk_paths:
+                for file_name in (chunk_path, get_index_path(chunk_path)):
+                    if path.exists(file_name):
+                        os.remove(file_name)
+
+            return True
+        finally:
+            lock.release()
+
+    def get_entries(self) -> List[CacheEntry]:
+        """
+        Returns every entry in the cache, from the least to the most recently
+        used.
+        """
+        entries: List[CacheEntry] = []
+        for database_uid in _list_directories(self.root):
+            for dataset_uid in _list_directories(path.join(self.root, database_uid)):
+                for split in _list_directories(path.join(self.root, database_uid, dataset_uid)):
+                    entries.append(self.get_entry(
+                        database_uid = unquote(database_uid),
+                        dataset_uid = unquote(dataset_uid),
+                        split = unquote(split)
+                    ))
+        return sorted(entries, key = lambda entry: entry.last_access)
+
+    def get_entry(self, *, database_uid: str, dataset_uid: str, split: str) -> CacheEntry:
+        """
+        Returns the entry for a particular split. The split need not be cached.
+        """
+        split_directory = self.get_split_directory(database_uid = database_uid, dataset_uid = dataset_uid, split = split)
+
+        size = 0
+        last_modified = 0.0
+        for directory, _, file_names in os.walk(split_directory):
+            for file_name in file_names:
+                try:
+                    stat = os.stat(path.join(directory, file_name))
+                except FileNotFoundError:
+                    continue
+                size += stat.st_size
+                last_modified = max(last_modified, stat.st_mtime)
+
+        access_marker = path.join(split_directory, _ACCESS_MARKER)
+        return CacheEntry(
+            database_uid = database_uid,
+            dataset_uid = dataset_uid,
+            split = split,
+            path = split_directory,
+            size = size,
+            last_access = path.getmtime(access_marker) if path.exists(access_marker) else last_modified,
+            pinned = path.exists(path.join(split_directory, _PIN_MARKER)),
+            complete = path.exists(self.get_split_path(database_uid = database_uid, dataset_uid = dataset_uid, split = split))
+        )
+
+    def get_size(self) -> int:
+        """
+        Returns the number of bytes occupied by the cache.
+        """
+        return sum(entry.size for entry in self.get_entries())
+
+    def touch(self, *, database_uid: str, dataset_uid: str, split: str) -> None:
+        """
+        Marks a split as having just been used. Eviction is in order of last use.
+        """
+        split_directory = self.get_split_directory(database_uid = database_uid, dataset_uid = dataset_uid, split = split)
+        os.makedirs(split_directory, exist_ok = True)
+        access_marker = path.join(split_directory, _ACCESS_MARKER)
+        with open(access_marker, "a"):
+            pass
+        os.utime(access_marker)
+
+    def pin(self, *, database_uid: str, dataset_uid: str, split: str) -> None:
+        """
+        Pins a split, so that it is never evicted. The split need not be cached
+        yet.
+        """
+        split_directory = self.get_split_directory(database_uid = database_uid, dataset_uid = dataset_uid, split = split)
+        os.makedirs(split_directory, exist_ok = True)
+        with open(path.join(split_directory, _PIN_MARKER), "a"):
+            pass
+
+    def unpin(self, *, database_uid: str, dataset_uid: str, split: str) -> None:
+        """
+        Unpins a split, allowing it to be evicted again.
+        """
+        split_directory = self.get_split_directory(database_uid = database_uid, dataset_uid = dataset_uid, split = split)
+        try:
+            os.remove(path.join(split_directory, _PIN_MARKER))
+        except FileNotFoundError:
+            pass
+
+    def remove(self, entry: CacheEntry) -> bool:
+        """
+        Removes an entry from the cache, even if it is pinned. Returns `False`,
+        and leaves the entry in place, if any of its files are being read or
+        written.
+        """
+        locks: List[FileLock] = []
+        try:
+            for directory, _, file_names in os.walk(entry.path):
+                for file_name in file_names:
+                    if file_name.endswith(".lock"):
+                        lock = FileLock(path.join(directory, file_name))
+                        if not lock.acquire(blocking = False):
+                            return False
+                        locks.append(lock)
+
+            shutil.rmtree(entry.path, ignore_errors = True)
+            return not path.exists(entry.path)
+        finally:
+            for lock in locks:
+                lock.release()
+
+    def evict(self, max_size: Union[int, str, None] = None, *, keep: Collection[str] = ()) -> List[CacheEntry]:
+        """
+        Removes the least recently used entries until the cache occupies at most
+        `max_size` bytes (which defaults to `self.max_size`). Entries that are
+        pinned or in use, and entries whose paths are in `keep`, are skipped.
+
+        Returns the entries that were removed.
+        """
+        budget = parse_size(max_size) if max_size is not None else self.max_size
+        if budget is None:
+            return []
+
+        entries = self.get_entries()
+        size = sum(entry.size for entry in entries)
+        evicted: List[CacheEntry] = []
+        for entry in entries:
+            if size <= budget:
+                break
+            if entry.pinned or entry.path in keep:
+                continue
+            if self.remove(entry):
+                size -= entry.size
+                evicted.append(entry)
+        return evicted
+
+    def verify(self, entry: CacheEntry) -> List[str]:
+        """
+        Checks that every cache file of an entry can be read, and agrees with its
+        index. Returns a description of each problem found.
+        """
+        problems: List[str] = []
+        for directory, _, file_names in os.walk(entry.path):
+            for file_name in sorted(file_names):
+                if not file_name.endswith(self.cache_format.extension):
+                    continue
+
+                file_path = path.join(directory, file_name)
+                relative_path = path.relpath(file_path, entry.path)
+                try:
+                    if get_file_format(file_path) is None:
+                        problems.append(f"{relative_path}: written in an unsupported layout")
+                        continue
+                    offsets = load_index(file_path)
+                    if list(offsets) != list(build_index(file_path)):
+                        problems.append(f"{relative_path}: index does not match the file")
+                        continue
+                    count = sum(1 for _ in read_cache_file(file_path, self.read_ahead))
+                    if count != len(offsets) - 1:
+                        problems.append(f"{relative_path}: holds {count} records, but its index holds {len(offsets) - 1}")
+                except Exception as e:
+                    problems.append(f"{relative_path}: {e}")
+        return problems
+
+    def __repr__(self) -> str:
+        return basic_repr(
+            "SplitCache",
+            self.root,
+            cache_format = self.cache_format.name,
+            compression = self.compression.codec.name if self.compression is not None else None
+        )
+
+def parse_size(size: Union[int, str, None]) -> Optional[int]:
+    """
+    Parses a size in bytes, which may be given with a unit (e.g. `500M` or
+    `20GB`). Units are powers of 1024.
+    """
+    if size is None or isinstance(size, int):
+        return size
+
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*", size.lower())
+    if match is None:
+        raise ValueError(f"Invalid size {repr(size)}")
+    return int(float(match.group(1)) * 1024 ** " kmgt".index(match.group(2) or " "))
+
+def _load_chunk_boundaries(file_name: str) -> Optional[List[int]]:
+    try:
+        with open(get_chunks_path(file_name)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _write_chunk_boundaries(file_name: str, boundaries: List[int]) -> None:
+    chunks_path = get_chunks_path(file_name)
+    with open(f"{chunks_path}.tmp", "w") as f:
+        json.dump(boundaries, f)
+    os.replace(f"{chunks_path}.tmp", chunks_path)
+
+def _list_directories(directory: str) -> List[str]:
+    try:
+        # Hidden directories (such as the metadata cache) are not part of the split cache.
+        return sorted(entry.name for entry in os.scandir(directory) if entry.is_dir() and not entry.name.startswith("."))
+    except FileNotFoundError:
+        return []
+
+def _copy_bytes(source: Any, destination: Any, length: int, block_size: int = 1 << 20) -> None:
+    while length > 0:
+        block = source.read(min(block_size, length))
+        if len(block) == 0:
+            raise EOFError("Cache file is shorter than its index")
+        destination.write(block)
+        length -= len(block)
+
+def _safe(component: str) -> str:
+    # UIDs and split names come from the server, so we make sure they cannot
+    # escape the cache root. `quote` never encodes dots, so the names that refer
+    # to the current and parent directories are encoded explicitly.
+    if component in (".", ".."):
+        return component.replace(".", "%2E")
+    return quote(component, safe = "-_.")
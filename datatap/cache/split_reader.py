@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import mmap
+import operator
+import random
+from typing import Any, Callable, Dict, Generator, Generic, List, Optional, Sequence, TypeVar, Union, overload
+
+from datatap.utils import FileLock, basic_repr
+
+from .cache_file import acquire_read_lock, load_index
+from .cache_format import CacheFormat, get_file_format
+from .compression import BlockReader, open_cache_file
+
+_T = TypeVar("_T")
+
+def _identity(element: Any) -> Any:
+    return element
+
+class SplitReader(Generic[_T]):
+    """
+    Provides random access to the records of a cached split.
+
+    The cache file is memory-mapped and located through its record-offset
+    index, so reading any record touches only the bytes of that record. If the
+    file is compressed, only the block holding the record is decompressed. Records are
+    parsed according to the file's format, and then passed through `decode`.
+
+    ```py
+    reader = dataset.get_split_reader("training")
+    print(len(reader), reader[0], reader[10:20], reader[[4, 8, 15]])
+    ```
+
+    Readers can be pickled (for instance, into `DataLoader` workers), in which
+    case the file is mapped again on first use.
+    """
+
+    file_name: str
+    """
+    The cache file being read.
+    """
+
+    cache_format: CacheFormat
+    """
+    The layout in which the cache file was written.
+    """
+
+    _decode: Callable[[Any], _T]
+    _offsets: Sequence[int]
+    _file: Optional[Any]
+    _lock: Optional[FileLock]
+    _mmap: Optional[Union[mmap.mmap, bytes]]
+
+    def __init__(self, file_name: str, decode: Callable[[Any], _T] = _identity):
+        cache_format = get_file_format(file_name)
+        if cache_format is None:
+            raise ValueError(f"Cache file {file_name} was written in an unsupported layout")
+
+        self.file_name = file_name
+        self.cache_format = cache_format
+        self._decode = decode
+        self._offsets = load_index(file_name)
+        self._file = None
+        self._lock = None
+        self._mmap = None
+
+    def _get_bytes(self, start: int, end: int) -> bytes:
+        if self._file is None:
+            # The shared lock keeps the file from being evicted while it is open.
+            self._lock = acquire_read_lock(self.file_name)
+            self._file = open_cache_file(self.file_name, buffering = 0)
+            # Compressed files are read through their block table instead.
+            if not isinstance(self._file, BlockReader):
+                # Empty files cannot be memory-mapped
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access = mmap.ACCESS_READ) if self._offsets[-1] != 0 else b""
+
+        if self._mmap is None:
+            return self._file.pread(start, end)
+        return self._mmap[start:end]
+
+    def _read(self, index: int) -> _T:
+        return self._decode(self.cache_format.decode(self._get_bytes(self._offsets[index], self._offsets[index + 1])))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @overload
+    def __getitem__(self, key: int) -> _T: ...
+    @overload
+    def __getitem__(self, key: slice) -> List[_T]: ...
+    @overload
+    def __getitem__(self, key: Sequence[int]) -> List[_T]: ...
+    def __getitem__(self, key: Union[int, slice, Sequence[int]]) -> Union[_T, List[_T]]:
+        """
+        Reads a single record by index, a slice of records, or a list of records
+        given a sequence of indices.
+        """
+        if isinstance(key, slice):
+            return [self._read(i) for i in range(*key.indices(len(self)))]
+        if isinstance(key, Sequence):
+            return [self[i] for i in key]
+
+        index = operator.index(key)
+        length = len(self)
+        if index < -length or index >= length:
+            raise IndexError(f"Index {index} is out of range for a split of {length} records")
+        return self._read(index % length)
+
+    def __iter__(self) -> Generator[_T, None, None]:
+        return self.iter()
+
+    def iter(self, start: int = 0, stop: Optional[int] = None) -> Generator[_T, None, None]:
+        """
+        Lazily iterates over the records in `[start, stop)`. This can be used to
+        resume iterating over a split partway through.
+        """
+        for i in range(*slice(start, stop).indices(len(self))):
+            yield self._read(i)
+
+    def sample(self, k: int, *, seed: Optional[int] = None) -> List[_T]:
+        """
+        Reads `k` distinct records chosen uniformly at random from the whole
+        split.
+        """
+        return [self._read(i) for i in random.Random(seed).sample(range(len(self)), k)]
+
+    def close(self) -> None:
+        """
+        Unmaps (and closes) the cache file. The reader may still be used
+        afterwards, in which case the file will be opened again.
+        """
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        if self._file is not None:
+            self._file.close()
+        if self._lock is not None:
+            self._lock.release()
+        self._mmap = None
+        self._file = None
+        self._lock = None
+
+    def __enter__(self) -> SplitReader[_T]:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_file"] = None
+        state["_lock"] = None
+        state["_mmap"] = None
+        return state
+
+    def __repr__(self) -> str:
+        return basic_repr("SplitReader", self.file_name, length = len(self))
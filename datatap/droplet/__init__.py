@@ -3,6 +3,8 @@ This module provides classes for working with ML data.  Specifically, it provide
 objects, converting ML data objects to and from the JSON droplet format, and manipulating ML data objects.
 """
 
+from typing import TYPE_CHECKING
+
 from .bounding_box import BoundingBox, BoundingBoxJson
 from .class_annotation import ClassAnnotation, ClassAnnotationJson
 from .frame_annotation import FrameAnnotation, FrameAnnotationJson
@@ -10,26 +12,47 @@ from .image import Image, ImageJson
 from .image_annotation import ImageAnnotation, ImageAnnotationJson
 from .instance import Instance, InstanceJson
 from .keypoint import Keypoint, KeypointJson
+from .lazy_annotation import LazyImageAnnotation, LazyVideoAnnotation
 from .multi_instance import MultiInstance, MultiInstanceJson
 from .segmentation import Segmentation, SegmentationJson
+from .template_codec import ImageAnnotationCodec, VideoAnnotationCodec
 from .video import Video, VideoJson
 from .video_annotation import VideoAnnotation, VideoAnnotationJson
 
+from ..utils import lazy_exports
+
+if TYPE_CHECKING:
+	from .annotation_batch import AnnotationBatch
+	from .droplet_decoder import DropletArrays, DropletDecoder
+
+# `numpy` is slow to import, so the array-based classes are only imported when they are used.
+__getattr__, __dir__ = lazy_exports(__name__, {
+	"AnnotationBatch": ".annotation_batch",
+	"DropletArrays": ".droplet_decoder",
+	"DropletDecoder": ".droplet_decoder",
+})
+
 __all__ = [
+	"AnnotationBatch",
 	"BoundingBox",
 	"BoundingBoxJson",
 	"ClassAnnotation",
 	"ClassAnnotationJson",
+	"DropletArrays",
+	"DropletDecoder",
 	"FrameAnnotation",
 	"FrameAnnotationJson",
 	"Image",
 	"ImageJson",
 	"ImageAnnotation",
 	"ImageAnnotationJson",
+	"ImageAnnotationCodec",
 	"Instance",
 	"InstanceJson",
 	"Keypoint",
 	"KeypointJson",
+	"LazyImageAnnotation",
+	"LazyVideoAnnotation",
 	"MultiInstance",
 	"MultiInstanceJson",
 	"Segmentation",
@@ -38,4 +61,5 @@ __all__ = [
 	"VideoJson",
 	"VideoAnnotation",
 	"VideoAnnotationJson",
+	"VideoAnnotationCodec",
 ]
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Generic, TypeVar
+
+_T = TypeVar("_T")
+
+class lazy_attribute(Generic[_T]):
+	"""
+	Declares an attribute whose value is computed by the decorated method the
+	first time it is read. The value is then stored on the instance, so later
+	reads are ordinary attribute lookups, and the attribute can be reassigned
+	like any other. (This is `functools.cached_property`, which requires Python
+	3.8.)
+
+	The value is stored in the instance's `__dict__`, so classes using this must
+	not define `__slots__` (though their bases may). A lazy attribute overrides
+	a slot of the same name in a base class.
+	"""
+
+	def __init__(self, compute: Callable[[Any], _T]):
+		self._compute = compute
+		self._name = compute.__name__
+		self.__doc__ = compute.__doc__
+
+	def __get__(self, instance: Any, owner: Any = None) -> _T:
+		if instance is None:
+			return self # type: ignore - accessed on the class
+		value = self._compute(instance)
+		instance.__dict__[self._name] = value
+		return value
@@ -1,26 +1,21 @@
 from __future__ import annotations
 
 import sys
+from importlib import import_module
 from io import BytesIO
-from typing import Sequence
+from typing import Any, Optional, Sequence
+from urllib.parse import urlparse
 
-try:
-	import boto3
-except ImportError:
-	boto3 = None
-
-try:
-	import requests
-except ImportError:
-	requests = None
-
-from ..utils import basic_repr
+from ..utils import CircuitBreaker, HttpError, RetryPolicy, basic_repr
+from ..utils.retry import parse_retry_after
 
 class Media:
 	"""
 	The `Media` class acts as a base class for all loadable media.
 	"""
 
+	__slots__ = ("paths",)
+
 	paths: Sequence[str]
 	"""
 	A sequence of URIs where the media can be found. The loader
@@ -40,7 +35,13 @@ class Media:
 			return NotImplemented
 		return self.paths == other.paths
 
-	def load(self, quiet: bool = False, attempts: int = 3, allow_local: bool = False) -> BytesIO:
+	def load(
+		self,
+		quiet: bool = False,
+		attempts: int = 3,
+		allow_local: bool = False,
+		retry_policy: Optional[RetryPolicy] = None
+	) -> BytesIO:
 		"""
 		Attempts to load the Video file specified by this reference.
 		Resolution happpens in this order:
@@ -48,36 +49,85 @@ class Media:
 		1. Load from an internal cache (either from a previous load, or from `from_pil`)
 		2. Try loading every path in order, returning once one loads
 
+		Failed loads are retried according to `retry_policy`, which by default
+		makes up to `attempts` attempts per path with exponential backoff. Hosts
+		that keep failing are skipped for a while (see `CircuitBreaker`).
+
 		Warning! `load` may attempt to read from the local file system or from private
 		networks. Please ensure that the annotation you are loading is trusted.
 		"""
+		policy = retry_policy or RetryPolicy(max_attempts = attempts, retry_on = (Exception,))
+
 		for path in self.paths:
-			for i in range(attempts):
+			if ":" not in path:
+				if not quiet:
+					print(f"Cannot load {type(self).__name__} {path}, with error Missing scheme", file = sys.stderr)
+				continue
+
+			scheme, file_name, *_ = path.split(":")
+			scheme = scheme.lower()
+			if not (
+				(scheme == "s3" and _import_optional("boto3") is not None)
+				or (scheme in ["http", "https"] and _import_optional("requests") is not None)
+				or (scheme == "file" and allow_local)
+			):
+				if not quiet:
+					print(f"Cannot load {type(self).__name__} {path}, with error Unsupported scheme: {scheme}", file = sys.stderr)
+				continue
+
+			attempt = 0
+			def load_path() -> bytes:
+				nonlocal attempt
+				attempt += 1
 				try:
-					scheme, file_name, *_ = path.split(":")
-					if scheme.lower() == "s3" and boto3 is not None:
-						bucket_name, *path_components = [
-							component
-							for component in file_name.split("/")
-							if component != ""
-						]
-						path_name = "/".join(path_components)
-
-						s3 = boto3.resource("s3") # type: ignore
-						file_obj = s3.Object(bucket_name, path_name) # type: ignore
-						data: bytes = file_obj.get()["Body"].read() # type: ignore
-					elif scheme.lower() in ["http", "https"] and requests is not None:
-						response = requests.get(path)
-						data = response.content
-					elif scheme.lower() == "file" and allow_local:
-						with open(file_name, "rb") as file_obj:
-							data = file_obj.read()
-					else:
-						raise NotImplementedError(f"Unsupported scheme: {scheme}")
-
-					return BytesIO(data)
+					return _load_path(scheme, file_name, path)
 				except Exception as e:
 					if not quiet:
-						print(f"Cannot load {type(self).__name__} {path}, with error {str(e)}, attempt ({i + 1}/{attempts})", file = sys.stderr)
+						print(f"Cannot load {type(self).__name__} {path}, with error {str(e)}, attempt ({attempt}/{policy.max_attempts})", file = sys.stderr)
+					raise
+
+			try:
+				if scheme == "file":
+					data = policy.call(load_path)
+				else:
+					data = policy.call(load_path, circuit_breaker = _circuit_breaker, host = f"{scheme}:{urlparse(path).netloc}")
+				return BytesIO(data)
+			except Exception:
+				pass
 
 		raise FileNotFoundError(f"All paths for {type(self).__name__} failed to load", self.paths)
+
+_circuit_breaker = CircuitBreaker()
+
+def _import_optional(name: str) -> Any:
+	# `boto3` and `requests` are slow to import, so they are only imported once a path that needs them is loaded.
+	try:
+		return import_module(name)
+	except ImportError:
+		return None
+
+def _load_path(scheme: str, file_name: str, path: str) -> bytes:
+	if scheme == "s3":
+		boto3 = _import_optional("boto3")
+		bucket_name, *path_components = [
+			component
+			for component in file_name.split("/")
+			if component != ""
+		]
+		path_name = "/".join(path_components)
+
+		s3 = boto3.resource("s3") # type: ignore
+		file_obj = s3.Object(bucket_name, path_name) # type: ignore
+		return file_obj.get()["Body"].read() # type: ignore
+	elif scheme in ["http", "https"]:
+		response = _import_optional("requests").get(path)
+		if not response.ok:
+			raise HttpError(
+				f"{response.status_code} {response.reason}",
+				status = response.status_code,
+				retry_after = parse_retry_after(response.headers.get("Retry-After"))
+			)
+		return response.content
+	else:
+		with open(file_name, "rb") as file_obj:
+			return file_obj.read()
@@ -0,0 +1,457 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..geometry import Mask, Point, Polygon, Rectangle
+from ..utils import basic_repr
+from .bounding_box import BoundingBox
+from .class_annotation import ClassAnnotation
+from .image import Image
+from .image_annotation import ImageAnnotation
+from .instance import Instance
+from .keypoint import Keypoint
+from .segmentation import Segmentation
+
+_KeypointValue = Optional[Tuple[float, float, Optional[bool], Optional[float]]]
+
+class AnnotationBatch:
+	"""
+	A batch of image annotations stored as columns of NumPy arrays (a "struct of
+	arrays"), rather than as trees of Python objects. This allows consumers,
+	such as metrics and training pipelines, to operate on every instance in the
+	batch at once.
+
+	The instances of all of the annotations are stored contiguously: those of
+	annotation `i` are at `offsets[i]:offsets[i + 1]` in each per-instance
+	array (see `instance_slice`). Variable-length data (keypoints and
+	polygons) is stored in the same way, as ragged arrays with offsets into a
+	flat array.
+
+	Coordinates are stored as `float32`, so they are only preserved to that
+	precision. Missing values are `NaN`.
+
+	A batch holds the images, uids, bounding boxes, segmentations and keypoints
+	of its annotations' instances. Instance IDs, attributes, multi-instances,
+	masks and metadata are not held.
+
+	```py
+	batch = AnnotationBatch.from_annotations(annotations, class_names = ["car", "person"])
+	areas = (batch.boxes[:, 2] - batch.boxes[:, 0]) * (batch.boxes[:, 3] - batch.boxes[:, 1])
+	```
+	"""
+
+	class_names: Sequence[str]
+	"""
+	The name of each class, indexed by class ID.
+	"""
+
+	images: Sequence[Image]
+	"""
+	The image of each annotation.
+	"""
+
+	uids: Sequence[Optional[str]]
+	"""
+	The UID of each annotation.
+	"""
+
+	offsets: np.ndarray
+	"""
+	An `int64` array of shape `(N + 1,)`, such that the instances of annotation
+	`i` are at `offsets[i]:offsets[i + 1]`.
+	"""
+
+	boxes: np.ndarray
+	"""
+	A `float32` array of shape `(M, 4)` holding the bounding box of each
+	instance as `(x1, y1, x2, y2)`. The row of an instance without a bounding
+	box is `NaN`.
+	"""
+
+	class_ids: np.ndarray
+	"""
+	An `int32` array of shape `(M,)` holding the class ID of each instance.
+	"""
+
+	confidences: np.ndarray
+	"""
+	A `float32` array of shape `(M,)` holding the confidence of each instance's
+	bounding box, or `NaN` if it has none.
+	"""
+
+	segmentation_confidences: np.ndarray
+	"""
+	A `float32` array of shape `(M,)` holding the confidence of each instance's
+	segmentation, or `NaN` if it has none.
+	"""
+
+	segmentation_offsets: np.ndarray
+	"""
+	An `int64` array of shape `(M + 1,)`, such that the polygons of the
+	segmentation of instance `j` are at
+	`segmentation_offsets[j]:segmentation_offsets[j + 1]` in `polygon_offsets`.
+	An instance without a segmentation has no polygons.
+	"""
+
+	polygon_offsets: np.ndarray
+	"""
+	An `int64` array of shape `(P + 1,)`, such that the vertices of polygon `k`
+	are at `polygon_offsets[k]:polygon_offsets[k + 1]` in `vertices`.
+	"""
+
+	vertices: np.ndarray
+	"""
+	A `float32` array of shape `(V, 2)` holding the vertices of every polygon.
+	"""
+
+	keypoint_names: Sequence[str]
+	"""
+	The name of each keypoint, indexed by keypoint ID.
+	"""
+
+	keypoint_offsets: np.ndarray
+	"""
+	An `int64` array of shape `(M + 1,)`, such that the keypoints of instance
+	`j` are at `keypoint_offsets[j]:keypoint_offsets[j + 1]` in the keypoint
+	arrays.
+	"""
+
+	keypoint_ids: np.ndarray
+	"""
+	An `int32` array of shape `(K,)` holding the keypoint ID of each keypoint.
+	"""
+
+	keypoints: np.ndarray
+	"""
+	A `float32` array of shape `(K, 2)` holding the position of each keypoint.
+	The row of a keypoint that is not present is `NaN`.
+	"""
+
+	keypoint_occluded: np.ndarray
+	"""
+	An `int8` array of shape `(K,)` holding whether each keypoint is occluded
+	(`1`), visible (`0`) or unknown (`-1`).
+	"""
+
+	keypoint_confidences: np.ndarray
+	"""
+	A `float32` array of shape `(K,)` holding the confidence of each keypoint,
+	or `NaN` if it has none.
+	"""
+
+	@staticmethod
+	def from_annotations(
+		annotations: Iterable[ImageAnnotation],
+		class_names: Optional[Sequence[str]] = None
+	) -> AnnotationBatch:
+		"""
+		Creates an `AnnotationBatch` from a sequence of `ImageAnnotation`s.
+
+		If `class_names` is given, it determines the class IDs, and every class
+		must be one of them. Otherwise, classes are numbered in the order they are
+		encountered.
+		"""
+		builder = _BatchBuilder(class_names)
+		for annotation in annotations:
+			builder.add_annotation(annotation.image, annotation.uid)
+			for class_name, class_annotation in annotation.classes.items():
+				class_id = builder.get_class_id(class_name)
+				for instance in class_annotation.instances:
+					box, segmentation = instance.bounding_box, instance.segmentation
+					builder.add_instance(
+						class_id,
+						box = (box.rectangle.p1.x, box.rectangle.p1.y, box.rectangle.p2.x, box.rectangle.p2.y) if box is not None else None,
+						confidence = box.confidence if box is not None else None,
+						polygons = [
+							[(point.x, point.y) for point in polygon.points]
+							for polygon in segmentation.mask.polygons
+						] if segmentation is not None else (),
+						segmentation_confidence = segmentation.confidence if segmentation is not None else None,
+						keypoints = {
+							name: (keypoint.point.x, keypoint.point.y, keypoint.occluded, keypoint.confidence) if keypoint is not None else None
+							for name, keypoint in instance.keypoints.items()
+						} if instance.keypoints is not None else None,
+					)
+		return builder.build()
+
+	@staticmethod
+	def from_json(
+		droplets: Iterable[Mapping[str, Any]],
+		class_names: Optional[Sequence[str]] = None
+	) -> AnnotationBatch:
+		"""
+		Creates an `AnnotationBatch` from a sequence of `ImageAnnotationJson`s,
+		without creating any `Instance`s along the way.
+
+		`class_names` is as in `from_annotations`.
+		"""
+		builder = _BatchBuilder(class_names)
+		for droplet in droplets:
+			builder.add_annotation(Image.from_json(droplet["image"]), droplet.get("uid"))
+			for class_name, class_json in droplet["classes"].items():
+				class_id = builder.get_class_id(class_name)
+				for instance in class_json.get("instances", ()):
+					box = instance.get("boundingBox")
+					segmentation = instance.get("segmentation")
+					keypoints = instance.get("keypoints")
+					builder.add_instance(
+						class_id,
+						box = (*box["rectangle"][0], *box["rectangle"][1]) if box is not None else None,
+						confidence = box.get("confidence") if box is not None else None,
+						polygons = segmentation["mask"] if segmentation is not None else (),
+						segmentation_confidence = segmentation.get("confidence") if segmentation is not None else None,
+						keypoints = {
+							name: (*keypoint["point"], keypoint.get("occluded"), keypoint.get("confidence")) if keypoint is not None else None
+							for name, keypoint in keypoints.items()
+						} if keypoints is not None else None,
+					)
+		return builder.build()
+
+	def __init__(
+		self,
+		*,
+		class_names: Sequence[str],
+		images: Sequence[Image],
+		uids: Sequence[Optional[str]],
+		offsets: np.ndarray,
+		boxes: np.ndarray,
+		class_ids: np.ndarray,
+		confidences: np.ndarray,
+		segmentation_confidences: np.ndarray,
+		segmentation_offsets: np.ndarray,
+		polygon_offsets: np.ndarray,
+		vertices: np.ndarray,
+		keypoint_names: Sequence[str],
+		keypoint_offsets: np.ndarray,
+		keypoint_ids: np.ndarray,
+		keypoints: np.ndarray,
+		keypoint_occluded: np.ndarray,
+		keypoint_confidences: np.ndarray
+	):
+		self.class_names = class_names
+		self.images = images
+		self.uids = uids
+		self.offsets = offsets
+		self.boxes = boxes
+		self.class_ids = class_ids
+		self.confidences = confidences
+		self.segmentation_confidences = segmentation_confidences
+		self.segmentation_offsets = segmentation_offsets
+		self.polygon_offsets = polygon_offsets
+		self.vertices = vertices
+		self.keypoint_names = keypoint_names
+		self.keypoint_offsets = keypoint_offsets
+		self.keypoint_ids = keypoint_ids
+		self.keypoints = keypoints
+		self.keypoint_occluded = keypoint_occluded
+		self.keypoint_confidences = keypoint_confidences
+
+	@property
+	def has_box(self) -> np.ndarray:
+		"""
+		A boolean array of shape `(M,)` indicating which instances have bounding
+		boxes.
+		"""
+		return ~np.isnan(self.boxes[:, 0])
+
+	@property
+	def annotation_ids(self) -> np.ndarray:
+		"""
+		An `int64` array of shape `(M,)` holding the index of the annotation to
+		which each instance belongs.
+		"""
+		return np.repeat(np.arange(len(self), dtype = np.int64), np.diff(self.offsets))
+
+	def instance_slice(self, index: int) -> slice:
+		"""
+		Returns the slice of the per-instance arrays that holds the instances of
+		annotation `index`.
+		"""
+		return slice(int(self.offsets[index]), int(self.offsets[index + 1]))
+
+	def to_annotations(self) -> List[ImageAnnotation]:
+		"""
+		Converts this batch into a list of `ImageAnnotation`s. Each annotation has
+		every class in `class_names`, even if it has no instances of it.
+		"""
+		# Python scalars are much faster to work with one at a time than NumPy's.
+		boxes = self.boxes.tolist()
+		class_ids: List[int] = self.class_ids.tolist()
+		confidences = self.confidences.tolist()
+		segmentation_confidences = self.segmentation_confidences.tolist()
+		segmentation_offsets = self.segmentation_offsets.tolist()
+		polygon_offsets = self.polygon_offsets.tolist()
+		vertices = self.vertices.tolist()
+		keypoint_offsets = self.keypoint_offsets.tolist()
+		keypoint_ids: List[int] = self.keypoint_ids.tolist()
+		keypoints = self.keypoints.tolist()
+		keypoint_occluded = self.keypoint_occluded.tolist()
+		keypoint_confidences = self.keypoint_confidences.tolist()
+		offsets = self.offsets.tolist()
+
+		annotations: List[ImageAnnotation] = []
+		for index in range(len(self)):
+			instances: Dict[str, List[Instance]] = { class_name: [] for class_name in self.class_names }
+			for j in range(offsets[index], offsets[index + 1]):
+				box = boxes[j]
+				polygons = range(segmentation_offsets[j], segmentation_offsets[j + 1])
+				instances[self.class_names[int(class_ids[j])]].append(Instance(
+					bounding_box = BoundingBox(
+						Rectangle(Point(box[0], box[1]), Point(box[2], box[3])),
+						confidence = _from_nan(confidences[j])
+					) if not math.isnan(box[0]) else None,
+					segmentation = Segmentation(
+						Mask([
+							Polygon([Point(x, y) for x, y in vertices[polygon_offsets[k]:polygon_offsets[k + 1]]])
+							for k in polygons
+						]),
+						confidence = _from_nan(segmentation_confidences[j])
+					) if len(polygons) > 0 else None,
+					keypoints = {
+						self.keypoint_names[int(keypoint_ids[k])]: Keypoint(
+							Point(keypoints[k][0], keypoints[k][1]),
+							occluded = bool(keypoint_occluded[k]) if keypoint_occluded[k] >= 0 else None,
+							confidence = _from_nan(keypoint_confidences[k])
+						) if not math.isnan(keypoints[k][0]) else None
+						for k in range(keypoint_offsets[j], keypoint_offsets[j + 1])
+					} if keypoint_offsets[j + 1] > keypoint_offsets[j] else None
+				))
+
+			annotations.append(ImageAnnotation(
+				image = self.images[index],
+				classes = {
+					class_name: ClassAnnotation(instances = class_instances)
+					for class_name, class_instances in instances.items()
+				},
+				uid = self.uids[index]
+			))
+		return annotations
+
+	def __len__(self) -> int:
+		return len(self.images)
+
+	def __repr__(self) -> str:
+		return basic_repr(
+			"AnnotationBatch",
+			annotations = len(self),
+			instances = len(self.class_ids),
+			polygons = len(self.polygon_offsets) - 1,
+			keypoints = len(self.keypoint_ids)
+		)
+
+def _from_nan(value: float) -> Optional[float]:
+	return None if math.isnan(value) else value
+
+class _BatchBuilder:
+	"""
+	Accumulates the columns of an `AnnotationBatch` in Python lists, which are
+	converted into arrays once every annotation has been added.
+	"""
+
+	def __init__(self, class_names: Optional[Sequence[str]]):
+		self.fixed_classes = class_names is not None
+		self.class_names: List[str] = list(class_names or [])
+		self.class_ids: Dict[str, int] = { name: i for i, name in enumerate(self.class_names) }
+		self.keypoint_names: List[str] = []
+		self.keypoint_name_ids: Dict[str, int] = {}
+
+		self.images: List[Image] = []
+		self.uids: List[Optional[str]] = []
+		self.offsets: List[int] = [0]
+		self.boxes: List[float] = []
+		self.instance_classes: List[int] = []
+		self.confidences: List[float] = []
+		self.segmentation_confidences: List[float] = []
+		self.segmentation_offsets: List[int] = [0]
+		self.polygon_offsets: List[int] = [0]
+		self.vertices: List[float] = []
+		self.keypoint_offsets: List[int] = [0]
+		self.keypoint_ids: List[int] = []
+		self.keypoints: List[float] = []
+		self.keypoint_occluded: List[int] = []
+		self.keypoint_confidences: List[float] = []
+
+	def get_class_id(self, class_name: str) -> int:
+		class_id = self.class_ids.get(class_name)
+		if class_id is None:
+			if self.fixed_classes:
+				raise ValueError(f"Unknown class: {class_name!r}")
+			class_id = self.class_ids[class_name] = len(self.class_names)
+			self.class_names.append(class_name)
+		return class_id
+
+	def add_annotation(self, image: Image, uid: Optional[str]) -> None:
+		self.images.append(image)
+		self.uids.append(uid)
+		self.offsets.append(self.offsets[-1])
+
+	def add_instance(
+		self,
+		class_id: int,
+		*,
+		box: Optional[Tuple[float, float, float, float]],
+		confidence: Optional[float],
+		polygons: Iterable[Sequence[Sequence[float]]],
+		segmentation_confidence: Optional[float],
+		keypoints: Optional[Mapping[str, _KeypointValue]]
+	) -> None:
+		self.offsets[-1] += 1
+		self.instance_classes.append(class_id)
+		self.boxes.extend(box if box is not None else (math.nan,) * 4)
+		self.confidences.append(_to_nan(confidence))
+		self.segmentation_confidences.append(_to_nan(segmentation_confidence))
+
+		polygon_count = 0
+		for polygon in polygons:
+			for x, y in polygon:
+				self.vertices.append(x)
+				self.vertices.append(y)
+			self.polygon_offsets.append(len(self.vertices) // 2)
+			polygon_count += 1
+		self.segmentation_offsets.append(self.segmentation_offsets[-1] + polygon_count)
+
+		if keypoints is not None:
+			for name, keypoint in keypoints.items():
+				keypoint_id = self.keypoint_name_ids.get(name)
+				if keypoint_id is None:
+					keypoint_id = self.keypoint_name_ids[name] = len(self.keypoint_names)
+					self.keypoint_names.append(name)
+
+				self.keypoint_ids.append(keypoint_id)
+				if keypoint is None:
+					self.keypoints.extend((math.nan, math.nan))
+					self.keypoint_occluded.append(-1)
+					self.keypoint_confidences.append(math.nan)
+				else:
+					x, y, occluded, keypoint_confidence = keypoint
+					self.keypoints.extend((x, y))
+					self.keypoint_occluded.append(-1 if occluded is None else int(occluded))
+					self.keypoint_confidences.append(_to_nan(keypoint_confidence))
+		self.keypoint_offsets.append(len(self.keypoint_ids))
+
+	def build(self) -> AnnotationBatch:
+		return AnnotationBatch(
+			class_names = self.class_names,
+			images = self.images,
+			uids = self.uids,
+			offsets = np.array(self.offsets, dtype = np.int64),
+			boxes = np.array(self.boxes, dtype = np.float32).reshape((-1, 4)),
+			class_ids = np.array(self.instance_classes, dtype = np.int32),
+			confidences = np.array(self.confidences, dtype = np.float32),
+			segmentation_confidences = np.array(self.segmentation_confidences, dtype = np.float32),
+			segmentation_offsets = np.array(self.segmentation_offsets, dtype = np.int64),
+			polygon_offsets = np.array(self.polygon_offsets, dtype = np.int64),
+			vertices = np.array(self.vertices, dtype = np.float32).reshape((-1, 2)),
+			keypoint_names = self.keypoint_names,
+			keypoint_offsets = np.array(self.keypoint_offsets, dtype = np.int64),
+			keypoint_ids = np.array(self.keypoint_ids, dtype = np.int32),
+			keypoints = np.array(self.keypoints, dtype = np.float32).reshape((-1, 2)),
+			keypoint_occluded = np.array(self.keypoint_occluded, dtype = np.int8),
+			keypoint_confidences = np.array(self.keypoint_confidences, dtype = np.float32),
+		)
+
+def _to_nan(value: Optional[float]) -> float:
+	return math.nan if value is None else value
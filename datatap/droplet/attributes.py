@@ -18,6 +18,8 @@ class AttributeValueJson(_AttributeValueOptional, TypedDict):
 AttributeValuesJson = Union[Sequence[AttributeValueJson], str]
 
 class AttributeValue:
+	__slots__ = ("value", "confidence")
+
 	value: str
 	confidence: Optional[float]
 
@@ -36,6 +38,8 @@ class AttributeValue:
 		return AttributeValue(json["value"], confidence=json.get("confidence"))
 
 class AttributeValues:
+	__slots__ = ("content",)
+
 	content: Sequence[AttributeValue]
 
 	@staticmethod
@@ -22,6 +22,8 @@ class BoundingBox:
 	specified as an axis-aligned rectangle.
 	"""
 
+	__slots__ = ("rectangle", "confidence")
+
 	rectangle: Rectangle
 	"""
 	The area within the image where the corresponding detection appears.
@@ -24,6 +24,8 @@ class ClassAnnotation:
 	that describe a visual clustering of the class.
 	"""
 
+	__slots__ = ("instances", "multi_instances")
+
 	instances: Sequence[Instance]
 	"""
 	A sequence of individual instances of this class.
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+from ..utils import basic_repr, json_backend
+
+DROPLET_FIELDS = ("boxes", "masks", "keypoints", "attributes")
+"""
+The fields that a `DropletDecoder` can extract.
+"""
+
+class DropletArrays:
+	"""
+	The arrays decoded from a single droplet by a `DropletDecoder`. Each
+	per-instance array has one entry (or row) for each of the droplet's `M`
+	instances whose class is in the decoder's class mapping.
+
+	The arrays of fields that were not selected are `None`.
+	"""
+
+	__slots__ = (
+		"uid",
+		"image_paths",
+		"labels",
+		"boxes",
+		"confidences",
+		"segmentation_offsets",
+		"polygon_offsets",
+		"vertices",
+		"keypoints",
+		"keypoint_visibility",
+		"attributes",
+	)
+
+	uid: Optional[str]
+	"""
+	The UID of the droplet.
+	"""
+
+	image_paths: Sequence[str]
+	"""
+	The paths of the droplet's image.
+	"""
+
+	labels: np.ndarray
+	"""
+	An `int64` array of shape `(M,)` holding the class ID of each instance.
+	"""
+
+	boxes: Optional[np.ndarray]
+	"""
+	A `float32` array of shape `(M, 4)` holding the bounding box of each
+	instance as `(x1, y1, x2, y2)`. The row of an instance without a bounding
+	box is `NaN`.
+	"""
+
+	confidences: Optional[np.ndarray]
+	"""
+	A `float32` array of shape `(M,)` holding the confidence of each instance's
+	bounding box, or `NaN` if it has none.
+	"""
+
+	segmentation_offsets: Optional[np.ndarray]
+	"""
+	An `int64` array of shape `(M + 1,)`, such that the polygons of instance `j`
+	are at `segmentation_offsets[j]:segmentation_offsets[j + 1]` in
+	`polygon_offsets`, as in `AnnotationBatch`.
+	"""
+
+	polygon_offsets: Optional[np.ndarray]
+	"""
+	An `int64` array of shape `(P + 1,)`, such that the vertices of polygon `k`
+	are at `polygon_offsets[k]:polygon_offsets[k + 1]` in `vertices`.
+	"""
+
+	vertices: Optional[np.ndarray]
+	"""
+	A `float32` array of shape `(V, 2)` holding the vertices of every polygon.
+	"""
+
+	keypoints: Optional[np.ndarray]
+	"""
+	A `float32` array of shape `(M, K, 2)` holding the position of each of the
+	decoder's `K` keypoints on each instance, or `NaN` if it is not present.
+	"""
+
+	keypoint_visibility: Optional[np.ndarray]
+	"""
+	An `int8` array of shape `(M, K)` holding the visibility of each keypoint,
+	as in COCO: `0` if it is not present, `1` if it is occluded and `2`
+	otherwise.
+	"""
+
+	attributes: Optional[List[Dict[str, str]]]
+	"""
+	The most likely value of each attribute of each instance.
+	"""
+
+	def __init__(
+		self,
+		*,
+		uid: Optional[str],
+		image_paths: Sequence[str],
+		labels: np.ndarray,
+		boxes: Optional[np.ndarray] = None,
+		confidences: Optional[np.ndarray] = None,
+		segmentation_offsets: Optional[np.ndarray] = None,
+		polygon_offsets: Optional[np.ndarray] = None,
+		vertices: Optional[np.ndarray] = None,
+		keypoints: Optional[np.ndarray] = None,
+		keypoint_visibility: Optional[np.ndarray] = None,
+		attributes: Optional[List[Dict[str, str]]] = None
+	):
+		self.uid = uid
+		self.image_paths = image_paths
+		self.labels = labels
+		self.boxes = boxes
+		self.confidences = confidences
+		self.segmentation_offsets = segmentation_offsets
+		self.polygon_offsets = polygon_offsets
+		self.vertices = vertices
+		self.keypoints = keypoints
+		self.keypoint_visibility = keypoint_visibility
+		self.attributes = attributes
+
+	def __repr__(self) -> str:
+		return basic_repr("DropletArrays", uid = self.uid, instances = len(self.labels))
+
+class DropletDecoder:
+	"""
+	Decodes image annotation droplets directly into NumPy arrays, without
+	building an `ImageAnnotation` (or any of its instances) along the way. This
+	is intended for training pipelines, which generally need only a few of the
+	fields of each droplet.
+
+	Only instances of the classes in `class_mapping` are decoded, and they are
+	labeled with the IDs it gives them. `fields` selects which of
+	`DROPLET_FIELDS` are extracted; decoding `"keypoints"` requires
+	`keypoint_names`, which determines their order.
+
+	```py
+	decode = DropletDecoder({ "car": 0, "person": 1 })
+	for droplet in dataset.stream_split_droplets("training"):
+		arrays = decode(droplet)
+		...
+	```
+
+	To convert whole batches of annotations into arrays, see `AnnotationBatch`.
+	"""
+
+	class_mapping: Mapping[str, int]
+	"""
+	The ID of each class to decode.
+	"""
+
+	fields: Sequence[str]
+	"""
+	The fields to extract.
+	"""
+
+	keypoint_names: Sequence[str]
+	"""
+	The names of the keypoints to extract.
+	"""
+
+	def __init__(
+		self,
+		class_mapping: Mapping[str, int],
+		*,
+		fields: Sequence[str] = ("boxes",),
+		keypoint_names: Optional[Sequence[str]] = None
+	):
+		unknown = set(fields) - set(DROPLET_FIELDS)
+		if len(unknown) > 0:
+			raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+		if "keypoints" in fields and keypoint_names is None:
+			raise ValueError("Decoding keypoints requires `keypoint_names`")
+
+		self.class_mapping = class_mapping
+		self.fields = fields
+		self.keypoint_names = keypoint_names or []
+
+		self._boxes = "boxes" in fields
+		self._masks = "masks" in fields
+		self._keypoints = "keypoints" in fields
+		self._attributes = "attributes" in fields
+
+	def __call__(self, droplet: Union[bytes, str, Mapping[str, Any]]) -> DropletArrays:
+		"""
+		Decodes a droplet, given either as a line of JSON or already parsed.
+		"""
+		if isinstance(droplet, (bytes, str)):
+			droplet = json_backend.loads(droplet)
+		assert isinstance(droplet, Mapping)
+
+		labels: List[int] = []
+		boxes: List[float] = []
+		confidences: List[float] = []
+		segmentation_offsets: List[int] = [0]
+		polygon_offsets: List[int] = [0]
+		vertices: List[float] = []
+		keypoints: List[float] = []
+		keypoint_visibility: List[int] = []
+		attributes: List[Dict[str, str]] = []
+
+		for class_name, class_json in droplet["classes"].items():
+			label = self.class_mapping.get(class_name)
+			if label is None:
+				continue
+
+			for instance in class_json.get("instances", ()):
+				labels.append(label)
+
+				if self._boxes:
+					box = instance.get("boundingBox")
+					if box is None:
+						boxes.extend((math.nan, math.nan, math.nan, math.nan))
+						confidences.append(math.nan)
+					else:
+						(x1, y1), (x2, y2) = box["rectangle"]
+						boxes.extend((x1, y1, x2, y2))
+						confidence = box.get("confidence")
+						confidences.append(math.nan if confidence is None else confidence)
+
+				if self._masks:
+					segmentation = instance.get("segmentation")
+					if segmentation is not None:
+						for polygon in segmentation["mask"]:
+							for x, y in polygon:
+								vertices.append(x)
+								vertices.append(y)
+							polygon_offsets.append(len(vertices) // 2)
+					segmentation_offsets.append(len(polygon_offsets) - 1)
+
+				if self._keypoints:
+					instance_keypoints: Mapping[str, Any] = instance.get("keypoints") or {}
+					for name in self.keypoint_names:
+						keypoint: Optional[Mapping[str, Any]] = instance_keypoints.get(name)
+						if keypoint is None:
+							keypoints.extend((math.nan, math.nan))
+							keypoint_visibility.append(0)
+						else:
+							# Unpacking checks that the point has two coordinates, as any other number would misalign
+							# every keypoint after it.
+							x, y = keypoint["point"]
+							keypoints.extend((x, y))
+							keypoint_visibility.append(1 if keypoint.get("occluded") else 2)
+
+				if self._attributes:
+					instance_attributes: Mapping[str, Any] = instance.get("attributes") or {}
+					attributes.append({
+						name: _most_likely(values)
+						for name, values in instance_attributes.items()
+						if isinstance(values, str) or len(values) > 0
+					})
+
+		count = len(labels)
+		return DropletArrays(
+			uid = droplet.get("uid"),
+			image_paths = droplet["image"]["paths"],
+			labels = np.array(labels, dtype = np.int64),
+			boxes = np.array(boxes, dtype = np.float32).reshape((count, 4)) if self._boxes else None,
+			confidences = np.array(confidences, dtype = np.float32) if self._boxes else None,
+			segmentation_offsets = np.array(segmentation_offsets, dtype = np.int64) if self._masks else None,
+			polygon_offsets = np.array(polygon_offsets, dtype = np.int64) if self._masks else None,
+			vertices = np.array(vertices, dtype = np.float32).reshape((-1, 2)) if self._masks else None,
+			keypoints = np.array(keypoints, dtype = np.float32).reshape((count, len(self.keypoint_names), 2)) if self._keypoints else None,
+			keypoint_visibility = np.array(keypoint_visibility, dtype = np.int8).reshape((count, len(self.keypoint_names))) if self._keypoints else None,
+			attributes = attributes if self._attributes else None,
+		)
+
+	def __repr__(self) -> str:
+		return basic_repr("DropletDecoder", classes = list(self.class_mapping), fields = list(self.fields))
+
+def _most_likely(values: Any) -> str:
+	if isinstance(values, str):
+		return values
+	# The same choice as `AttributeValues.most_likely`
+	return max(values, key = lambda value: value.get("confidence") or 1.0)["value"]
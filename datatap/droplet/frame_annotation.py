@@ -21,6 +21,8 @@ class FrameAnnotation:
 	A collection of class annotations that annotate a given image.
 	"""
 
+	__slots__ = ("classes",)
+
 	classes: Mapping[str, ClassAnnotation]
 	"""
 	A mapping from class name to the annotations of that class.
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
-from typing import Optional, Sequence
+from typing import TYPE_CHECKING, Optional, Sequence
 
-import PIL.Image
 from typing_extensions import TypedDict
 
 from ..utils import basic_repr
 from ._media import Media
 
+if TYPE_CHECKING:
+	import PIL.Image
+
 
 class _ImageJsonOptional(TypedDict, total = False):
 	uid: str
@@ -25,6 +27,8 @@ class Image(Media):
 	for loading and manipulating images.
 	"""
 
+	__slots__ = ("uid", "_pil_image")
+
 	uid: Optional[str]
 	"""
 	A unique ID for this image.
@@ -79,6 +83,8 @@ class Image(Media):
 		if self._pil_image is not None:
 			return self._pil_image
 
+		# `PIL` is only imported when an image is first loaded, as it is slow to import.
+		import PIL.Image
 		return PIL.Image.open(self.load(quiet, attempts, allow_local))
 
 	def to_json(self) -> ImageJson:
@@ -34,6 +34,8 @@ class ImageAnnotation:
 	A collection of class annotations that annotate a given image.
 	"""
 
+	__slots__ = ("image", "classes", "mask", "uid", "metadata")
+
 	image: Image
 	"""
 	The image being annotated.
@@ -26,6 +26,8 @@ class Instance:
 	A single appearance of an object of a particular class within a given image.
 	"""
 
+	__slots__ = ("id", "bounding_box", "segmentation", "keypoints", "attributes")
+
 	id: Optional[str]
 	"""
 	A unique id for this instance (within the context of its containing
@@ -22,6 +22,8 @@ class Keypoint:
 	An object representing a specific keypoint in a particular instance.
 	"""
 
+	__slots__ = ("point", "occluded", "confidence")
+
 	point: Point
 	"""
 	The point in the image where this keypoint appears.
@@ -0,0 +1,195 @@
+"""
+Lazily parsed annotations.
+
+`ImageAnnotation.from_json` builds every object in a droplet up front, even
+though many consumers only read a few of them (a detector being trained on
+bounding boxes has no use for segmentations or keypoints, for example). The
+classes in this module instead hold on to their JSON, and parse each attribute
+the first time it is read.
+
+They are subclasses of their eager counterparts with the same attributes and
+methods, and compare equal to them, so they can be used wherever those are.
+Consumers that read every attribute of every annotation should prefer the
+eager classes, as deferring each attribute has a small cost of its own.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Mapping, Optional, Sequence
+
+from ..geometry import Mask
+from ._lazy import lazy_attribute
+from .attributes import AttributeValues
+from .bounding_box import BoundingBox
+from .class_annotation import ClassAnnotation
+from .frame_annotation import FrameAnnotation
+from .image import Image
+from .image_annotation import ImageAnnotation
+from .instance import Instance
+from .keypoint import Keypoint
+from .multi_instance import MultiInstance
+from .segmentation import Segmentation
+from .video import Video
+from .video_annotation import VideoAnnotation
+
+# Each lazy attribute replaces a slot of the base class with a descriptor yielding the same type. The type checker
+# reports every such replacement as an incompatible override, so those reports are suppressed where they occur.
+
+class LazyInstance(Instance):
+	"""
+	An `Instance` whose bounding box, segmentation, keypoints and attributes are
+	parsed when they are first read.
+	"""
+
+	_json: Mapping[str, Any]
+
+	def __init__(self, json: Mapping[str, Any]):
+		# The base constructor is deliberately not called, as it requires every attribute up front.
+		self._json = json
+		self.id = json.get("id")
+
+	@lazy_attribute
+	def bounding_box(self) -> Optional[BoundingBox]: # type: ignore - replaces a slot, as above
+		return BoundingBox.from_json(self._json["boundingBox"]) if "boundingBox" in self._json else None
+
+	@lazy_attribute
+	def segmentation(self) -> Optional[Segmentation]: # type: ignore - replaces a slot, as above
+		return Segmentation.from_json(self._json["segmentation"]) if "segmentation" in self._json else None
+
+	@lazy_attribute
+	def keypoints(self) -> Optional[Mapping[str, Optional[Keypoint]]]: # type: ignore - replaces a slot, as above
+		return {
+			name: Keypoint.from_json(keypoint) if keypoint is not None else None
+			for name, keypoint in self._json["keypoints"].items()
+		} if "keypoints" in self._json else None
+
+	@lazy_attribute
+	def attributes(self) -> Optional[Mapping[str, AttributeValues]]: # type: ignore - replaces a slot, as above
+		return {
+			k: AttributeValues.from_json(v) for k, v in self._json["attributes"].items()
+		} if "attributes" in self._json else None
+
+class LazyMultiInstance(MultiInstance):
+	"""
+	A `MultiInstance` whose bounding box and segmentation are parsed when they
+	are first read.
+	"""
+
+	_json: Mapping[str, Any]
+
+	def __init__(self, json: Mapping[str, Any]):
+		self._json = json
+		self.count = json.get("count")
+
+	@lazy_attribute
+	def bounding_box(self) -> Optional[BoundingBox]: # type: ignore - replaces a slot, as above
+		return BoundingBox.from_json(self._json["boundingBox"]) if "boundingBox" in self._json else None
+
+	@lazy_attribute
+	def segmentation(self) -> Optional[Segmentation]: # type: ignore - replaces a slot, as above
+		return Segmentation.from_json(self._json["segmentation"]) if "segmentation" in self._json else None
+
+class LazyClassAnnotation(ClassAnnotation):
+	"""
+	A `ClassAnnotation` whose instances and multi-instances are created when they
+	are first read.
+	"""
+
+	_json: Mapping[str, Any]
+
+	def __init__(self, json: Mapping[str, Any]):
+		self._json = json
+
+	@lazy_attribute
+	def instances(self) -> Sequence[Instance]: # type: ignore - replaces a slot, as above
+		return [LazyInstance(instance) for instance in self._json.get("instances", [])]
+
+	@lazy_attribute
+	def multi_instances(self) -> Sequence[MultiInstance]: # type: ignore - replaces a slot, as above
+		return [LazyMultiInstance(multi_instance) for multi_instance in self._json.get("multiInstances", [])]
+
+def _lazy_classes(json: Mapping[str, Any]) -> Mapping[str, ClassAnnotation]:
+	return { class_name: LazyClassAnnotation(class_json) for class_name, class_json in json["classes"].items() }
+
+class LazyImageAnnotation(ImageAnnotation):
+	"""
+	An `ImageAnnotation` that is parsed as it is used.
+
+	```py
+	annotation = LazyImageAnnotation.from_json(droplet)
+	boxes = [
+		instance.bounding_box
+		for class_annotation in annotation.classes.values()
+		for instance in class_annotation.instances
+	] # No segmentations were parsed
+	```
+	"""
+
+	_json: Mapping[str, Any]
+
+	@staticmethod
+	def from_json(json: Mapping[str, Any]) -> LazyImageAnnotation:
+		"""
+		Constructs a `LazyImageAnnotation` from an `ImageAnnotationJson`. The JSON
+		is retained, and must not be modified afterwards.
+		"""
+		return LazyImageAnnotation(json)
+
+	def __init__(self, json: Mapping[str, Any]):
+		self._json = json
+		self.uid = json.get("uid")
+		self.metadata = json.get("metadata")
+
+	@lazy_attribute
+	def image(self) -> Image: # type: ignore - replaces a slot, as above
+		return Image.from_json(self._json["image"])
+
+	@lazy_attribute
+	def classes(self) -> Mapping[str, ClassAnnotation]: # type: ignore - replaces a slot, as above
+		return _lazy_classes(self._json)
+
+	@lazy_attribute
+	def mask(self) -> Optional[Mask]: # type: ignore - replaces a slot, as above
+		return Mask.from_json(self._json["mask"]) if "mask" in self._json else None
+
+class LazyFrameAnnotation(FrameAnnotation):
+	"""
+	A `FrameAnnotation` that is parsed as it is used.
+	"""
+
+	_json: Mapping[str, Any]
+
+	def __init__(self, json: Mapping[str, Any]):
+		self._json = json
+
+	@lazy_attribute
+	def classes(self) -> Mapping[str, ClassAnnotation]: # type: ignore - replaces a slot, as above
+		return _lazy_classes(self._json)
+
+class LazyVideoAnnotation(VideoAnnotation):
+	"""
+	A `VideoAnnotation` that is parsed as it is used.
+	"""
+
+	_json: Mapping[str, Any]
+
+	@staticmethod
+	def from_json(json: Mapping[str, Any]) -> LazyVideoAnnotation:
+		"""
+		Constructs a `LazyVideoAnnotation` from a `VideoAnnotationJson`. The JSON
+		is retained, and must not be modified afterwards.
+		"""
+		return LazyVideoAnnotation(json)
+
+	def __init__(self, json: Mapping[str, Any]):
+		self._json = json
+		self.uid = json.get("uid")
+		self.metadata = json.get("metadata")
+
+	@lazy_attribute
+	def video(self) -> Video: # type: ignore - replaces a slot, as above
+		return Video.from_json(self._json["video"])
+
+	@lazy_attribute
+	def frames(self) -> Sequence[FrameAnnotation]:
+		return [LazyFrameAnnotation(frame) for frame in self._json["frames"]]
@@ -27,6 +27,8 @@ class MultiInstance:
 	every instance would be too high.
 	"""
 
+	__slots__ = ("bounding_box", "segmentation", "count")
+
 	bounding_box: Optional[BoundingBox]
 	"""
 	The bounding box of this multi-instance.
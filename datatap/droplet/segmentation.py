@@ -22,6 +22,8 @@ class Segmentation:
 	detection, specified as a `Mask`.
 	"""
 
+	__slots__ = ("mask", "confidence")
+
 	mask: Mask
 	"""
 	The area within the image where the corresponding detection appears.
@@ -0,0 +1,308 @@
+"""
+Parsers and serializers specialized to a template.
+
+`ImageAnnotation.from_json` and `to_json` check for every optional field of
+every object they visit. When a whole split of droplets shares a template, most
+of those checks are redundant: the template already says which fields each
+instance carries. An `ImageAnnotationCodec` (or `VideoAnnotationCodec`) is
+compiled from a template into a plan of per-class parsers that only handle the
+fields the template describes, and that construct the geometry of each field
+directly. Its serializer also writes the geometry directly, but does not depend
+on the template, as `to_json` only checks which fields are set.
+
+Droplets that do not match their template exactly (for instance, an instance
+with a field its template lacks, or missing one it requires) are handled by
+the generic methods instead, so the results are always equal to theirs.
+
+```py
+codec = ImageAnnotationCodec(dataset.template)
+annotations = [codec.from_json(droplet) for droplet in droplets]
+```
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from ..geometry import Mask, Point, Polygon, Rectangle
+from ..template import ClassAnnotationTemplate, ImageAnnotationTemplate, InstanceTemplate, VideoAnnotationTemplate
+from ..utils import basic_repr
+from .attributes import AttributeValues
+from .bounding_box import BoundingBox, BoundingBoxJson
+from .class_annotation import ClassAnnotation, ClassAnnotationJson
+from .frame_annotation import FrameAnnotation
+from .image import Image
+from .image_annotation import ImageAnnotation, ImageAnnotationJson
+from .instance import Instance, InstanceJson
+from .keypoint import Keypoint
+from .multi_instance import MultiInstance
+from .segmentation import Segmentation, SegmentationJson
+from .video import Video
+from .video_annotation import VideoAnnotation, VideoAnnotationJson
+
+_ClassParser = Callable[[Mapping[str, Any]], ClassAnnotation]
+
+class ImageAnnotationCodec:
+	"""
+	Parses and serializes `ImageAnnotation`s that adhere to `template`, faster
+	than `ImageAnnotation.from_json` and `ImageAnnotation.to_json` (with which
+	its results are always equal).
+	"""
+
+	template: ImageAnnotationTemplate
+	"""
+	The template for which this codec was compiled.
+	"""
+
+	_class_parsers: Dict[str, _ClassParser]
+
+	def __init__(self, template: ImageAnnotationTemplate):
+		self.template = template
+		self._class_parsers = _compile_classes(template.classes)
+
+	def from_json(self, json: Mapping[str, Any]) -> ImageAnnotation:
+		"""
+		Parses an `ImageAnnotationJson`, as in `ImageAnnotation.from_json`.
+		"""
+		return ImageAnnotation(
+			image = Image.from_json(json["image"]),
+			classes = _parse_classes(self._class_parsers, json["classes"]),
+			mask = Mask.from_json(json["mask"]) if "mask" in json else None,
+			uid = json.get("uid"),
+			metadata = json.get("metadata")
+		)
+
+	def to_json(self, annotation: ImageAnnotation) -> ImageAnnotationJson:
+		"""
+		Serializes an `ImageAnnotation`, as in `ImageAnnotation.to_json`.
+		"""
+		json: ImageAnnotationJson = {
+			"kind": "ImageAnnotation",
+			"image": annotation.image.to_json(),
+			"classes": { name: _serialize_class(class_annotation) for name, class_annotation in annotation.classes.items() }
+		}
+
+		if annotation.mask is not None:
+			json["mask"] = annotation.mask.to_json()
+
+		if annotation.uid is not None:
+			json["uid"] = annotation.uid
+
+		if annotation.metadata is not None:
+			json["metadata"] = annotation.metadata
+
+		return json
+
+	def __getstate__(self) -> Dict[str, Any]:
+		# The compiled plan is made of closures, which cannot be pickled, so it is recompiled instead.
+		return { "template": self.template }
+
+	def __setstate__(self, state: Dict[str, Any]) -> None:
+		self.__init__(state["template"])
+
+	def __repr__(self) -> str:
+		return basic_repr("ImageAnnotationCodec", classes = list(self.template.classes))
+
+class VideoAnnotationCodec:
+	"""
+	Parses and serializes `VideoAnnotation`s that adhere to `template`, as
+	`ImageAnnotationCodec` does for images.
+	"""
+
+	template: VideoAnnotationTemplate
+	"""
+	The template for which this codec was compiled.
+	"""
+
+	_class_parsers: Dict[str, _ClassParser]
+
+	def __init__(self, template: VideoAnnotationTemplate):
+		self.template = template
+		self._class_parsers = _compile_classes(template.frames.classes)
+
+	def from_json(self, json: Mapping[str, Any]) -> VideoAnnotation:
+		"""
+		Parses a `VideoAnnotationJson`, as in `VideoAnnotation.from_json`.
+		"""
+		return VideoAnnotation(
+			video = Video.from_json(json["video"]),
+			frames = [
+				FrameAnnotation(classes = _parse_classes(self._class_parsers, frame["classes"]))
+				for frame in json["frames"]
+			],
+			uid = json.get("uid"),
+			metadata = json.get("metadata")
+		)
+
+	def to_json(self, annotation: VideoAnnotation) -> VideoAnnotationJson:
+		"""
+		Serializes a `VideoAnnotation`, as in `VideoAnnotation.to_json`.
+		"""
+		json: VideoAnnotationJson = {
+			"kind": "VideoAnnotation",
+			"video": annotation.video.to_json(),
+			"frames": [
+				{ "classes": { name: _serialize_class(class_annotation) for name, class_annotation in frame.classes.items() } }
+				for frame in annotation.frames
+			]
+		}
+
+		if annotation.uid is not None:
+			json["uid"] = annotation.uid
+
+		if annotation.metadata is not None:
+			json["metadata"] = annotation.metadata
+
+		return json
+
+	def __getstate__(self) -> Dict[str, Any]:
+		# The compiled plan is made of closures, which cannot be pickled, so it is recompiled instead.
+		return { "template": self.template }
+
+	def __setstate__(self, state: Dict[str, Any]) -> None:
+		self.__init__(state["template"])
+
+	def __repr__(self) -> str:
+		return basic_repr("VideoAnnotationCodec", classes = list(self.template.frames.classes))
+
+def _parse_classes(class_parsers: Mapping[str, _ClassParser], json: Mapping[str, Any]) -> Dict[str, ClassAnnotation]:
+	classes: Dict[str, ClassAnnotation] = {}
+	for class_name, class_json in json.items():
+		parse = class_parsers.get(class_name)
+		classes[class_name] = parse(class_json) if parse is not None else ClassAnnotation.from_json(class_json)
+	return classes
+
+def _compile_classes(templates: Mapping[str, ClassAnnotationTemplate]) -> Dict[str, _ClassParser]:
+	return {
+		class_name: _compile_class(class_template)
+		for class_name, class_template in templates.items()
+		if class_template.instances is not None
+	}
+
+def _compile_class(template: ClassAnnotationTemplate) -> _ClassParser:
+	assert template.instances is not None
+	parse_instance = _compile_instance(template.instances)
+
+	def parse(json: Mapping[str, Any]) -> ClassAnnotation:
+		return ClassAnnotation(
+			instances = [parse_instance(instance) for instance in json["instances"]] if "instances" in json else [],
+			multi_instances = [MultiInstance.from_json(multi_instance) for multi_instance in json["multiInstances"]] if "multiInstances" in json else []
+		)
+
+	return parse
+
+def _compile_instance(template: InstanceTemplate) -> Callable[[Mapping[str, Any]], Instance]:
+	"""
+	Compiles the parser of instances adhering to `template`. Each field is
+	either always parsed or never parsed, according to the template, so the
+	per-instance work is only that of the fields present.
+	"""
+	has_id = template.id
+	has_box = template.bounding_box
+	has_segmentation = template.segmentation
+	has_keypoints = len(template.keypoints) > 0
+	has_attributes = len(template.attributes) > 0
+	# An instance matches the template exactly if it has this many fields, and each of those in the template.
+	field_count = has_id + has_box + has_segmentation + has_keypoints + has_attributes
+
+	def parse(json: Mapping[str, Any]) -> Instance:
+		if len(json) != field_count:
+			return Instance.from_json(json) # type: ignore - the JSON is not known to be an `InstanceJson`
+
+		try:
+			return Instance(
+				id = json["id"] if has_id else None,
+				bounding_box = _parse_bounding_box(json["boundingBox"]) if has_box else None,
+				segmentation = _parse_segmentation(json["segmentation"]) if has_segmentation else None,
+				keypoints = {
+					name: _parse_keypoint(keypoint) for name, keypoint in json["keypoints"].items()
+				} if has_keypoints else None,
+				attributes = {
+					k: AttributeValues.from_json(v) for k, v in json["attributes"].items()
+				} if has_attributes else None
+			)
+		except (KeyError, ValueError, TypeError):
+			# A field is missing, or its geometry is malformed; the generic parser raises the usual error for the latter.
+			return Instance.from_json(json) # type: ignore - as above
+
+	return parse
+
+def _serialize_class(class_annotation: ClassAnnotation) -> ClassAnnotationJson:
+	return {
+		"instances": [_serialize_instance(instance) for instance in class_annotation.instances],
+		"multiInstances": [multi_instance.to_json() for multi_instance in class_annotation.multi_instances]
+	}
+
+def _serialize_instance(instance: Instance) -> InstanceJson:
+	json: InstanceJson = {}
+
+	if instance.id is not None:
+		json["id"] = instance.id
+
+	bounding_box = instance.bounding_box
+	if bounding_box is not None:
+		json["boundingBox"] = _serialize_bounding_box(bounding_box)
+
+	segmentation = instance.segmentation
+	if segmentation is not None:
+		json["segmentation"] = _serialize_segmentation(segmentation)
+
+	if instance.keypoints is not None:
+		json["keypoints"] = {
+			name: keypoint.to_json() if keypoint is not None else None
+			for name, keypoint in instance.keypoints.items()
+		}
+
+	if instance.attributes is not None:
+		json["attributes"] = { k: v.to_json() for k, v in instance.attributes.items() }
+
+	return json
+
+# The geometry is constructed directly, rather than through each class' `from_json`. In particular, the coordinates are
+# validated all at once, instead of by each `Point.assert_valid`; if they are invalid, the generic parser is used to
+# raise the usual error.
+
+def _parse_bounding_box(json: Mapping[str, Any]) -> BoundingBox:
+	(x1, y1), (x2, y2) = json["rectangle"]
+	if not (0 <= x1 < x2 <= 1 and 0 <= y1 < y2 <= 1):
+		return BoundingBox.from_json(json) # type: ignore - the JSON is not known to be a `BoundingBoxJson`
+
+	# The constructor would validate the rectangle again
+	bounding_box = BoundingBox.__new__(BoundingBox)
+	bounding_box.rectangle = Rectangle(Point(x1, y1), Point(x2, y2))
+	bounding_box.confidence = json.get("confidence")
+	return bounding_box
+
+def _parse_segmentation(json: Mapping[str, Any]) -> Segmentation:
+	mask_json = json["mask"]
+	for polygon in mask_json:
+		for x, y in polygon:
+			if not (0 <= x <= 1 and 0 <= y <= 1):
+				return Segmentation.from_json(json) # type: ignore - the JSON is not known to be a `SegmentationJson`
+
+	# The constructor would validate the mask again
+	segmentation = Segmentation.__new__(Segmentation)
+	segmentation.mask = Mask([Polygon([Point(x, y) for x, y in polygon]) for polygon in mask_json])
+	segmentation.confidence = json.get("confidence")
+	return segmentation
+
+def _parse_keypoint(json: Optional[Mapping[str, Any]]) -> Optional[Keypoint]:
+	if json is None:
+		return None
+	x, y = json["point"]
+	return Keypoint(Point(x, y), occluded = json.get("occluded"), confidence = json.get("confidence"))
+
+def _serialize_bounding_box(bounding_box: BoundingBox) -> BoundingBoxJson:
+	p1, p2 = bounding_box.rectangle.p1, bounding_box.rectangle.p2
+	json: BoundingBoxJson = { "rectangle": ((p1.x, p1.y), (p2.x, p2.y)) }
+	if bounding_box.confidence is not None:
+		json["confidence"] = bounding_box.confidence
+	return json
+
+def _serialize_segmentation(segmentation: Segmentation) -> SegmentationJson:
+	json: SegmentationJson = {
+		"mask": [[(point.x, point.y) for point in polygon.points] for polygon in segmentation.mask.polygons]
+	}
+	if segmentation.confidence is not None:
+		json["confidence"] = segmentation.confidence
+	return json
@@ -25,6 +25,8 @@ class Video:
 	for loading and manipulating Videos.
 	"""
 
+	__slots__ = ("uid", "paths", "frames")
+
 	uid: Optional[str]
 	"""
 	A unique ID for this Video.
@@ -29,6 +29,8 @@ class VideoAnnotation:
 	A collection of class annotations that annotate a given image.
 	"""
 
+	__slots__ = ("video", "frames", "uid", "metadata")
+
 	video: Video
 	"""
 	The video being annotated.
@@ -18,6 +18,8 @@ class Mask:
 	point is contained by the mask.
 	"""
 
+	__slots__ = ("polygons",)
+
 	polygons: Sequence[Polygon]
 	"""
 	The constituent polygons of this `Mask`.
@@ -11,6 +11,8 @@ class Point:
 	A point in 2D space.  Also often used to represent a 2D vector.
 	"""
 
+	__slots__ = ("x", "y")
+
 	x: float
 	"""
 	The x-coordinate of the point.
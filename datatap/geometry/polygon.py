@@ -12,6 +12,8 @@ class Polygon:
 	A polygon in 2D space.
 	"""
 
+	__slots__ = ("points",)
+
 	points: Sequence[Point]
 	"""
 	The vertices of this polygon.
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
-from shapely.geometry import box, Polygon as ShapelyPolygon
-from typing import Sequence, Tuple, Union
+from typing import TYPE_CHECKING, Sequence, Tuple, Union
 
 from .point import Point, PointJson
 from ..utils import basic_repr
 
+if TYPE_CHECKING:
+	from shapely.geometry import Polygon as ShapelyPolygon
+
 RectangleJson = Tuple[PointJson, PointJson]
 
 class Rectangle:
@@ -13,6 +15,8 @@ class Rectangle:
 	An axis-aligned rectangle in 2D space.
 	"""
 
+	__slots__ = ("p1", "p2")
+
 	p1: Point
 	"""
 	The top-left corner of the rectangle.
@@ -69,6 +73,8 @@ class Rectangle:
 		"""
 		Converts this rectangle into a `Shapely.Polygon`.
 		"""
+		# `shapely` (and with it, `numpy`) is slow to import, so it is only imported when needed.
+		from shapely.geometry import box
 		return box(self.p1.x, self.p1.y, self.p2.x, self.p2.y)
 
 	def to_xywh_tuple(self) -> Tuple[float, float, float, float]:
@@ -5,12 +5,15 @@ import requests
 import functools
 from typing import Dict, Optional
 
+import numpy as np
+
 try:
     import tensorflow as tf
 except ImportError:
     tf = {}
 
 from datatap.api.entities import Dataset
+from datatap.droplet import DropletDecoder
 
 def _get_class_mapping(dataset: Dataset, class_mapping: Optional[Dict[str, int]] = None):
     classes_used = dataset.template.classes.keys()
@@ -47,26 +50,21 @@ def create_dataset(
     using `create_tf_multi_worker_dataset` instead.
     """
     class_mapping = _get_class_mapping(dataset, input_class_mapping)
+    decoder = DropletDecoder(class_mapping)
 
     def gen():
         worker_id = input_context.input_pipeline_id if input_context is not None else 0
         num_workers = input_context.num_input_pipelines if input_context is not None else 1
 
-        for droplet in dataset.stream_split(split, worker_id, num_workers):
-            image_url = tf.constant(droplet.image.paths[0])
-
-            bounding_boxes = tf.stack([
-                tf.constant(i.bounding_box.rectangle.to_xywh_tuple(), shape=(4,), dtype=tf.float64)
-                for cls in droplet.classes.keys()
-                for i in droplet.classes[cls].instances
-                if i.bounding_box is not None
-            ])
-
-            labels = tf.stack([
-                tf.constant(class_mapping[cls], dtype=tf.int32)
-                for cls in droplet.classes.keys()
-                for _ in droplet.classes[cls].instances
-            ])
+        for droplet in dataset.stream_split_droplets(split, worker_id, num_workers):
+            arrays = decoder(droplet)
+            assert arrays.boxes is not None
+            image_url = tf.constant(arrays.image_paths[0])
+
+            has_box = ~np.isnan(arrays.boxes[:, 0])
+            xyxy = arrays.boxes[has_box].astype(np.float64)
+            bounding_boxes = tf.constant(np.concatenate([xyxy[:, :2], xyxy[:, 2:] - xyxy[:, :2]], axis = 1))
+            labels = tf.constant(arrays.labels[has_box].astype(np.int32))
 
             yield (image_url, bounding_boxes, labels)
 
@@ -2,12 +2,13 @@ from __future__ import annotations
 
 from typing import Any, Callable, Dict, Iterator, List, Optional, Union, overload
 
+import numpy as np
 import torch
 import PIL.Image
 import torchvision.transforms.functional as TF
 from torch.utils.data import IterableDataset as TorchIterableDataset, get_worker_info # type: ignore
 
-from datatap.droplet import ImageAnnotation
+from datatap.droplet import DropletDecoder, ImageAnnotation, LazyImageAnnotation
 from datatap.api.entities import Dataset
 
 class DatasetElement():
@@ -105,6 +106,7 @@ class IterableDataset(TorchIterableDataset[DatasetElement]):
     _split: str
     _class_mapping: Dict[str, int]
     _class_names: Dict[int, str]
+    _decoder: DropletDecoder
     _device: torch.device
 
     def __init__(
@@ -141,44 +143,36 @@ class IterableDataset(TorchIterableDataset[DatasetElement]):
             for cls, i in self._class_mapping.items()
         }
 
+        self._decoder = DropletDecoder(self._class_mapping)
+
     def _get_generator(self):
         worker_info: Optional[Any] = get_worker_info()
 
         if worker_info is None:
-            return self._dataset.stream_split(self._split, 0, 1)
+            return self._dataset.stream_split_droplets(self._split, 0, 1)
         else:
             num_workers: int = worker_info.num_workers
             worker_id: int = worker_info.id
 
-            return self._dataset.stream_split(self._split, worker_id, num_workers)
+            return self._dataset.stream_split_droplets(self._split, worker_id, num_workers)
 
     def __iter__(self) -> Iterator[DatasetElement]:
-        for annotation in self._get_generator():
+        for droplet in self._get_generator():
+            # The boxes and labels are decoded straight from the droplet; the rest of the annotation is only
+            # parsed if it is used.
+            annotation = LazyImageAnnotation.from_json(droplet)
+            arrays = self._decoder(droplet)
+            assert arrays.boxes is not None
+
             img = annotation.image.get_pil_image(True).convert("RGB")
             transformed_img = self._image_transform(img).to(self._device)
             h, w = transformed_img.shape[-2:]
 
-            instance_boxes = [
-                (
-                    instance.bounding_box.rectangle.p1.x * w,
-                    instance.bounding_box.rectangle.p1.y * h,
-                    instance.bounding_box.rectangle.p2.x * w,
-                    instance.bounding_box.rectangle.p2.y * h,
-                )
-                for class_name in annotation.classes.keys()
-                for instance in annotation.classes[class_name].instances
-                if instance.bounding_box is not None
-            ]
-
-            instance_labels = [
-                self._class_mapping[class_name]
-                for class_name in annotation.classes.keys()
-                for _ in annotation.classes[class_name].instances
-                if class_name in self._class_mapping
-            ]
-
-            target = torch.tensor(instance_boxes).reshape((-1, 4)).to(self._device)
-            labels = torch.tensor(instance_labels, dtype = torch.int64).to(self._device)
+            has_box = ~np.isnan(arrays.boxes[:, 0])
+            instance_boxes = arrays.boxes[has_box] * np.array([w, h, w, h], dtype = np.float32)
+
+            target = torch.from_numpy(instance_boxes).to(self._device)
+            labels = torch.from_numpy(arrays.labels[has_box]).to(self._device)
 
             element = DatasetElement(annotation, transformed_img, target, labels)
 
@@ -3,21 +3,36 @@ A collection of primarily internal-use utilities.
 """
 
 from .environment import Environment
-from .helpers import assert_one, timer, DeletableGenerator
-from .cache_generator import CacheGenerator
+from .helpers import assert_one, map_concurrently, timer, DeletableGenerator
+from .file_lock import FileLock
 from .or_nullish import OrNullish
 from .print_helpers import basic_repr, color_repr, force_pretty_print, pprint, pprints
+from .retry import CircuitBreaker, CircuitOpenError, HttpError, RetryPolicy, resumable_stream
+from .histogram import Histogram
+from .json_backend import JsonBackend, get_json_backend, json_backend
+from .lazy import lazy_exports
 
 __all__ = [
 	"Environment",
 	"assert_one",
+	"map_concurrently",
 	"timer",
 	"DeletableGenerator",
-	"CacheGenerator",
+	"FileLock",
 	"OrNullish",
 	"basic_repr",
 	"color_repr",
 	"force_pretty_print",
 	"pprint",
-	"pprints"
+	"pprints",
+	"CircuitBreaker",
+	"CircuitOpenError",
+	"HttpError",
+	"RetryPolicy",
+	"resumable_stream",
+	"Histogram",
+	"JsonBackend",
+	"get_json_backend",
+	"json_backend",
+	"lazy_exports",
 ]
@@ -16,3 +16,57 @@ class Environment:
 	The base URI used for referencing the dataTap application, e.g. for API
 	calls. One might change this to use an HTTP proxy, for example.
 	"""
+
+	CACHE_DIR = os.getenv(
+		"DATATAP_CACHE_DIR",
+		os.path.join(os.getenv("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")), "datatap")
+	)
+	"""
+	The directory in which streamed dataset splits are cached. This defaults to
+	`~/.cache/datatap`.
+	"""
+
+	CACHE_FORMAT = os.getenv("DATATAP_CACHE_FORMAT", "json")
+	"""
+	The layout in which streamed dataset splits are cached, either `json` or
+	`msgpack` (which requires the `msgpack` package).
+	"""
+
+	CACHE_COMPRESSION = os.getenv("DATATAP_CACHE_COMPRESSION")
+	"""
+	How streamed dataset splits are compressed in the cache, as a codec
+	optionally followed by a compression level (e.g. `zstd`, `zstd:9` or
+	`gzip`). By default, cached splits are not compressed.
+	"""
+
+	CACHE_MAX_SIZE = os.getenv("DATATAP_CACHE_MAX_SIZE")
+	"""
+	The size (e.g. `50G`) beyond which the least recently used dataset splits
+	are evicted from the cache. By default, the cache's size is unbounded.
+	"""
+
+	METADATA_TTL = float(os.getenv("DATATAP_METADATA_TTL", "60"))
+	"""
+	The number of seconds for which mutable API metadata (such as tags and
+	repository lists) is cached before being fetched again. Immutable metadata
+	(such as dataset versions) is cached indefinitely.
+	"""
+
+	METADATA_CACHE_DIR = os.getenv("DATATAP_METADATA_CACHE_DIR")
+	"""
+	The directory in which API metadata is persisted, so that it is shared
+	between processes and available offline. By default, metadata is only
+	cached in memory.
+	"""
+
+	OFFLINE = os.getenv("DATATAP_OFFLINE", "").lower() in ("1", "true", "yes")
+	"""
+	Whether the API should be used offline, serving everything from the local
+	caches. See `datatap.api.entities.Api`.
+	"""
+
+	JSON_BACKEND = os.getenv("DATATAP_JSON_BACKEND") or None
+	"""
+	The library used to encode and decode JSON, either `orjson`, `msgspec` or
+	`json`. By default, the fastest one installed is used.
+	"""
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+from types import TracebackType
+from typing import Optional, Type
+
+# The platform is checked (rather than whether each module imports) so that pyright knows which one is available.
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+class FileLock:
+    """
+    An advisory lock that is shared between processes via a lock file.
+
+    Locks are held per `FileLock` object, so two `FileLock`s on the same path
+    will exclude one another even within a single process.
+
+    ```py
+    with FileLock("/tmp/my-resource.lock"):
+        ...
+    ```
+    """
+
+    path: str
+    """
+    The path of the lock file.
+    """
+
+    _fd: Optional[int]
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+
+    @property
+    def locked(self) -> bool:
+        """
+        Whether this object currently holds the lock.
+        """
+        return self._fd is not None
+
+    def acquire(self, blocking: bool = True, shared: bool = False) -> bool:
+        """
+        Acquires the lock, returning whether it was acquired. If `blocking` is
+        `False`, this returns `False` immediately when the lock is held
+        elsewhere. If `shared` is `True`, any number of shared holders may hold
+        the lock at once, but they exclude exclusive holders (shared locks are
+        treated as exclusive on platforms that lack them).
+        """
+        if self._fd is not None:
+            raise RuntimeError(f"Lock {self.path} is already held")
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if sys.platform == "win32":
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        if not blocking:
+                            os.close(fd)
+                            return False
+                        time.sleep(0.05)
+            else:
+                flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+                try:
+                    fcntl.flock(fd, flags if blocking else flags | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    os.close(fd)
+                    return False
+        except BaseException:
+            os.close(fd)
+            raise
+
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        """
+        Releases the lock if it is held.
+        """
+        fd = self._fd
+        if fd is None:
+            return
+
+        self._fd = None
+        if sys.platform == "win32":
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def __enter__(self) -> FileLock:
+        self.acquire()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType]
+    ) -> None:
+        self.release()
@@ -1,6 +1,6 @@
 import time
 from types import TracebackType
-from typing import Dict, List, Callable, Generator, Optional, Tuple, TypeVar
+from typing import Dict, Iterable, List, Callable, Generator, Optional, Tuple, TypeVar, Union
 from contextlib import contextmanager
 
 from .print_helpers import pprint
@@ -47,6 +47,30 @@ def assert_one(item_list: List[_T]) -> _T:
     return item_list[0]
 
 
+def map_concurrently(function: Callable[[_T], _U], items: Iterable[_T], *, max_workers: int = 16) -> List[Union[_U, Exception]]:
+    """
+    Calls `function` on each of `items` from a pool of at most `max_workers`
+    threads, and returns the results in the same order as `items`. If a call
+    raises an exception, the exception is returned in place of its result, so
+    that one failure does not discard the others.
+    """
+    def call(item: _T) -> Union[_U, Exception]:
+        try:
+            return function(item)
+        except Exception as e:
+            return e
+
+    items = list(items)
+    if len(items) <= 1 or max_workers <= 1:
+        return [call(item) for item in items]
+
+    # `concurrent.futures` is slow to import, so it is only imported when needed.
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(min(max_workers, len(items))) as executor:
+        return list(executor.map(call, items))
+
+
 _timer_state: Dict[str, Tuple[float, int]] = {}
 @contextmanager
 def timer(name: str):
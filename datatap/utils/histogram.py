@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import math
+import threading
+from typing import Any, Dict, Optional
+
+from .print_helpers import basic_repr
+
+class Histogram:
+    """
+    A histogram of positive values (such as latencies), with logarithmically
+    sized buckets. Each bucket is `growth` times wider than the last, so
+    quantiles are estimated to within a constant relative error however widely
+    the values are spread, using a small, fixed amount of memory.
+
+    Values no greater than `min_value` share the first bucket.
+    """
+
+    min_value: float
+    """
+    The upper bound of the first bucket.
+    """
+
+    growth: float
+    """
+    The ratio between the bounds of consecutive buckets.
+    """
+
+    count: int
+    """
+    The number of values recorded.
+    """
+
+    total: float
+    """
+    The sum of the values recorded.
+    """
+
+    min: Optional[float]
+    """
+    The smallest value recorded.
+    """
+
+    max: Optional[float]
+    """
+    The largest value recorded.
+    """
+
+    _buckets: Dict[int, int]
+    _lock: threading.Lock
+
+    def __init__(self, *, min_value: float = 1e-6, growth: float = 1.1):
+        self.min_value = min_value
+        self.growth = growth
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @property
+    def mean(self) -> Optional[float]:
+        """
+        The mean of the values recorded.
+        """
+        return self.total / self.count if self.count > 0 else None
+
+    def record(self, value: float) -> None:
+        """
+        Records a value.
+        """
+        bucket = self._get_bucket(value)
+        with self._lock:
+            self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+            self.count += 1
+            self.total += value
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimates the `q`th quantile (for `q` between zero and one) of the values
+        recorded.
+        """
+        with self._lock:
+            if self.count == 0:
+                return None
+            assert self.min is not None and self.max is not None
+
+            rank = q * (self.count - 1)
+            if rank <= 0:
+                return self.min
+            if rank >= self.count - 1:
+                return self.max
+
+            seen = 0
+            for bucket in sorted(self._buckets):
+                seen += self._buckets[bucket]
+                if seen > rank:
+                    # The geometric midpoint of the bucket, which is never off by more than a factor of
+                    # `sqrt(growth)` from the values in it.
+                    estimate = self.min_value * self.growth ** (bucket - 0.5) if bucket > 0 else self.min_value
+                    return min(max(estimate, self.min), self.max)
+            return self.max
+
+    def merge(self, other: Histogram) -> None:
+        """
+        Adds the values recorded by `other`, which must have the same buckets.
+        """
+        if (other.min_value, other.growth) != (self.min_value, self.growth):
+            raise ValueError("Cannot merge histograms with different buckets")
+
+        with other._lock:
+            buckets = dict(other._buckets)
+            count, total, other_min, other_max = other.count, other.total, other.min, other.max
+
+        with self._lock:
+            for bucket, bucket_count in buckets.items():
+                self._buckets[bucket] = self._buckets.get(bucket, 0) + bucket_count
+            self.count += count
+            self.total += total
+            if other_min is not None:
+                self.min = other_min if self.min is None else min(self.min, other_min)
+            if other_max is not None:
+                self.max = other_max if self.max is None else max(self.max, other_max)
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """
+        Returns the count, mean, extremes and common quantiles of the values
+        recorded.
+        """
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+    def _get_bucket(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        return max(math.ceil(math.log(value / self.min_value, self.growth)), 1)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return basic_repr("Histogram", count = self.count, mean = self.mean, min = self.min, max = self.max)
@@ -0,0 +1,107 @@
+"""
+Fast JSON encoding and decoding.
+
+Splits are transferred and cached as JSON, so parsing it is often the most
+expensive part of reading one. If `orjson` (available with the `datatap[cache]`
+extra) or `msgspec` is installed, it is used in place of the standard library's
+`json` module, which is several times slower. A particular backend
+can be selected by setting `DATATAP_JSON_BACKEND` to `orjson`, `msgspec` or
+`json`.
+
+All backends decode from `bytes` (or `str`), and encode to compact UTF-8
+`bytes`.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Dict, Optional, Union
+
+from .environment import Environment
+from .print_helpers import basic_repr
+
+class JsonBackend:
+    """
+    A JSON implementation.
+    """
+
+    name: str
+    """
+    The name of this backend, as accepted by `get_json_backend`.
+    """
+
+    loads: Callable[[Union[bytes, str]], Any]
+    """
+    Decodes a JSON document.
+    """
+
+    dumps: Callable[[Any], bytes]
+    """
+    Encodes a value as a compact JSON document.
+    """
+
+    def __init__(self, name: str, loads: Callable[[Union[bytes, str]], Any], dumps: Callable[[Any], bytes]):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+    def __repr__(self) -> str:
+        return basic_repr("JsonBackend", self.name)
+
+def _stdlib_dumps(value: Any) -> bytes:
+    return json.dumps(value, separators = (",", ":")).encode("utf-8")
+
+# Backends are only imported once they are asked for, as some (`msgspec` in particular) are slow to import.
+def _load_orjson() -> Optional[JsonBackend]:
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return JsonBackend("orjson", orjson.loads, orjson.dumps)
+
+def _load_msgspec() -> Optional[JsonBackend]:
+    try:
+        import msgspec
+    except ImportError:
+        return None
+    return JsonBackend("msgspec", msgspec.json.decode, msgspec.json.encode)
+
+def _load_json() -> Optional[JsonBackend]:
+    return JsonBackend("json", json.loads, _stdlib_dumps)
+
+# From fastest to slowest.
+_BACKEND_LOADERS: Dict[str, Callable[[], Optional[JsonBackend]]] = {
+    "orjson": _load_orjson,
+    "msgspec": _load_msgspec,
+    "json": _load_json,
+}
+
+_backends: Dict[str, Optional[JsonBackend]] = {}
+
+def _load_backend(name: str) -> Optional[JsonBackend]:
+    if name not in _backends:
+        _backends[name] = _BACKEND_LOADERS[name]()
+    return _backends[name]
+
+def get_json_backend(name: Optional[str] = None) -> JsonBackend:
+    """
+    Returns the JSON backend with the given name. If no name is given, returns
+    the fastest available backend.
+    """
+    if name is None:
+        for candidate in _BACKEND_LOADERS:
+            backend = _load_backend(candidate)
+            if backend is not None:
+                return backend
+    if name not in _BACKEND_LOADERS:
+        raise ValueError(f"Unknown JSON backend {repr(name)}; expected one of orjson, msgspec, json")
+
+    backend = _load_backend(name)
+    if backend is None:
+        raise ImportError(f"The {name} JSON backend requires the `{name}` package")
+    return backend
+
+json_backend = get_json_backend(Environment.JSON_BACKEND)
+"""
+The JSON backend used throughout this library.
+"""
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from importlib import import_module
+from typing import Any, Callable, Dict, List, Tuple
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Returns a `__getattr__` and a `__dir__` for the module `package`, which
+    import each of its `exports` when it is first accessed, rather than when
+    `package` is imported.
+
+    `exports` maps each name to the module that defines it, relative to
+    `package`. A name that matches the last component of its module (such as
+    `"cache": ".cache"`) refers to that module itself.
+
+    ```py
+    __getattr__, __dir__ = lazy_exports(__name__, { "Api": ".api.entities" })
+    ```
+    """
+    namespace = import_module(package).__dict__
+
+    def __getattr__(name: str) -> Any:
+        if name not in exports:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+
+        module = import_module(exports[name], package)
+        value = module if exports[name].rsplit(".", 1)[-1] == name else getattr(module, name)
+        # Once imported, the name is found without calling `__getattr__` again.
+        namespace[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(exports))
+
+    return __getattr__, __dir__
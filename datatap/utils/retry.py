@@ -0,0 +1,462 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Generator, Iterable, Optional, Tuple, Type, TypeVar
+
+from .print_helpers import basic_repr
+
+_T = TypeVar("_T")
+
+class HttpError(Exception):
+    """
+    Raised when a server responds with an error status.
+    """
+
+    status: int
+    """
+    The status code of the response.
+    """
+
+    retry_after: Optional[float]
+    """
+    The number of seconds the server asked us to wait before retrying (with a
+    `Retry-After` header), if any.
+    """
+
+    def __init__(self, message: str, *, status: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of making a request to a host whose circuit is open (see
+    `CircuitBreaker`).
+    """
+
+    host: str
+    """
+    The host whose circuit is open.
+    """
+
+    retry_after: Optional[float]
+    """
+    The number of seconds until the circuit lets a request through again, if
+    known.
+    """
+
+    def __init__(self, host: str, retry_after: Optional[float] = None):
+        super().__init__(f"Too many requests to {host} have failed; not retrying yet")
+        self.host = host
+        self.retry_after = retry_after
+
+class _Circuit:
+    failures: int
+    opened_at: Optional[float]
+    probing: bool
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+class CircuitBreaker:
+    """
+    Tracks the health of each host that requests are made to.
+
+    Once `failure_threshold` consecutive requests to a host have failed, its
+    circuit opens, and further requests to it fail immediately with a
+    `CircuitOpenError` (rather than adding to the load of a struggling server).
+    After `reset_timeout` seconds, a single request is let through: if it
+    succeeds the circuit closes again, and otherwise it stays open for another
+    `reset_timeout` seconds.
+    """
+
+    failure_threshold: int
+    """
+    The number of consecutive failures after which a host's circuit opens.
+    """
+
+    reset_timeout: float
+    """
+    The number of seconds for which a circuit stays open.
+    """
+
+    _circuits: Dict[str, _Circuit]
+    _lock: threading.Lock
+
+    def __init__(self, *, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def is_open(self, host: str) -> bool:
+        """
+        Returns whether requests to `host` are currently being refused.
+        """
+        with self._lock:
+            circuit = self._circuits.get(host)
+            return circuit is not None and circuit.opened_at is not None
+
+    def before_request(self, host: str) -> bool:
+        """
+        Raises a `CircuitOpenError` if a request to `host` should not be made.
+        Returns whether the request is the single one let through an open
+        circuit, in which case `end_probe` must be called once it completes.
+        """
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None or circuit.opened_at is None:
+                return False
+
+            remaining = circuit.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(host, remaining)
+            if circuit.probing:
+                raise CircuitOpenError(host)
+            circuit.probing = True
+            return True
+
+    def end_probe(self, host: str) -> None:
+        """
+        Records that the request let through the open circuit of `host` has
+        completed, however it did (even if it was interrupted before its outcome
+        could be recorded), so that another may be let through.
+        """
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is not None:
+                circuit.probing = False
+
+    def record_success(self, host: str) -> None:
+        """
+        Records that a request to `host` succeeded, closing its circuit.
+        """
+        with self._lock:
+            self._circuits.pop(host, None)
+
+    def record_failure(self, host: str) -> None:
+        """
+        Records that a request to `host` failed.
+        """
+        with self._lock:
+            circuit = self._circuits.setdefault(host, _Circuit())
+            circuit.failures += 1
+            circuit.probing = False
+            if circuit.failures >= self.failure_threshold:
+                circuit.opened_at = time.monotonic()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Circuits are timed with a monotonic clock, which is not comparable across
+        # machines, so they are not carried along.
+        state = self.__dict__.copy()
+        state["_circuits"] = {}
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return basic_repr("CircuitBreaker", failure_threshold = self.failure_threshold, reset_timeout = self.reset_timeout)
+
+class RetryPolicy:
+    """
+    Determines when (and how soon) a failed request is retried.
+
+    A request is retried if it raised an `HttpError` whose status is one of
+    `retry_statuses`, or any other exception in `retry_on`. Retries are delayed
+    with exponential backoff: the `n`th retry waits up to `backoff * 2 ** n`
+    seconds (but no more than `max_backoff`), less a random `jitter` fraction,
+    so that clients that failed together do not all retry together. If the
+    server sent a `Retry-After` header, it is waited for instead.
+
+    A request is attempted at most `max_attempts` times, and is not retried
+    once `max_elapsed` seconds have passed since it was first attempted.
+
+    ```py
+    Api(session_pool = SessionPool(retry_policy = RetryPolicy(max_attempts = 10, max_elapsed = 600)))
+    ```
+    """
+
+    max_attempts: int
+    """
+    The maximum number of times a request is attempted.
+    """
+
+    backoff: float
+    """
+    The number of seconds waited before the first retry.
+    """
+
+    max_backoff: float
+    """
+    The maximum number of seconds waited before any retry (unless the server
+    asked for longer with a `Retry-After` header).
+    """
+
+    jitter: float
+    """
+    The largest fraction of each delay that is randomly skipped. With a
+    `jitter` of one, delays are chosen uniformly between zero and their full
+    length.
+    """
+
+    max_elapsed: Optional[float]
+    """
+    The number of seconds after which a request is no longer retried, if any.
+    """
+
+    retry_statuses: Tuple[int, ...]
+    """
+    The response statuses upon which a request is retried.
+    """
+
+    retry_on: Tuple[Type[BaseException], ...]
+    """
+    The exceptions (other than `HttpError`s) upon which a request is retried.
+    Note that the exceptions raised by `requests` are `OSError`s.
+    """
+
+    respect_retry_after: bool
+    """
+    Whether the delay requested by a server's `Retry-After` header is observed.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_attempts: int = 5,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        jitter: float = 1.0,
+        max_elapsed: Optional[float] = 120.0,
+        retry_statuses: Tuple[int, ...] = (408, 425, 429, 500, 502, 503, 504),
+        retry_on: Tuple[Type[BaseException], ...] = (OSError,),
+        respect_retry_after: bool = True
+    ):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.max_elapsed = max_elapsed
+        self.retry_statuses = retry_statuses
+        self.retry_on = retry_on
+        self.respect_retry_after = respect_retry_after
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """
+        Returns whether a request that raised `error` may be retried.
+        """
+        if isinstance(error, CircuitOpenError):
+            return True
+        if isinstance(error, HttpError):
+            return error.status in self.retry_statuses
+        return isinstance(error, self.retry_on)
+
+    def get_delay(self, retry: int, retry_after: Optional[float] = None) -> float:
+        """
+        Returns the number of seconds to wait before the `retry`th retry
+        (counting from zero).
+        """
+        if retry_after is not None and self.respect_retry_after:
+            return max(retry_after, 0.0)
+        delay = min(self.backoff * 2 ** retry, self.max_backoff)
+        return delay * (1 - self.jitter * random.random())
+
+    def call(self, request: Callable[[], _T], *, circuit_breaker: Optional[CircuitBreaker] = None, host: str = "") -> _T:
+        """
+        Calls `request`, retrying it as this policy allows. If a `circuit_breaker`
+        is given, the outcome of each attempt is recorded against `host`.
+        """
+        start = time.monotonic()
+        attempts = 0
+        last_error: Optional[Exception] = None
+        while True:
+            try:
+                probing = circuit_breaker is not None and circuit_breaker.before_request(host)
+                try:
+                    result = request()
+                finally:
+                    if circuit_breaker is not None and probing:
+                        circuit_breaker.end_probe(host)
+            except Exception as error:
+                attempts += 1
+                delay = self._on_failure(error, attempts, start, circuit_breaker, host)
+                if delay is None:
+                    # If our own failures opened the circuit, what caused them is more useful than the open circuit.
+                    if isinstance(error, CircuitOpenError) and last_error is not None:
+                        raise last_error
+                    raise
+                if not isinstance(error, CircuitOpenError):
+                    last_error = error
+                time.sleep(delay)
+            else:
+                if circuit_breaker is not None:
+                    circuit_breaker.record_success(host)
+                return result
+
+    async def call_async(
+        self,
+        request: Callable[[], Awaitable[_T]],
+        *,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        host: str = ""
+    ) -> _T:
+        """
+        The asynchronous counterpart of `call`.
+        """
+        # `asyncio` is slow to import, and is already loaded by the time this is called.
+        import asyncio
+
+        start = time.monotonic()
+        attempts = 0
+        last_error: Optional[Exception] = None
+        while True:
+            try:
+                probing = circuit_breaker is not None and circuit_breaker.before_request(host)
+                try:
+                    result = await request()
+                finally:
+                    if circuit_breaker is not None and probing:
+                        circuit_breaker.end_probe(host)
+            except Exception as error:
+                attempts += 1
+                delay = self._on_failure(error, attempts, start, circuit_breaker, host)
+                if delay is None:
+                    # If our own failures opened the circuit, what caused them is more useful than the open circuit.
+                    if isinstance(error, CircuitOpenError) and last_error is not None:
+                        raise last_error
+                    raise
+                if not isinstance(error, CircuitOpenError):
+                    last_error = error
+                await asyncio.sleep(delay)
+            else:
+                if circuit_breaker is not None:
+                    circuit_breaker.record_success(host)
+                return result
+
+    def _on_failure(
+        self,
+        error: Exception,
+        attempts: int,
+        start: float,
+        circuit_breaker: Optional[CircuitBreaker],
+        host: str
+    ) -> Optional[float]:
+        # Records a failed attempt, and returns how long to wait before the next one (or `None` if there should be
+        # none). Errors that are not retryable (such as a 404) still mean that the host is responding.
+        retryable = self.is_retryable(error)
+        if circuit_breaker is not None and not isinstance(error, CircuitOpenError):
+            if retryable:
+                circuit_breaker.record_failure(host)
+            else:
+                circuit_breaker.record_success(host)
+
+        return self.get_retry_delay(error, attempts, start) if retryable else None
+
+    def get_retry_delay(self, error: BaseException, attempts: int, start: float) -> Optional[float]:
+        """
+        Returns the number of seconds to wait before retrying a request that
+        raised `error` on its `attempts`th attempt, having been first attempted at
+        `start` (as given by `time.monotonic`). Returns `None` if it should not
+        be retried.
+        """
+        if not self.is_retryable(error) or attempts >= self.max_attempts:
+            return None
+
+        delay = self.get_delay(attempts - 1, getattr(error, "retry_after", None))
+        if self.max_elapsed is not None and time.monotonic() + delay - start > self.max_elapsed:
+            return None
+        return delay
+
+    def __repr__(self) -> str:
+        return basic_repr(
+            "RetryPolicy",
+            max_attempts = self.max_attempts,
+            backoff = self.backoff,
+            max_backoff = self.max_backoff,
+            max_elapsed = self.max_elapsed
+        )
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parses the value of a `Retry-After` header (either a number of seconds or
+    an HTTP date) into a number of seconds.
+    """
+    if value is None:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    # Servers rarely send dates, and `email` is slow to import.
+    from email.utils import parsedate_to_datetime
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo = timezone.utc)
+    return max((date - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+def resumable_stream(
+    open_stream: Callable[[int], Iterable[_T]],
+    *,
+    skip: int = 0,
+    retry_policy: Optional[RetryPolicy] = None,
+    max_retries: int = 5,
+    backoff: float = 0.5,
+    max_backoff: float = 30.0,
+    retry_on: Tuple[Type[BaseException], ...] = (OSError,)
+) -> Generator[_T, None, None]:
+    """
+    Yields the elements of a stream, reopening it if it fails partway through.
+
+    `open_stream` is called with the number of elements to skip, and should
+    return the stream from that point on. If the stream fails, it is reopened
+    after the elements received so far, as `retry_policy` allows: its attempts
+    and elapsed time are counted from the last element received, so only a run
+    of consecutive failures is fatal. As the stream is retried as a whole,
+    `open_stream` should not retry opening it itself.
+
+    If no `retry_policy` is given, the stream is reopened after raising any of
+    `retry_on` (by default, the `OSError`s raised by failed connections), up to
+    `max_retries` consecutive times, waiting `backoff` seconds before the first
+    retry and twice as long (up to `max_backoff` seconds) before each
+    subsequent one.
+    """
+    policy = retry_policy or RetryPolicy(
+        max_attempts = max_retries + 1,
+        backoff = backoff,
+        max_backoff = max_backoff,
+        jitter = 0.0,
+        max_elapsed = None,
+        retry_statuses = (),
+        retry_on = retry_on
+    )
+
+    position = skip
+    failures = 0
+    start = time.monotonic()
+    while True:
+        opened_at = position
+        try:
+            for element in open_stream(position):
+                yield element
+                position += 1
+            return
+        except Exception as error:
+            if position > opened_at:
+                failures = 0
+                start = time.monotonic()
+            failures += 1
+            delay = policy.get_retry_delay(error, failures, start)
+            if delay is None:
+                raise
+            time.sleep(delay)
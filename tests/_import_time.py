@@ -0,0 +1,37 @@
+"""
+Measures the time taken by imports, for the tests and benchmarks.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+def measure_import(statement: str) -> Tuple[float, Dict[str, int]]:
+	"""
+	Runs `statement` in a fresh interpreter, returning the number of seconds its
+	imports took, along with the cumulative microseconds taken by each top-level
+	module imported.
+	"""
+	result = subprocess.run(
+		[sys.executable, "-X", "importtime", "-c", statement],
+		stderr = subprocess.PIPE,
+		universal_newlines = True,
+		check = True,
+	)
+
+	modules: Dict[str, int] = {}
+	for line in result.stderr.splitlines():
+		if not line.startswith("import time:") or "|" not in line:
+			continue
+		_, cumulative, name = line[len("import time:"):].split("|")
+		if not cumulative.strip().isdigit():
+			continue
+		# Only modules imported by the statement itself (rather than by another module) are indented by two spaces.
+		if len(name) - len(name.lstrip()) <= 1:
+			modules[name.strip()] = int(cumulative)
+
+	# The interpreter's own start-up imports `site` before the statement runs.
+	total = sum(time for name, time in modules.items() if name != "site")
+	return total / 1e6, modules
@@ -0,0 +1,151 @@
+"""
+A minimal local stand-in for the dataTap API, used by the tests and benchmarks.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+import zlib
+from urllib.parse import parse_qsl
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+	import zstandard
+except ImportError:
+	zstandard = None
+
+class StandInServer:
+	"""
+	Serves canned JSON responses (and JSONL streams) over HTTP/1.1 with
+	keep-alive support. Use as a context manager.
+
+	Streams are called with the request's query parameters. `POST` requests are
+	answered as `GET` requests to the same path would be.
+
+	If `content_encoding` is set, responses are compressed with it whenever the
+	client accepts it.
+
+	Requests for a path in `failures` are answered with the statuses listed
+	there (in turn, and with a `Retry-After` of zero) before it is served.
+	"""
+
+	routes: Dict[str, Callable[[], Any]]
+	streams: Dict[str, Callable[[Dict[str, str]], Iterable[bytes]]]
+	failures: Dict[str, List[int]]
+	connections: int
+	content_encoding: Optional[str]
+
+	def __init__(self, content_encoding: Optional[str] = None):
+		self.routes = {}
+		self.streams = {}
+		self.failures = {}
+		self.connections = 0
+		self.content_encoding = content_encoding
+		self._server: Optional[ThreadingHTTPServer] = None
+
+	@property
+	def uri(self) -> str:
+		assert self._server is not None
+		host, port = self._server.server_address[:2]
+		return f"http://{host}:{port}"
+
+	def __enter__(self) -> StandInServer:
+		stand_in = self
+
+		class Handler(BaseHTTPRequestHandler):
+			protocol_version = "HTTP/1.1"
+			disable_nagle_algorithm = True
+
+			def setup(self):
+				super().setup()
+				stand_in.connections += 1
+
+			def log_message(self, format: str, *args: Any):
+				pass
+
+			def get_encoding(self) -> Optional[str]:
+				accepted = [encoding.strip() for encoding in self.headers.get("Accept-Encoding", "").split(",")]
+				return stand_in.content_encoding if stand_in.content_encoding in accepted else None
+
+			def do_GET(self):
+				path, _, query = self.path.partition("?")
+				path = re.sub("/+", "/", path)
+				encoding = self.get_encoding()
+				if len(stand_in.failures.get(path, [])) > 0:
+					body = json.dumps({ "error": "Unavailable" }).encode("utf-8")
+					self.send_response(stand_in.failures[path].pop(0))
+					self.send_header("Content-Type", "application/json")
+					self.send_header("Content-Length", str(len(body)))
+					self.send_header("Retry-After", "0")
+					self.end_headers()
+					self.wfile.write(body)
+					return
+
+				if path in stand_in.streams:
+					self.send_response(200)
+					self.send_header("Content-Type", "application/jsonl")
+					self.send_header("Transfer-Encoding", "chunked")
+					if encoding is not None:
+						self.send_header("Content-Encoding", encoding)
+					self.end_headers()
+
+					compress, flush = _create_compressor(encoding)
+					for line in stand_in.streams[path](dict(parse_qsl(query))):
+						self.write_chunk(compress(line))
+					self.write_chunk(flush())
+					self.wfile.write(b"0\r\n\r\n")
+					return
+
+				if path not in stand_in.routes:
+					body = json.dumps({ "error": f"Not found: {path}" }).encode("utf-8")
+					self.send_response(404)
+				else:
+					body = json.dumps(stand_in.routes[path]()).encode("utf-8")
+					self.send_response(200)
+
+				compress, flush = _create_compressor(encoding)
+				body = compress(body) + flush()
+
+				self.send_header("Content-Type", "application/json")
+				self.send_header("Content-Length", str(len(body)))
+				if encoding is not None:
+					self.send_header("Content-Encoding", encoding)
+				self.end_headers()
+				self.wfile.write(body)
+
+			def do_POST(self):
+				# Bodies are ignored, and posts are answered as gets would be.
+				self.rfile.read(int(self.headers.get("Content-Length", "0")))
+				self.do_GET()
+
+			def write_chunk(self, data: bytes):
+				# An empty chunk would end the response.
+				if len(data) > 0:
+					self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+		self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+		self._server.daemon_threads = True
+		threading.Thread(target = self._server.serve_forever, daemon = True).start()
+		return self
+
+	def __exit__(self, *args: Any):
+		assert self._server is not None
+		self._server.shutdown()
+		self._server.server_close()
+
+def _create_compressor(encoding: Optional[str]) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+	if encoding is None:
+		return (lambda data: data), (lambda: b"")
+	if encoding == "gzip":
+		compressor = zlib.compressobj(wbits = 16 + zlib.MAX_WBITS)
+		return compressor.compress, compressor.flush
+	if encoding == "deflate":
+		compressor = zlib.compressobj()
+		return compressor.compress, compressor.flush
+	if encoding == "zstd" and zstandard is not None:
+		compressor = zstandard.ZstdCompressor().compressobj()
+		return compressor.compress, compressor.flush
+	raise ValueError(f"Unsupported content encoding {repr(encoding)}")
@@ -0,0 +1,53 @@
+"""
+Generates synthetic droplets for the tests and benchmarks.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+from typing import Any, Dict, List
+
+def synthetic_droplet(i: int, *, instances: int = 4, polygons: int = 0, rng: random.Random = random.Random(0)) -> Dict[str, Any]:
+	"""
+	Creates an image annotation droplet with `instances` bounding boxes, each of
+	which optionally carries a segmentation made of a single `polygons`-gon.
+	"""
+	def instance() -> Dict[str, Any]:
+		x, y = rng.random() * 0.5, rng.random() * 0.5
+		result: Dict[str, Any] = {
+			"boundingBox": { "rectangle": [[x, y], [x + 0.25, y + 0.25]], "confidence": rng.random() }
+		}
+		if polygons > 0:
+			result["segmentation"] = {
+				"mask": [[[x + rng.random() * 0.25, y + rng.random() * 0.25] for _ in range(polygons)]]
+			}
+		return result
+
+	return {
+		"kind": "ImageAnnotation",
+		"uid": f"droplet-{i}",
+		"image": { "paths": [f"s3://datatap-benchmark/images/{i:08}.jpg"] },
+		"classes": {
+			"person": { "instances": [instance() for _ in range(instances)], "multiInstances": [] },
+			"car": { "instances": [instance() for _ in range(instances // 2)] },
+		}
+	}
+
+def synthetic_droplets(count: int, **kwargs: Any) -> List[Dict[str, Any]]:
+	return [synthetic_droplet(i, **kwargs) for i in range(count)]
+
+def write_synthetic_split(file_name: str, count: int, **kwargs: Any) -> None:
+	"""
+	Writes a cache file holding `count` synthetic droplets, unless one exists.
+	"""
+	if os.path.exists(file_name):
+		return
+
+	os.makedirs(os.path.dirname(file_name), exist_ok = True)
+	with open(f"{file_name}.tmp", "w") as f:
+		for i in range(count):
+			f.write(json.dumps(synthetic_droplet(i, **kwargs)) + "\n")
+		f.write("EOF\n")
+	os.replace(f"{file_name}.tmp", file_name)
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import tempfile
+import unittest
+from typing import Any, Dict, Iterable, List
+from unittest import mock
+
+try:
+	import aiohttp
+except ImportError:
+	aiohttp = None
+
+from tests._server import StandInServer
+from datatap.api.entities import AsyncApi
+from datatap.api.endpoints import AsyncSessionPool, MetadataCache, OfflineError, RequestEvent
+from datatap.cache import SplitCache, fill_cache
+from datatap.droplet import ImageAnnotation
+from datatap.utils import Environment
+
+_DATABASE = { "uid": "db", "name": "test", "connectionOptions": { "kind": "direct", "protocol": "neo4j", "host": "localhost", "port": 7687 } }
+_TEMPLATE = { "kind": "ImageAnnotationTemplate", "classes": {} }
+
+def _repository(name: str) -> Dict[str, Any]:
+	return { "namespace": "ns", "name": name, "tags": [{ "tag": "latest", "dataset": f"{name}-ds", "updatedAt": 0, "splits": [] }] }
+
+def _dataset(name: str) -> Dict[str, Any]:
+	return {
+		"uid": f"{name}-ds",
+		"database": "db",
+		"repository": { "namespace": "ns", "name": name },
+		"template": _TEMPLATE,
+		"splits": ["training"]
+	}
+
+def _droplets(count: int) -> List[Dict[str, Any]]:
+	return [{ "kind": "ImageAnnotation", "image": { "paths": [f"s3://bucket/{i}.jpg"] }, "classes": {} } for i in range(count)]
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class TestAsyncApi(unittest.TestCase):
+	def setUp(self):
+		self._directory = tempfile.TemporaryDirectory()
+		self.droplets = _droplets(300)
+
+	def tearDown(self):
+		self._directory.cleanup()
+
+	def _serve(self, server: StandInServer, names: List[str]):
+		server.routes["/api/database/db"] = lambda: _DATABASE
+		server.routes["/api/database/db/repository"] = lambda: [_repository(name) for name in names]
+		for name in names:
+			server.routes[f"/api/database/db/repository/ns/{name}"] = lambda name = name: _repository(name)
+			server.routes[f"/api/database/db/repository/ns/{name}/latest"] = lambda name = name: _dataset(name)
+
+		def stream(query: Dict[str, str]) -> Iterable[bytes]:
+			chunk, nchunks = int(query["chunk"]), int(query["nchunks"])
+			for droplet in self.droplets[chunk * len(self.droplets) // nchunks:(chunk + 1) * len(self.droplets) // nchunks]:
+				yield (json.dumps(droplet) + "\n").encode("utf-8")
+		server.streams["/api/database/db/repository/ns/repo-0/repo-0-ds/split/training/stream"] = stream
+
+	def test_fans_out_queries(self):
+		names = [f"repo-{i}" for i in range(20)]
+
+		async def run() -> List[str]:
+			async with AsyncApi("test-key", server.uri, AsyncSessionPool(limit = 4)) as api:
+				database = await api.get_database_by_uid("db")
+				repositories = await database.get_repository_list()
+				datasets = await asyncio.gather(*[database.get_dataset(f"ns/{repository.name}:latest") for repository in repositories])
+				return [dataset.uid for dataset in datasets]
+
+		with StandInServer() as server:
+			self._serve(server, names)
+			self.assertEqual(asyncio.run(run()), [f"{name}-ds" for name in names])
+			self.assertLessEqual(server.connections, 4)
+
+	def test_streams_split(self):
+		async def run(cache: SplitCache, nchunks: int) -> List[List[ImageAnnotation]]:
+			async with AsyncApi("test-key", server.uri, split_cache = cache) as api:
+				database = await api.get_database_by_uid("db")
+				dataset = await database.get_dataset("ns/repo-0:latest")
+
+				async def collect(chunk: int) -> List[ImageAnnotation]:
+					return [annotation async for annotation in dataset.stream_split("training", chunk, nchunks)]
+
+				return await asyncio.gather(*[collect(chunk) for chunk in range(nchunks)])
+
+		expected = [ImageAnnotation.from_json(droplet) for droplet in self.droplets]
+		with StandInServer() as server:
+			self._serve(server, ["repo-0"])
+			chunks = asyncio.run(run(SplitCache(self._directory.name), 3))
+			self.assertEqual([annotation.to_json() for chunk in chunks for annotation in chunk], [annotation.to_json() for annotation in expected])
+
+			# Fully cached splits are read from the cache, in chunkings that were not already streamed from the server
+			cache = SplitCache(self._directory.name)
+			split_path = cache.get_split_path(database_uid = "db", dataset_uid = "repo-0-ds", split = "training")
+			self.assertFalse(cache.is_cached(split_path))
+			fill_cache(split_path, lambda: iter(self.droplets))
+			del server.streams["/api/database/db/repository/ns/repo-0/repo-0-ds/split/training/stream"]
+			chunks = asyncio.run(run(cache, 2))
+			self.assertEqual([annotation.to_json() for chunk in chunks for annotation in chunk], [annotation.to_json() for annotation in expected])
+
+	def test_reports_and_decodes_requests(self):
+		events: List[RequestEvent] = []
+
+		async def run() -> List[ImageAnnotation]:
+			async with AsyncApi("test-key", server.uri, split_cache = SplitCache(self._directory.name)) as api:
+				api.endpoints.add_listener(events.append)
+				await api.get_database_by_uid("db")
+				database = await api.get_database_by_uid("db")
+				dataset = await database.get_dataset("ns/repo-0:latest")
+				annotations = [annotation async for annotation in dataset.stream_split("training")]
+				self.assertEqual(api.endpoints.transfer_stats.decoded_bytes, sum(event.decoded_bytes for event in events))
+				return annotations
+
+		with StandInServer(content_encoding = "gzip") as server:
+			self._serve(server, ["repo-0"])
+			annotations = asyncio.run(run())
+
+		self.assertEqual([annotation.to_json() for annotation in annotations], self.droplets)
+
+		# The database is only requested once, as it is then served from the metadata cache
+		self.assertEqual([event.endpoint for event in events], [
+			"/database/db",
+			"/database/db/repository/ns/repo-0/latest",
+			"/database/db/repository/ns/repo-0/repo-0-ds/split/training/stream",
+		])
+		stream = events[-1]
+		self.assertTrue(stream.stream)
+		self.assertEqual((stream.status, stream.attempts, stream.items), (200, 1, 300))
+		self.assertLess(stream.wire_bytes, stream.decoded_bytes)
+
+	def test_offline(self):
+		async def run(api: AsyncApi) -> List[ImageAnnotation]:
+			async with api:
+				database = await api.get_database_by_uid("db")
+				dataset = await database.get_dataset("ns/repo-0:latest")
+				return [annotation async for annotation in dataset.stream_split("training")]
+
+		def create_api(uri: str, **kwargs: Any) -> AsyncApi:
+			return AsyncApi(
+				uri = uri,
+				split_cache = SplitCache(self._directory.name),
+				metadata_cache = MetadataCache(path = f"{self._directory.name}/.metadata"),
+				**kwargs
+			)
+
+		with StandInServer() as server:
+			self._serve(server, ["repo-0"])
+			asyncio.run(run(create_api(server.uri, api_key = "test-key")))
+			uri = server.uri
+
+		with mock.patch.object(Environment, "API_KEY", None):
+			# Splits streamed asynchronously are not cached
+			with self.assertRaisesRegex(OfflineError, "training"):
+				asyncio.run(run(create_api(uri, offline = True)))
+
+			cache = SplitCache(self._directory.name)
+			fill_cache(cache.get_split_path(database_uid = "db", dataset_uid = "repo-0-ds", split = "training"), lambda: iter(self.droplets))
+			annotations = asyncio.run(run(create_api(uri, offline = True)))
+			self.assertEqual([annotation.to_json() for annotation in annotations], self.droplets)
+
+if __name__ == "__main__":
+	unittest.main()
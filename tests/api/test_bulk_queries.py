@@ -0,0 +1,79 @@
+import threading
+import time
+import unittest
+from typing import Any, Dict
+
+from tests._server import StandInServer
+from datatap.api.entities import Api, Database
+
+_DATABASE = { "uid": "db", "name": "test", "connectionOptions": { "kind": "direct", "protocol": "neo4j", "host": "localhost", "port": 7687 } }
+
+def _repository(name: str) -> Dict[str, Any]:
+	return {
+		"namespace": "ns",
+		"name": name,
+		"tags": [
+			{ "tag": "latest", "dataset": f"{name}-2", "updatedAt": 0, "splits": [] },
+			{ "tag": "v2", "dataset": f"{name}-2", "updatedAt": 0, "splits": [] },
+			{ "tag": "v1", "dataset": f"{name}-1", "updatedAt": 0, "splits": [] },
+		]
+	}
+
+def _dataset(uid: str, name: str) -> Dict[str, Any]:
+	return {
+		"uid": uid,
+		"database": "db",
+		"repository": { "namespace": "ns", "name": name },
+		"template": { "kind": "ImageAnnotationTemplate", "classes": {} },
+		"splits": ["training"]
+	}
+
+class TestBulkQueries(unittest.TestCase):
+	def setUp(self):
+		self.active = 0
+		self.max_active = 0
+		self._lock = threading.Lock()
+
+	def _slow(self, value: Any) -> Any:
+		with self._lock:
+			self.active += 1
+			self.max_active = max(self.max_active, self.active)
+		time.sleep(0.02)
+		with self._lock:
+			self.active -= 1
+		return value
+
+	def _serve(self, server: StandInServer, count: int):
+		names = [f"repo-{i}" for i in range(count)]
+		server.routes["/api/database"] = lambda: [_DATABASE]
+		server.routes["/api/database/db"] = lambda: _DATABASE
+		server.routes["/api/database/db/repository"] = lambda: [_repository(name) for name in names]
+		for name in names:
+			for tag, uid in (("latest", f"{name}-2"), ("v2", f"{name}-2"), ("v1", f"{name}-1")):
+				server.routes[f"/api/database/db/repository/ns/{name}/{tag}"] = lambda uid = uid, name = name: self._slow(_dataset(uid, name))
+
+	def test_gets_datasets_in_order(self):
+		with StandInServer() as server:
+			self._serve(server, 20)
+			database = Database.from_json(Api("test-key", server.uri).endpoints, _DATABASE)
+
+			slugs = [f"ns/repo-{i}:v1" for i in reversed(range(20))] + ["ns/missing:latest"]
+			datasets = database.get_datasets(slugs, max_workers = 4)
+
+			self.assertEqual([dataset.uid for dataset in datasets[:-1]], [f"repo-{i}-1" for i in reversed(range(20))]) # type: ignore
+			self.assertIsInstance(datasets[-1], Exception)
+			self.assertLessEqual(self.max_active, 4)
+			self.assertGreater(self.max_active, 1)
+
+	def test_gets_all_datasets(self):
+		with StandInServer() as server:
+			self._serve(server, 5)
+			datasets = Api("test-key", server.uri).get_all_datasets()
+
+			self.assertEqual(
+				[dataset.uid for dataset in datasets], # type: ignore
+				[uid for i in range(5) for uid in (f"repo-{i}-2", f"repo-{i}-1")]
+			)
+
+if __name__ == "__main__":
+	unittest.main()
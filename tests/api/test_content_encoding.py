@@ -0,0 +1,71 @@
+import gzip
+import json
+import unittest
+import zlib
+
+from tests._server import StandInServer
+from datatap.api.endpoints import ApiEndpoints, SessionPool
+from datatap.api.endpoints.content_encoding import ContentDecoder, get_supported_encodings
+
+_user = { "uid": "u", "username": "test", "email": "test@example.com", "defaultDatabase": None }
+_lines = [{ "index": i, "labels": ["cat", "dog"] * 10 } for i in range(2000)]
+_stream = "/stream"
+
+class TestContentDecoder(unittest.TestCase):
+	def test_decodes_in_pieces(self):
+		data = b"\n".join(json.dumps(line).encode("utf-8") for line in _lines)
+		compressed = gzip.compress(data)
+
+		decoder = ContentDecoder("gzip")
+		pieces = [decoder.decode(compressed[i:i + 100]) for i in range(0, len(compressed), 100)]
+		self.assertEqual(b"".join(pieces) + decoder.flush(), data)
+
+	def test_raw_deflate(self):
+		compressor = zlib.compressobj(wbits = -zlib.MAX_WBITS)
+		compressed = compressor.compress(b"hello world") + compressor.flush()
+
+		decoder = ContentDecoder("deflate")
+		self.assertEqual(decoder.decode(compressed) + decoder.flush(), b"hello world")
+
+	def test_identity(self):
+		decoder = ContentDecoder("identity")
+		self.assertEqual(decoder.decode(b"hello") + decoder.flush(), b"hello")
+
+	def test_unsupported(self):
+		with self.assertRaises(ValueError):
+			ContentDecoder("compress")
+
+class TestCompressedResponses(unittest.TestCase):
+	def _check(self, encoding: str):
+		with StandInServer(encoding) as server:
+			server.routes["/api/user"] = lambda: _user
+			server.streams["/api" + _stream] = lambda query: (json.dumps(line).encode("utf-8") + b"\n" for line in _lines)
+			endpoints = ApiEndpoints("test-key", server.uri)
+
+			self.assertEqual(endpoints.user.current(), _user)
+			self.assertEqual(list(endpoints._request.stream(_stream)), _lines)
+
+			stats = endpoints.transfer_stats
+			self.assertEqual(stats.responses, 2)
+			self.assertLess(stats.wire_bytes * 2, stats.decoded_bytes)
+
+	def test_gzip(self):
+		self._check("gzip")
+
+	def test_deflate(self):
+		self._check("deflate")
+
+	@unittest.skipUnless("zstd" in get_supported_encodings(), "zstandard is not installed")
+	def test_zstd(self):
+		self._check("zstd")
+
+	def test_not_accepted(self):
+		with StandInServer("gzip") as server:
+			server.streams["/api" + _stream] = lambda query: (json.dumps(line).encode("utf-8") + b"\n" for line in _lines)
+			endpoints = ApiEndpoints("test-key", server.uri, SessionPool(accept_encoding = "identity"))
+
+			self.assertEqual(list(endpoints._request.stream(_stream)), _lines)
+			self.assertEqual(endpoints.transfer_stats.wire_bytes, endpoints.transfer_stats.decoded_bytes)
+
+if __name__ == "__main__":
+	unittest.main()
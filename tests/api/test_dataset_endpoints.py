@@ -0,0 +1,106 @@
+import json
+import tempfile
+import unittest
+from typing import Any, Dict, Iterable, List
+
+from tests._server import StandInServer
+from datatap.api.endpoints import ApiEndpoints, SessionPool
+from datatap.cache import SplitCache, SplitReader
+from datatap.utils import HttpError, RetryPolicy
+
+_STREAM = "/api/database/db/repository/ns/repo/ds/split/training/stream"
+
+def _droplets(count: int) -> List[Dict[str, Any]]:
+	return [{ "kind": "ImageAnnotation", "image": { "paths": [f"s3://bucket/{i}.jpg"] }, "classes": {} } for i in range(count)]
+
+class TestFetchSplit(unittest.TestCase):
+	def setUp(self):
+		self._directory = tempfile.TemporaryDirectory()
+		self.droplets = _droplets(2500)
+		self.requests: List[Dict[str, str]] = []
+		self.drop_after = -1
+
+	def tearDown(self):
+		self._directory.cleanup()
+
+	def _stream(self, query: Dict[str, str]) -> Iterable[bytes]:
+		self.requests.append(query)
+		chunk, nchunks = int(query["chunk"]), int(query["nchunks"])
+		for i, droplet in enumerate(self.droplets[chunk * len(self.droplets) // nchunks:(chunk + 1) * len(self.droplets) // nchunks]):
+			if i == self.drop_after and len(self.requests) == 1:
+				raise ConnectionError("connection dropped")
+			yield (json.dumps(droplet) + "\n").encode("utf-8")
+
+	def _fetch(self, parallelism: int) -> int:
+		with StandInServer() as server:
+			server.streams[_STREAM] = self._stream
+			endpoints = ApiEndpoints("test-key", server.uri, split_cache = SplitCache(self._directory.name))
+
+			progress: List[int] = []
+			file_name = endpoints.dataset.fetch_split(
+				database_uid = "db",
+				namespace = "ns",
+				name = "repo",
+				uid = "ds",
+				split = "training",
+				parallelism = parallelism,
+				progress = progress.append
+			)
+
+			with SplitReader(file_name) as reader:
+				self.assertEqual(list(reader), self.droplets)
+			return sum(progress)
+
+	def test_fetches_serially(self):
+		self.assertEqual(self._fetch(1), 2500)
+		self.assertEqual(self.requests, [{ "chunk": "0", "nchunks": "1" }])
+
+	def test_fetches_chunks_concurrently(self):
+		self.assertEqual(self._fetch(4), 2500)
+		self.assertEqual(sorted(request["chunk"] for request in self.requests), ["0", "1", "2", "3"])
+
+		# Fetching again is served from the cache
+		self.assertEqual(self._fetch(4), 0)
+		self.assertEqual(len(self.requests), 4)
+
+	def test_resumes_dropped_stream(self):
+		self.drop_after = 1000
+		self.assertEqual(self._fetch(1), 2500)
+		self.assertEqual(len(self.requests), 2)
+
+	def test_resumes_dropped_stream_while_reading(self):
+		self.drop_after = 1000
+		with StandInServer() as server:
+			server.streams[_STREAM] = self._stream
+			endpoints = ApiEndpoints("test-key", server.uri, split_cache = SplitCache(self._directory.name))
+			stream = endpoints.dataset.stream_split(
+				database_uid = "db",
+				namespace = "ns",
+				name = "repo",
+				uid = "ds",
+				split = "training",
+				chunk = 0,
+				nchunks = 1
+			)
+			self.assertEqual(list(stream), self.droplets)
+		self.assertEqual(len(self.requests), 2)
+
+	def test_retries_stream_once(self):
+		with StandInServer() as server:
+			server.streams[_STREAM] = self._stream
+			server.failures[_STREAM] = [503] * 10
+			endpoints = ApiEndpoints(
+				"test-key",
+				server.uri,
+				SessionPool(retry_policy = RetryPolicy(backoff = 0, max_attempts = 3)),
+				split_cache = SplitCache(self._directory.name)
+			)
+			with self.assertRaises(HttpError):
+				endpoints.dataset.fetch_split(database_uid = "db", namespace = "ns", name = "repo", uid = "ds", split = "training")
+
+			# The stream is opened as many times as the policy allows, rather than being retried both by the
+			# requester and as it is resumed
+			self.assertEqual(len(server.failures[_STREAM]), 7)
+
+if __name__ == "__main__":
+	unittest.main()
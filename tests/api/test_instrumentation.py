@@ -0,0 +1,70 @@
+import io
+import json
+import unittest
+from typing import List
+
+from tests._server import StandInServer
+from datatap.api.endpoints import ApiEndpoints, RequestEvent, RequestMetrics, SessionPool
+from datatap.utils import HttpError, RetryPolicy
+
+_user = { "uid": "u", "username": "test", "email": "test@example.com", "defaultDatabase": None }
+_lines = [{ "index": i } for i in range(100)]
+
+class TestInstrumentation(unittest.TestCase):
+	def setUp(self):
+		self.events: List[RequestEvent] = []
+
+	def test_reports_requests(self):
+		with StandInServer() as server:
+			server.routes["/api/user"] = lambda: _user
+			server.failures["/api/user"] = [503]
+			endpoints = ApiEndpoints("test-key", server.uri, SessionPool(retry_policy = RetryPolicy(backoff = 0)))
+			endpoints.add_listener(self.events.append)
+
+			endpoints.user.current()
+			with self.assertRaises(HttpError):
+				endpoints.database.list()
+
+		[user, database] = self.events
+		self.assertEqual((user.method, user.endpoint, user.status, user.attempts), ("GET", "/user", 200, 2))
+		self.assertGreater(user.decoded_bytes, len(json.dumps(_user)))
+		self.assertIsNotNone(user.time_to_first_byte)
+		self.assertIsNone(user.error)
+		self.assertEqual((database.status, database.attempts), (404, 1))
+		self.assertIsInstance(database.error, HttpError)
+
+	def test_reports_streams(self):
+		with StandInServer() as server:
+			server.streams["/api/stream"] = lambda query: (json.dumps(line).encode("utf-8") + b"\n" for line in _lines)
+			endpoints = ApiEndpoints("test-key", server.uri)
+			metrics = RequestMetrics()
+			endpoints.add_listener(self.events.append)
+			endpoints.add_listener(metrics)
+
+			self.assertEqual(list(endpoints._request.stream("/stream")), _lines)
+
+			stream = endpoints._request.stream.lines("/stream")
+			next(stream)
+			stream.close()
+
+			endpoints.remove_listener(self.events.append)
+			list(endpoints._request.stream("/stream"))
+
+		[complete, partial] = self.events
+		self.assertTrue(complete.stream)
+		self.assertEqual(complete.items, 100)
+		self.assertGreater(complete.parse_time, 0)
+		self.assertIsNone(partial.error)
+		self.assertEqual(partial.parse_time, 0)
+
+		summary = metrics.summary()["GET /stream"]
+		self.assertEqual(summary["requests"], 3)
+		self.assertEqual(summary["latency"]["count"], 3)
+		self.assertEqual(summary["errors"], 0)
+
+		output = io.StringIO()
+		metrics.dump(output)
+		self.assertIn("GET /stream", output.getvalue())
+
+if __name__ == "__main__":
+	unittest.main()
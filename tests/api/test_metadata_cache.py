@@ -0,0 +1,96 @@
+import os
+import pickle
+import tempfile
+import time
+import unittest
+from typing import Any, Dict
+
+from tests._server import StandInServer
+from datatap.api.endpoints import ApiEndpoints, MetadataCache
+
+def _dataset(uid: str) -> Dict[str, Any]:
+	return {
+		"uid": uid,
+		"database": "db",
+		"repository": { "namespace": "ns", "name": "repo" },
+		"template": { "kind": "ImageAnnotationTemplate", "classes": {} },
+		"splits": ["training"]
+	}
+
+class TestMetadataCache(unittest.TestCase):
+	def setUp(self):
+		self.requests: Dict[str, int] = {}
+		self.latest = "v1"
+
+	def _serve(self, server: StandInServer):
+		def route(path: str, value: Any):
+			def respond():
+				self.requests[path] = self.requests.get(path, 0) + 1
+				return value() if callable(value) else value
+			server.routes[f"/api/{path}"] = respond
+
+		route("database/db/repository/ns/repo/latest", lambda: _dataset(self.latest))
+		route("database/db/repository/ns/repo/v1", _dataset("v1"))
+		route("database/db/repository", [])
+
+	def test_caches_dataset_versions_indefinitely(self):
+		with StandInServer() as server:
+			self._serve(server)
+			endpoints = ApiEndpoints("test-key", server.uri, metadata_cache = MetadataCache(ttl = 0, path = ""))
+
+			for _ in range(3):
+				self.assertEqual(endpoints.dataset.query("db", "ns", "repo", "v1")["uid"], "v1")
+				self.assertEqual(endpoints.dataset.query("db", "ns", "repo", "latest")["uid"], "v1")
+				endpoints.repository.list("db")
+
+			self.assertEqual(self.requests, {
+				"database/db/repository/ns/repo/v1": 1,
+				"database/db/repository/ns/repo/latest": 3,
+				"database/db/repository": 3,
+			})
+
+	def test_expires_mutable_metadata(self):
+		with StandInServer() as server:
+			self._serve(server)
+			endpoints = ApiEndpoints("test-key", server.uri, metadata_cache = MetadataCache(ttl = 0.2, path = ""))
+
+			self.assertEqual(endpoints.dataset.query("db", "ns", "repo", "latest")["uid"], "v1")
+			self.latest = "v2"
+			self.assertEqual(endpoints.dataset.query("db", "ns", "repo", "latest")["uid"], "v1")
+
+			time.sleep(0.3)
+			self.assertEqual(endpoints.dataset.query("db", "ns", "repo", "latest")["uid"], "v2")
+
+	def test_shares_metadata(self):
+		with StandInServer() as server, tempfile.TemporaryDirectory() as directory:
+			self._serve(server)
+			endpoints = ApiEndpoints("test-key", server.uri, metadata_cache = MetadataCache(path = directory))
+			endpoints.dataset.query("db", "ns", "repo", "latest")
+
+			copy = pickle.loads(pickle.dumps(endpoints))
+			copy.dataset.query("db", "ns", "repo", "latest")
+			ApiEndpoints("test-key", server.uri, metadata_cache = MetadataCache(path = directory)).dataset.query("db", "ns", "repo", "latest")
+			self.assertEqual(self.requests, { "database/db/repository/ns/repo/latest": 1 })
+
+			# Other credentials may see other metadata
+			ApiEndpoints("other-key", server.uri, metadata_cache = MetadataCache(path = directory)).dataset.query("db", "ns", "repo", "latest")
+			self.assertEqual(self.requests, { "database/db/repository/ns/repo/latest": 2 })
+
+	def test_does_not_rewrite_scope(self):
+		with tempfile.TemporaryDirectory() as directory:
+			ApiEndpoints("test-key", "http://127.0.0.1:1", metadata_cache = MetadataCache(path = directory))
+			(file_name,) = os.listdir(directory)
+			os.utime(os.path.join(directory, file_name), (0, 0))
+
+			ApiEndpoints("test-key", "http://127.0.0.1:1", metadata_cache = MetadataCache(path = directory))
+			self.assertEqual(os.listdir(directory), [file_name])
+			self.assertEqual(os.path.getmtime(os.path.join(directory, file_name)), 0)
+
+	def test_returns_copies(self):
+		cache = MetadataCache(path = "")
+		cache.put("key", { "splits": ["training"] }, immutable = True)
+		cache.get("key")["splits"].append("validation")
+		self.assertEqual(cache.get("key"), { "splits": ["training"] })
+
+if __name__ == "__main__":
+	unittest.main()
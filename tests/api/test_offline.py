@@ -0,0 +1,75 @@
+import json
+import tempfile
+import unittest
+from typing import Any, Dict, Iterable, List
+from unittest import mock
+
+from tests._server import StandInServer
+from datatap.api.endpoints import MetadataCache, OfflineError
+from datatap.api.entities import Api
+from datatap.cache import SplitCache
+from datatap.utils import Environment
+
+_USER = { "uid": "u", "username": "test", "email": "test@example.com", "defaultDatabase": "db" }
+_DATABASE = { "uid": "db", "name": "test", "connectionOptions": { "kind": "direct", "protocol": "neo4j", "host": "localhost", "port": 7687 } }
+_DATASET = {
+	"uid": "ds",
+	"database": "db",
+	"repository": { "namespace": "ns", "name": "repo" },
+	"template": { "kind": "ImageAnnotationTemplate", "classes": {} },
+	"splits": ["training", "validation"]
+}
+
+def _droplets(count: int) -> List[Dict[str, Any]]:
+	return [{ "kind": "ImageAnnotation", "image": { "paths": [f"s3://bucket/{i}.jpg"] }, "classes": {} } for i in range(count)]
+
+class TestOffline(unittest.TestCase):
+	def setUp(self):
+		self._directory = tempfile.TemporaryDirectory()
+		self.droplets = _droplets(100)
+
+	def tearDown(self):
+		self._directory.cleanup()
+
+	def _api(self, uri: str, **kwargs: Any) -> Api:
+		return Api(
+			uri = uri,
+			split_cache = SplitCache(self._directory.name),
+			metadata_cache = MetadataCache(path = f"{self._directory.name}/.metadata"),
+			**kwargs
+		)
+
+	def test_serves_cached_dataset_offline(self):
+		def stream(query: Dict[str, str]) -> Iterable[bytes]:
+			for droplet in self.droplets:
+				yield (json.dumps(droplet) + "\n").encode("utf-8")
+
+		with StandInServer() as server:
+			server.routes["/api/user"] = lambda: _USER
+			server.routes["/api/database/db"] = lambda: _DATABASE
+			server.routes["/api/database/db/repository/ns/repo/latest"] = lambda: _DATASET
+			server.streams["/api/database/db/repository/ns/repo/ds/split/training/stream"] = stream
+
+			dataset = self._api(server.uri, api_key = "test-key").get_default_database().get_dataset("ns/repo:latest")
+			dataset.cache_split("training")
+			uri = server.uri
+
+		with mock.patch.object(Environment, "API_KEY", None):
+			api = self._api(uri, offline = True)
+			dataset = api.get_default_database().get_dataset("ns/repo:latest")
+			self.assertEqual(dataset.uid, "ds")
+			self.assertEqual([annotation.to_json() for annotation in dataset.stream_split("training")], self.droplets)
+			self.assertEqual(len(dataset.get_split_reader("training")), 100)
+
+			with self.assertRaisesRegex(OfflineError, "validation"):
+				next(dataset.stream_split("validation"))
+			with self.assertRaisesRegex(OfflineError, "other"):
+				api.get_default_database().get_dataset("ns/other:latest")
+
+	def test_requires_cached_credentials(self):
+		with mock.patch.object(Environment, "API_KEY", None):
+			with self.assertRaises(OfflineError):
+				self._api("http://127.0.0.1:1", offline = True)
+
+if __name__ == "__main__":
+	unittest.main()
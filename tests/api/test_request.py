@@ -0,0 +1,36 @@
+import pickle
+import unittest
+
+from tests._server import StandInServer
+from datatap.api.endpoints import ApiEndpoints, SessionPool
+
+_user = { "uid": "u", "username": "test", "email": "test@example.com", "defaultDatabase": None }
+
+class TestSessionPool(unittest.TestCase):
+	def test_reuses_connections(self):
+		with StandInServer() as server:
+			server.routes["/api/user"] = lambda: _user
+			endpoints = ApiEndpoints("test-key", server.uri)
+
+			for _ in range(5):
+				self.assertEqual(endpoints.user.current(), _user)
+
+			self.assertEqual(server.connections, 1)
+
+	def test_surfaces_errors(self):
+		with StandInServer() as server:
+			endpoints = ApiEndpoints("test-key", server.uri)
+			with self.assertRaisesRegex(Exception, "Not found"):
+				endpoints.user.current()
+
+	def test_pickle_drops_session(self):
+		pool = SessionPool(pool_maxsize = 2)
+		session = pool.session
+
+		copy = pickle.loads(pickle.dumps(pool))
+		self.assertEqual(copy.pool_maxsize, 2)
+		self.assertIsNot(copy.session, session)
+		self.assertIs(pool.session, session)
+
+if __name__ == "__main__":
+	unittest.main()
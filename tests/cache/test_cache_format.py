@@ -0,0 +1,80 @@
+import json
+import os
+import pickle
+import tempfile
+import unittest
+from typing import Any, Dict, List
+
+from datatap.cache import CacheGenerator, SplitReader
+from datatap.cache.cache_file import get_index_path, is_cache_current, read_cache_file
+from datatap.cache.cache_format import JSON_LINES, MSGPACK, get_file_format, msgpack
+
+def _droplets(count: int) -> List[Dict[str, Any]]:
+	return [{ "kind": "ImageAnnotation", "image": { "paths": [f"s3://bucket/{i}.jpg"] }, "classes": {} } for i in range(count)]
+
+class TestJsonLinesFormat(unittest.TestCase):
+	def setUp(self):
+		self._directory = tempfile.TemporaryDirectory()
+		self.file_name = os.path.join(self._directory.name, "chunk-0.jsonl")
+
+	def tearDown(self):
+		self._directory.cleanup()
+
+	def test_reads_files_from_older_versions(self):
+		with open(self.file_name, "w") as f:
+			f.write("{\"a\": 1}\n\n{\"a\": 2}\nEOF\n")
+
+		self.assertIs(get_file_format(self.file_name), JSON_LINES)
+		self.assertEqual(list(read_cache_file(self.file_name)), [{ "a": 1 }, { "a": 2 }])
+		with SplitReader(self.file_name) as reader:
+			self.assertEqual(len(reader), 2)
+
+	def test_reads_unterminated_last_line(self):
+		with open(self.file_name, "w") as f:
+			f.write("{\"a\": 1}\n{\"a\": 2}")
+
+		self.assertEqual(list(read_cache_file(self.file_name, read_ahead = 3)), [{ "a": 1 }, { "a": 2 }])
+
+	def test_writes_json_lines_unchanged(self):
+		lines = [json.dumps(droplet).encode("utf-8") for droplet in _droplets(20)]
+		self.assertEqual(list(CacheGenerator(self.file_name, lambda: iter(lines), json_lines = True)), _droplets(20))
+		with open(self.file_name, "rb") as f:
+			self.assertEqual(f.read(), b"".join(line + b"\n" for line in lines))
+
+@unittest.skipIf(msgpack is None, "msgpack is not installed")
+class TestMsgpackFormat(unittest.TestCase):
+	def setUp(self):
+		self._directory = tempfile.TemporaryDirectory()
+		self.file_name = os.path.join(self._directory.name, "chunk-0.msgpack")
+		self.droplets = _droplets(30)
+
+	def tearDown(self):
+		self._directory.cleanup()
+
+	def test_round_trip(self):
+		self.assertEqual(list(CacheGenerator(self.file_name, lambda: iter(self.droplets), cache_format = MSGPACK)), self.droplets)
+		self.assertIs(get_file_format(self.file_name), MSGPACK)
+		self.assertEqual(list(read_cache_file(self.file_name, read_ahead = 7)), self.droplets)
+		with SplitReader(self.file_name) as reader:
+			self.assertEqual(list(reader), self.droplets)
+		self.assertIs(pickle.loads(pickle.dumps(MSGPACK)), MSGPACK)
+
+	def test_encodes_json_lines(self):
+		lines = [json.dumps(droplet).encode("utf-8") for droplet in self.droplets]
+		self.assertEqual(list(CacheGenerator(self.file_name, lambda: iter(lines), cache_format = MSGPACK, json_lines = True)), self.droplets)
+		self.assertEqual(list(read_cache_file(self.file_name)), self.droplets)
+
+	def test_outdated_versions_are_invalidated(self):
+		list(CacheGenerator(self.file_name, lambda: iter(self.droplets), cache_format = MSGPACK))
+		with open(self.file_name, "r+b") as f:
+			f.write(MSGPACK.header.replace(b":1\n", b":0\n"))
+
+		self.assertIsNone(get_file_format(self.file_name))
+		self.assertFalse(is_cache_current(self.file_name, MSGPACK))
+		self.assertFalse(os.path.exists(self.file_name))
+		self.assertFalse(os.path.exists(get_index_path(self.file_name)))
+
+		self.assertEqual(list(CacheGenerator(self.file_name, lambda: iter(self.droplets[:3]), cache_format = MSGPACK)), self.droplets[:3])
+
+if __name__ == "__main__":
+	unittest.main()
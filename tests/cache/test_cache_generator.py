@@ -0,0 +1,142 @@
+import os
+import tempfile
+import threading
+import unittest
+from typing import Any, Dict, Generator, Iterable, List
+
+from datatap.cache import CacheGenerator, SplitCache, fill_cache
+
+def _droplets(count: int) -> List[Dict[str, Any]]:
+	return [{ "kind": "ImageAnnotation", "image": { "paths": [f"s3://bucket/{i}.jpg"] }, "classes": {} } for i in range(count)]
+
+class TestCacheGenerator(unittest.TestCase):
+	def setUp(self):
+		self._directory = tempfile.TemporaryDirectory()
+		self.cache = SplitCache(self._directory.name)
+		self.file_name = self.cache.get_chunk_path(database_uid = "db", dataset_uid = "ds", split = "training", chunk = 0, nchunks = 1)
+
+	def tearDown(self):
+		self._directory.cleanup()
+
+	def test_promotes_stream_on_completion(self):
+		droplets = _droplets(50)
+		calls = 0
+
+		def create_stream() -> Generator[Dict[str, Any], None, None]:
+			nonlocal calls
+			calls += 1
+			yield from droplets
+
+		self.assertEqual(list(CacheGenerator(self.file_name, create_stream)), droplets)
+		self.assertTrue(os.path.exists(self.file_name))
+		self.assertFalse(os.path.exists(f"{self.file_name}.stream"))
+
+		self.assertEqual(list(CacheGenerator(self.file_name, create_stream)), droplets)
+		self.assertEqual(calls, 1)
+
+	def test_on_complete_errors_are_raised(self):
+		droplets = _droplets(10)
+		read: List[Dict[str, Any]] = []
+
+		def on_complete():
+			raise OSError("disk full")
+
+		with self.assertRaises(OSError):
+			for droplet in CacheGenerator(self.file_name, lambda: iter(droplets), on_complete = on_complete):
+				read.append(droplet)
+		self.assertEqual(read, droplets)
+		self.assertTrue(os.path.exists(self.file_name))
+
+	def test_failed_stream_is_not_promoted(self):
+		def create_stream() -> Generator[Dict[str, Any], None, None]:
+			yield from _droplets(3)
+			raise ConnectionError("connection dropped")
+
+		with self.assertRaises(ConnectionError):
+			list(CacheGenerator(self.file_name, create_stream))
+
+		self.assertFalse(os.path.exists(self.file_name))
+
+	def test_concurrent_streams_share_download(self):
+		droplets = _droplets(200)
+		calls = 0
+		results: List[List[Dict[str, Any]]] = []
+
+		def create_stream() -> Generator[Dict[str, Any], None, None]:
+			nonlocal calls
+			calls += 1
+			yield from droplets
+
+		def consume():
+			results.append(list(CacheGenerator(self.file_name, create_stream)))
+
+		threads = [threading.Thread(target = consume) for _ in range(4)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+
+		self.assertEqual(calls, 1)
+		self.assertEqual(results, [droplets] * 4)
+
+	def test_resumes_partial_stream(self):
+		droplets = _droplets(100)
+		skips: List[int] = []
+
+		def failing_stream() -> Generator[Dict[str, Any], None, None]:
+			yield from droplets[:40]
+			raise ConnectionError("connection dropped")
+
+		def resume_stream(skip: int) -> Generator[Dict[str, Any], None, None]:
+			skips.append(skip)
+			yield from droplets[skip:]
+
+		with self.assertRaises(ConnectionError):
+			list(CacheGenerator(self.file_name, failing_stream, resume_stream = resume_stream))
+		self.assertFalse(os.path.exists(self.file_name))
+		self.assertTrue(os.path.exists(f"{self.file_name}.stream"))
+
+		# A record cut short by the failure is discarded
+		with open(f"{self.file_name}.stream", "ab") as f:
+			f.write(b'{"kind": "Ima')
+
+		self.assertEqual(list(CacheGenerator(self.file_name, failing_stream, resume_stream = resume_stream)), droplets)
+		self.assertEqual(skips, [40])
+		self.assertFalse(os.path.exists(f"{self.file_name}.stream"))
+
+	def test_fill_cache_resumes_partial_stream(self):
+		droplets = _droplets(100)
+		skips: List[int] = []
+
+		def failing_stream() -> Generator[Dict[str, Any], None, None]:
+			yield from droplets[:25]
+			raise ConnectionError("connection dropped")
+
+		def resume_stream(skip: int) -> Generator[Dict[str, Any], None, None]:
+			skips.append(skip)
+			yield from droplets[skip:]
+
+		with self.assertRaises(ConnectionError):
+			fill_cache(self.file_name, failing_stream, resume_stream = resume_stream)
+
+		progress: List[int] = []
+		fill_cache(self.file_name, failing_stream, resume_stream = resume_stream, progress = progress.append)
+		self.assertEqual(skips, [25])
+		self.assertEqual(sum(progress), 75)
+		self.assertEqual(list(CacheGenerator(self.file_name, failing_stream)), droplets)
+
+	def test_fill_cache_stream_fails_to_open(self):
+		droplets = _droplets(10)
+
+		def failing_stream() -> Iterable[Dict[str, Any]]:
+			raise ConnectionError("connection refused")
+
+		with self.assertRaises(ConnectionError):
+			fill_cache(self.file_name, failing_stream)
+		self.assertFalse(os.path.exists(f"{self.file_name}.stream"))
+
+		fill_cache(self.file_name, lambda: iter(droplets))
+		self.assertEqual(list(CacheGenerator(self.file_name, failing_stream)), droplets)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,89 @@
+import contextlib
+import io
+import os
+import tempfile
+import time
+import unittest
+from typing import Any, Dict, List
+
+from datatap.cache import CacheGenerator, SplitCache, SplitReader
+from datatap.cache.__main__ import main
+from datatap.cache.split_cache import parse_size
+
+def _droplets(count: int) -> List[Dict[str, Any]]:
+	return [{ "kind": "ImageAnnotation", "image": { "paths": [f"s3://bucket/{i}.jpg"] }, "classes": {} } for i in range(count)]
+
+class TestCacheManagement(unittest.TestCase):
+	def setUp(self):
+		self._directory = tempfile.TemporaryDirectory()
+		self.cache = SplitCache(self._directory.name)
+
+		# Splits are cached from least to most recently used
+		for i, split in enumerate(["a", "b", "c"]):
+			key = { "database_uid": "db", "dataset_uid": "ds", "split": split }
+			list(CacheGenerator(self.cache.get_split_path(**key), lambda: iter(_droplets(100))))
+			self.cache.touch(**key)
+			access_marker = os.path.join(self.cache.get_split_directory(**key), ".last-access")
+			os.utime(access_marker, (time.time() - 100 + i, time.time() - 100 + i))
+
+	def tearDown(self):
+		self._directory.cleanup()
+
+	def _splits(self) -> List[str]:
+		return [entry.split for entry in self.cache.get_entries()]
+
+	def test_entries(self):
+		entries = self.cache.get_entries()
+		self.assertEqual([entry.split for entry in entries], ["a", "b", "c"])
+		self.assertTrue(all(entry.complete and not entry.pinned and entry.size > 0 for entry in entries))
+		self.assertEqual(self.cache.get_size(), sum(entry.size for entry in entries))
+
+	def test_evicts_least_recently_used(self):
+		size = self.cache.get_entries()[0].size
+		evicted = self.cache.evict(size * 2)
+		self.assertEqual([entry.split for entry in evicted], ["a"])
+		self.assertEqual(self._splits(), ["b", "c"])
+
+	def test_skips_pinned_and_open_splits(self):
+		self.cache.pin(database_uid = "db", dataset_uid = "ds", split = "a")
+		reader = SplitReader(self.cache.get_split_path(database_uid = "db", dataset_uid = "ds", split = "b"))
+		self.assertEqual(len(reader[:3]), 3)
+
+		self.cache.evict(0)
+		self.assertEqual(self._splits(), ["a", "b"])
+
+		reader.close()
+		self.cache.unpin(database_uid = "db", dataset_uid = "ds", split = "a")
+		self.cache.evict(0)
+		self.assertEqual(self._splits(), [])
+
+	def test_verify(self):
+		entry = self.cache.get_entries()[0]
+		self.assertEqual(self.cache.verify(entry), [])
+
+		split_path = self.cache.get_split_path(database_uid = "db", dataset_uid = "ds", split = "a")
+		with open(split_path, "r+b") as f:
+			f.seek(10)
+			f.write(b"\n")
+		self.assertEqual(len(self.cache.verify(entry)), 1)
+
+	def test_cli(self):
+		output = io.StringIO()
+		with contextlib.redirect_stdout(output):
+			main(["--root", self._directory.name, "pin", "--split", "c"])
+			main(["--root", self._directory.name, "purge", "--older-than", "0"])
+			main(["--root", self._directory.name, "list"])
+
+		self.assertEqual(self._splits(), ["c"])
+		self.assertIn("pinned", output.getvalue().splitlines()[-2])
+
+	def test_parse_size(self):
+		self.assertEqual(parse_size("512"), 512)
+		self.assertEqual(parse_size("1.5K"), 1536)
+		self.assertEqual(parse_size("20GB"), 20 << 30)
+		self.assertEqual(parse_size("2 MiB"), 2 << 20)
+		with self.assertRaises(ValueError):
+			parse_size("lots")
+
+if __name__ == "__main__":
+	unittest.main()
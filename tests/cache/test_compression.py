@@ -0,0 +1,113 @@
+import os
+import random
+import tempfile
+import unittest
+from typing import Any, Dict, Generator, List
+
+from datatap.cache import CacheGenerator, SplitReader
+from datatap.cache.cache_file import get_content_size, read_cache_file
+from datatap.cache.compression import HEADER_PREFIX, BlockWriter, Compression, open_cache_file, zstandard
+
+def _droplets(count: int) -> List[Dict[str, Any]]:
+	return [{ "kind": "ImageAnnotation", "image": { "paths": [f"s3://bucket/{i}.jpg"] }, "classes": {} } for i in range(count)]
+
+class TestCompression(unittest.TestCase):
+	def setUp(self):
+		self._directory = tempfile.TemporaryDirectory()
+		self.file_name = os.path.join(self._directory.name, "chunk-0.jsonl")
+
+	def tearDown(self):
+		self._directory.cleanup()
+
+	def test_random_access(self):
+		contents = bytes(random.Random(0).randrange(4) for _ in range(10000))
+		with open(self.file_name, "wb") as f:
+			writer = BlockWriter(f, Compression("gzip", block_size = 300))
+			writer.write(contents[:5000])
+			writer.write(contents[5000:])
+			writer.close()
+
+		with open_cache_file(self.file_name, buffering = 0) as f:
+			self.assertEqual(f.read(), contents)
+			for start, end in [(0, 1), (299, 301), (1234, 5678), (9999, 12000), (10000, 10001)]:
+				self.assertEqual(f.pread(start, end), contents[start:end]) # type: ignore
+
+		self.assertEqual(get_content_size(self.file_name), len(contents))
+		self.assertLess(os.path.getsize(self.file_name), len(contents) / 2)
+
+	def test_compressed_cache_file(self):
+		droplets = _droplets(40)
+		compression = Compression("gzip", block_size = 256)
+		self.assertEqual(list(CacheGenerator(self.file_name, lambda: iter(droplets), compression = compression)), droplets)
+		self.assertFalse(os.path.exists(f"{self.file_name}.stream"))
+
+		self.assertEqual(list(read_cache_file(self.file_name, read_ahead = 100)), droplets)
+		with SplitReader(self.file_name) as reader:
+			self.assertEqual(len(reader), 40)
+			self.assertEqual(reader[[39, 0, 17]], [droplets[39], droplets[0], droplets[17]])
+			self.assertEqual(list(reader.iter(30)), droplets[30:])
+
+	def test_stream_is_compressed_while_written(self):
+		droplets = _droplets(400)
+		sizes: List[int] = []
+
+		def stream() -> Generator[Dict[str, Any], None, None]:
+			for i, droplet in enumerate(droplets):
+				if i == 300:
+					sizes.append(os.path.getsize(f"{self.file_name}.stream"))
+				yield droplet
+
+		compression = Compression("gzip", block_size = 1024)
+		self.assertEqual(list(CacheGenerator(self.file_name, stream, compression = compression)), droplets)
+		with open(self.file_name, "rb") as f:
+			self.assertTrue(f.read().startswith(HEADER_PREFIX))
+
+		# The first 300 droplets take up more than 20KB uncompressed
+		self.assertGreater(sizes[0], 0)
+		self.assertLess(sizes[0], 10000)
+
+	def test_resumes_compressed_stream(self):
+		droplets = _droplets(100)
+		skips: List[int] = []
+
+		def failing_stream() -> Generator[Dict[str, Any], None, None]:
+			yield from droplets[:40]
+			raise ConnectionError("connection dropped")
+
+		def resume_stream(skip: int) -> Generator[Dict[str, Any], None, None]:
+			skips.append(skip)
+			yield from droplets[skip:]
+
+		compression = Compression("gzip", block_size = 1000)
+		with self.assertRaises(ConnectionError):
+			list(CacheGenerator(self.file_name, failing_stream, compression = compression, resume_stream = resume_stream))
+		self.assertTrue(os.path.exists(f"{self.file_name}.stream"))
+
+		self.assertEqual(list(CacheGenerator(self.file_name, failing_stream, compression = compression, resume_stream = resume_stream)), droplets)
+		self.assertEqual(skips, [40])
+		self.assertEqual(list(read_cache_file(self.file_name)), droplets)
+
+		# A partial stream compressed differently is discarded
+		os.remove(self.file_name)
+		with self.assertRaises(ConnectionError):
+			list(CacheGenerator(self.file_name, failing_stream, compression = compression, resume_stream = resume_stream))
+		self.assertEqual(list(CacheGenerator(self.file_name, lambda: iter(droplets), resume_stream = resume_stream)), droplets)
+		self.assertEqual(skips, [40])
+
+	def test_parse(self):
+		self.assertIsNone(Compression.parse(None))
+		self.assertIsNone(Compression.parse("none"))
+		compression = Compression.parse("gzip:9")
+		assert compression is not None
+		self.assertEqual((compression.codec.name, compression.level), ("gzip", 9))
+		with self.assertRaises(ValueError):
+			Compression.parse("lzma")
+
+	@unittest.skipIf(zstandard is None, "zstandard is not installed")
+	def test_zstd(self):
+		droplets = _droplets(40)
+		list(CacheGenerator(self.file_name, lambda: iter(droplets), compression = Compression("zstd", level = 1)))
+		self.assertEqual(list(read_cache_file(self.file_name)), droplets)
+
+if __name__ == "__main__":
+	unittest.main()
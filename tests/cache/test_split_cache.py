@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+from os import path
+from typing import Any, Dict, List
+from unittest import mock
+
+from datatap.cache import CacheGenerator, SplitCache
+from datatap.cache.cache_file import get_index_path, load_index
+from datatap.cache.cache_format import msgpack
+from datatap.cache.compression import zstandard
+from datatap.utils.environment import Environment
+
+def _droplets(start: int, stop: int) -> List[Dict[str, Any]]:
+	return [{ "kind": "ImageAnnotation", "image": { "paths": [f"s3://bucket/{i}.jpg"] }, "classes": {} } for i in range(start, stop)]
+
+class TestSplitCache(unittest.TestCase):
+	cache_format = "json"
+	compression = "none"
+
+	def setUp(self):
+		self._directory = tempfile.TemporaryDirectory()
+		self.cache = SplitCache(self._directory.name, cache_format = self.cache_format, compression = self.compression)
+		self.key = { "database_uid": "db", "dataset_uid": "ds", "split": "training" }
+
+	def tearDown(self):
+		self._directory.cleanup()
+
+	def _stream_chunks(self, nchunks: int, total: int):
+		for chunk in range(nchunks):
+			droplets = _droplets(chunk * total // nchunks, (chunk + 1) * total // nchunks)
+			list(CacheGenerator(
+				self.cache.get_chunk_path(**self.key, chunk = chunk, nchunks = nchunks),
+				lambda: iter(droplets),
+				on_complete = lambda: self.cache.consolidate(**self.key, nchunks = nchunks),
+				cache_format = self.cache.cache_format,
+				compression = self.cache.compression
+			))
+
+	def test_split_directory_stays_under_root(self):
+		directory = self.cache.get_split_directory(database_uid = "..", dataset_uid = ".", split = "../..")
+		self.assertTrue(path.abspath(directory).startswith(self.cache.root + os.sep))
+		self.assertEqual(path.dirname(path.dirname(path.dirname(directory))), self.cache.root)
+
+	def test_defaults_from_environment(self):
+		with mock.patch.object(Environment, "CACHE_COMPRESSION", "gzip"), mock.patch.object(Environment, "CACHE_MAX_SIZE", "1K"):
+			cache = SplitCache(self._directory.name)
+			assert cache.compression is not None
+			self.assertEqual((cache.compression.codec.name, cache.max_size), ("gzip", 1024))
+			self.assertIsNone(SplitCache(self._directory.name, compression = "none").compression)
+
+	def test_consolidates_complete_chunkings(self):
+		self._stream_chunks(3, 20)
+
+		split_path = self.cache.get_split_path(**self.key)
+		self.assertTrue(os.path.exists(split_path))
+		self.assertEqual(len(load_index(split_path)), 21)
+		self.assertFalse(os.path.exists(self.cache.get_chunk_path(**self.key, chunk = 0, nchunks = 3)))
+
+	def test_rechunks_canonical_copy(self):
+		self._stream_chunks(3, 20)
+
+		for nchunks in (1, 2, 7):
+			chunks = [list(self.cache.read_chunk(**self.key, chunk = chunk, nchunks = nchunks) or []) for chunk in range(nchunks)]
+			self.assertEqual([droplet for chunk in chunks for droplet in chunk], _droplets(0, 20))
+			self.assertLessEqual(max(map(len, chunks)) - min(map(len, chunks)), 1)
+
+	def test_serves_source_chunks_exactly(self):
+		sizes = [2, 12, 6]
+		for chunk, size in enumerate(sizes):
+			droplets = _droplets(sum(sizes[:chunk]), sum(sizes[:chunk + 1]))
+			list(CacheGenerator(
+				self.cache.get_chunk_path(**self.key, chunk = chunk, nchunks = 3),
+				lambda: iter(droplets),
+				on_complete = lambda: self.cache.consolidate(**self.key, nchunks = 3),
+				cache_format = self.cache.cache_format,
+				compression = self.cache.compression
+			))
+
+		chunks = [list(self.cache.read_chunk(**self.key, chunk = chunk, nchunks = 3) or []) for chunk in range(3)]
+		self.assertEqual(list(map(len, chunks)), sizes)
+
+	def test_chunking_source_is_decided_once(self):
+		# A chunking that was first read before the canonical copy existed keeps being streamed from the server
+		self.assertIsNone(self.cache.read_chunk(**self.key, chunk = 0, nchunks = 2))
+		self._stream_chunks(1, 20)
+		self.assertIsNone(self.cache.read_chunk(**self.key, chunk = 1, nchunks = 2))
+		self.assertEqual(len(list(self.cache.read_chunk(**self.key, chunk = 0, nchunks = 4) or [])), 5)
+
+	def test_partial_chunkings_are_not_consolidated(self):
+		droplets = _droplets(0, 5)
+		list(CacheGenerator(
+			self.cache.get_chunk_path(**self.key, chunk = 0, nchunks = 2),
+			lambda: iter(droplets),
+			cache_format = self.cache.cache_format,
+			compression = self.cache.compression
+		))
+
+		self.assertFalse(self.cache.consolidate(**self.key, nchunks = 2))
+		self.assertIsNone(self.cache.read_chunk(**self.key, chunk = 0, nchunks = 2))
+
+	def test_rebuilds_missing_index(self):
+		self._stream_chunks(1, 10)
+		split_path = self.cache.get_split_path(**self.key)
+		offsets = list(load_index(split_path))
+
+		os.remove(get_index_path(split_path))
+		self.assertEqual(list(load_index(split_path)), offsets)
+
+@unittest.skipIf(msgpack is None, "msgpack is not installed")
+class TestMsgpackSplitCache(TestSplitCache):
+	cache_format = "msgpack"
+
+class TestCompressedSplitCache(TestSplitCache):
+	compression = "gzip"
+
+@unittest.skipIf(msgpack is None or zstandard is None, "msgpack or zstandard is not installed")
+class TestCompressedMsgpackSplitCache(TestSplitCache):
+	cache_format = "msgpack"
+	compression = "zstd:1"
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,47 @@
+import pickle
+import tempfile
+import unittest
+from typing import Any, Dict, List
+
+from datatap.cache import CacheGenerator, SplitCache, SplitReader
+
+def _droplets(count: int) -> List[Dict[str, Any]]:
+	return [{ "kind": "ImageAnnotation", "image": { "paths": [f"s3://bucket/{i}.jpg"] }, "classes": {} } for i in range(count)]
+
+class TestSplitReader(unittest.TestCase):
+	def setUp(self):
+		self._directory = tempfile.TemporaryDirectory()
+		cache = SplitCache(self._directory.name)
+		self.file_name = cache.get_split_path(database_uid = "db", dataset_uid = "ds", split = "training")
+		self.droplets = _droplets(25)
+		list(CacheGenerator(self.file_name, lambda: iter(self.droplets)))
+
+	def tearDown(self):
+		self._directory.cleanup()
+
+	def test_random_access(self):
+		with SplitReader(self.file_name) as reader:
+			self.assertEqual(len(reader), 25)
+			self.assertEqual(reader[0], self.droplets[0])
+			self.assertEqual(reader[-1], self.droplets[-1])
+			self.assertEqual(reader[5:20:3], self.droplets[5:20:3])
+			self.assertEqual(reader[[7, 3, 7]], [self.droplets[7], self.droplets[3], self.droplets[7]])
+			self.assertEqual(list(reader.iter(20)), self.droplets[20:])
+			with self.assertRaises(IndexError):
+				reader[25]
+
+	def test_sample(self):
+		with SplitReader(self.file_name, lambda droplet: droplet["image"]["paths"][0]) as reader:
+			sample = reader.sample(10, seed = 4)
+			self.assertEqual(len(set(sample)), 10)
+			self.assertEqual(sample, reader.sample(10, seed = 4))
+
+	def test_pickle(self):
+		with SplitReader(self.file_name) as reader:
+			reader[3]
+			copy = pickle.loads(pickle.dumps(reader))
+			self.addCleanup(copy.close)
+			self.assertEqual(copy[3], self.droplets[3])
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,70 @@
+import math
+import unittest
+
+from datatap.droplet import AnnotationBatch, ImageAnnotation
+
+def _droplet(i: int):
+	return {
+		"uid": f"droplet-{i}",
+		"image": { "paths": [f"s3://bucket/{i}.jpg"] },
+		"classes": {
+			"person": {
+				"instances": [
+					{
+						"boundingBox": { "rectangle": [[0.25, 0.25], [0.5, 0.75]], "confidence": 0.5 },
+						"segmentation": { "mask": [[[0.25, 0.25], [0.5, 0.25], [0.5, 0.75]], [[0.25, 0.5], [0.375, 0.5], [0.375, 0.625], [0.25, 0.625]]] },
+						"keypoints": { "head": { "point": [0.375, 0.25], "occluded": False }, "foot": None },
+					},
+					{ "segmentation": { "mask": [[[0, 0], [1, 0], [1, 1]]], "confidence": 0.75 } },
+				],
+				"multiInstances": [],
+			},
+			"car": {
+				"instances": [{ "boundingBox": { "rectangle": [[0, 0], [0.125, 0.125]] } }] * i,
+				"multiInstances": [],
+			},
+		},
+	}
+
+class TestAnnotationBatch(unittest.TestCase):
+	def test_from_json(self):
+		batch = AnnotationBatch.from_json([_droplet(i) for i in range(3)], class_names = ["car", "person"])
+
+		self.assertEqual(len(batch), 3)
+		self.assertEqual(batch.offsets.tolist(), [0, 2, 5, 9])
+		self.assertEqual(batch.boxes.shape, (9, 4))
+		self.assertEqual(batch.class_ids.tolist(), [1, 1, 1, 1, 0, 1, 1, 0, 0])
+		self.assertEqual(batch.has_box.tolist(), [True, False] * 2 + [True] + [True, False, True, True])
+		self.assertEqual(batch.annotation_ids.tolist(), [0, 0, 1, 1, 1, 2, 2, 2, 2])
+		self.assertEqual(batch.boxes[batch.instance_slice(1)][2].tolist(), [0, 0, 0.125, 0.125])
+		self.assertEqual(batch.confidences[0], 0.5)
+		self.assertTrue(math.isnan(batch.confidences[4]))
+
+		self.assertEqual(batch.segmentation_offsets[:3].tolist(), [0, 2, 3])
+		self.assertEqual(batch.polygon_offsets[:4].tolist(), [0, 3, 7, 10])
+		self.assertEqual(batch.vertices.shape, (10 * 3, 2))
+
+		self.assertEqual(batch.keypoint_names, ["head", "foot"])
+		self.assertEqual(batch.keypoint_offsets[:3].tolist(), [0, 2, 2])
+		self.assertEqual(batch.keypoint_occluded[:2].tolist(), [0, -1])
+		self.assertTrue(math.isnan(batch.keypoints[1, 0]))
+
+	def test_round_trip(self):
+		droplets = [_droplet(i) for i in range(3)]
+		annotations = [ImageAnnotation.from_json(droplet) for droplet in droplets]
+
+		self.assertEqual(AnnotationBatch.from_json(droplets).to_annotations(), annotations)
+		self.assertEqual(AnnotationBatch.from_annotations(annotations).to_annotations(), annotations)
+
+	def test_unknown_class(self):
+		with self.assertRaises(ValueError):
+			AnnotationBatch.from_json([_droplet(1)], class_names = ["person"])
+
+	def test_empty(self):
+		batch = AnnotationBatch.from_annotations([])
+		self.assertEqual(len(batch), 0)
+		self.assertEqual(batch.boxes.shape, (0, 4))
+		self.assertEqual(batch.to_annotations(), [])
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,84 @@
+import json
+import math
+import unittest
+
+from datatap.droplet import DropletDecoder
+
+_droplet = {
+	"uid": "droplet",
+	"image": { "paths": ["s3://bucket/image.jpg"] },
+	"classes": {
+		"person": {
+			"instances": [
+				{
+					"boundingBox": { "rectangle": [[0.25, 0.25], [0.5, 0.75]], "confidence": 0.5 },
+					"segmentation": { "mask": [[[0.25, 0.25], [0.5, 0.25], [0.5, 0.75]]] },
+					"keypoints": { "head": { "point": [0.375, 0.25], "occluded": True }, "foot": None },
+					"attributes": { "pose": [{ "value": "sitting", "confidence": 0.25 }, { "value": "standing", "confidence": 0.75 }] },
+				},
+				{ "keypoints": { "foot": { "point": [0.5, 0.5] } }, "attributes": { "pose": "lying" } },
+			],
+		},
+		"car": { "instances": [{ "boundingBox": { "rectangle": [[0, 0], [0.125, 0.125]] } }] },
+		"tree": { "instances": [{ "boundingBox": { "rectangle": [[0, 0], [1, 1]] } }] },
+	},
+}
+
+class TestDropletDecoder(unittest.TestCase):
+	def test_boxes(self):
+		arrays = DropletDecoder({ "car": 0, "person": 1 })(json.dumps(_droplet).encode())
+
+		self.assertEqual(arrays.uid, "droplet")
+		self.assertEqual(arrays.image_paths, ["s3://bucket/image.jpg"])
+		self.assertEqual(arrays.labels.tolist(), [1, 1, 0])
+		assert arrays.boxes is not None and arrays.confidences is not None
+		self.assertEqual(arrays.boxes[0].tolist(), [0.25, 0.25, 0.5, 0.75])
+		self.assertTrue(math.isnan(arrays.boxes[1, 0]))
+		self.assertEqual(arrays.boxes[2].tolist(), [0, 0, 0.125, 0.125])
+		self.assertEqual(arrays.confidences[0], 0.5)
+		self.assertIsNone(arrays.vertices)
+		self.assertIsNone(arrays.keypoints)
+
+	def test_fields(self):
+		decoder = DropletDecoder({ "person": 0 }, fields = ["masks", "keypoints", "attributes"], keypoint_names = ["head", "foot"])
+		arrays = decoder(_droplet)
+
+		self.assertIsNone(arrays.boxes)
+		assert arrays.segmentation_offsets is not None and arrays.polygon_offsets is not None and arrays.vertices is not None
+		self.assertEqual(arrays.segmentation_offsets.tolist(), [0, 1, 1])
+		self.assertEqual(arrays.polygon_offsets.tolist(), [0, 3])
+		self.assertEqual(arrays.vertices.shape, (3, 2))
+
+		assert arrays.keypoints is not None and arrays.keypoint_visibility is not None
+		self.assertEqual(arrays.keypoints.shape, (2, 2, 2))
+		self.assertEqual(arrays.keypoint_visibility.tolist(), [[1, 0], [0, 2]])
+		self.assertEqual(arrays.keypoints[1, 1].tolist(), [0.5, 0.5])
+		self.assertEqual(arrays.attributes, [{ "pose": "standing" }, { "pose": "lying" }])
+
+	def test_invalid_fields(self):
+		with self.assertRaises(ValueError):
+			DropletDecoder({}, fields = ["boxes", "depth"])
+		with self.assertRaises(ValueError):
+			DropletDecoder({}, fields = ["keypoints"])
+
+	def test_malformed_geometry(self):
+		# Together, these points have as many coordinates as two valid ones.
+		droplet = {
+			"image": { "paths": [] },
+			"classes": { "person": { "instances": [{ "keypoints": { "head": { "point": [0.5, 0.5, 0.5] }, "foot": { "point": [0.5] } } }] } },
+		}
+		with self.assertRaises(ValueError):
+			DropletDecoder({ "person": 0 }, fields = ["keypoints"], keypoint_names = ["head", "foot"])(droplet)
+
+		droplet = { "image": { "paths": [] }, "classes": { "car": { "instances": [{ "boundingBox": { "rectangle": [[0, 0], [1, 1], [1, 0]] } }] } } }
+		with self.assertRaises(ValueError):
+			DropletDecoder({ "car": 0 })(droplet)
+
+	def test_empty(self):
+		arrays = DropletDecoder({ "bus": 0 }, fields = ["boxes", "keypoints"], keypoint_names = ["head"])(_droplet)
+		assert arrays.boxes is not None and arrays.keypoints is not None
+		self.assertEqual(arrays.boxes.shape, (0, 4))
+		self.assertEqual(arrays.keypoints.shape, (0, 1, 2))
+
+if __name__ == "__main__":
+	unittest.main()
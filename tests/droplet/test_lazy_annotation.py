@@ -0,0 +1,55 @@
+import pickle
+import unittest
+
+from tests._synthetic import synthetic_droplet
+from datatap.droplet import ImageAnnotation, LazyImageAnnotation, LazyVideoAnnotation, VideoAnnotation
+
+_video = {
+	"kind": "VideoAnnotation",
+	"uid": "video",
+	"video": { "paths": ["s3://bucket/video.mp4"] },
+	"frames": [
+		{ "classes": { "person": { "instances": [{ "id": "a", "boundingBox": { "rectangle": [[0.1, 0.1], [0.2, 0.2]] } }] } } },
+		{ "classes": { "person": { "instances": [], "multiInstances": [{ "count": 3 }] } } },
+	],
+}
+
+class TestLazyAnnotation(unittest.TestCase):
+	def test_equals_eager(self):
+		droplet = synthetic_droplet(0, polygons = 5)
+		lazy = LazyImageAnnotation.from_json(droplet)
+
+		self.assertIsInstance(lazy, ImageAnnotation)
+		self.assertEqual(lazy, ImageAnnotation.from_json(droplet))
+		self.assertEqual(ImageAnnotation.from_json(droplet), lazy)
+		self.assertEqual(lazy.to_json(), ImageAnnotation.from_json(droplet).to_json())
+		self.assertEqual(LazyVideoAnnotation.from_json(_video), VideoAnnotation.from_json(_video))
+		self.assertEqual(LazyVideoAnnotation.from_json(_video).to_json(), VideoAnnotation.from_json(_video).to_json())
+
+	def test_parses_on_access(self):
+		lazy = LazyImageAnnotation.from_json(synthetic_droplet(0, polygons = 5))
+		self.assertNotIn("classes", vars(lazy))
+
+		instance = lazy.classes["person"].instances[0]
+		self.assertNotIn("image", vars(lazy))
+		self.assertNotIn("segmentation", vars(instance))
+
+		box = instance.bounding_box
+		self.assertIs(instance.bounding_box, box)
+		self.assertNotIn("segmentation", vars(instance))
+
+	def test_assignment(self):
+		lazy = LazyImageAnnotation.from_json(synthetic_droplet(0))
+		lazy.classes = {}
+		self.assertEqual(lazy.classes, {})
+		self.assertEqual(lazy.to_json()["classes"], {})
+
+	def test_pickle(self):
+		droplet = synthetic_droplet(0, polygons = 5)
+		lazy = LazyImageAnnotation.from_json(droplet)
+		lazy.classes["car"].instances # Partially parse the annotation
+
+		self.assertEqual(pickle.loads(pickle.dumps(lazy)), ImageAnnotation.from_json(droplet))
+
+if __name__ == "__main__":
+	unittest.main()
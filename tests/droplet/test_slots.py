@@ -0,0 +1,34 @@
+import copy
+import pickle
+import unittest
+
+from tests._synthetic import synthetic_droplet
+from datatap.droplet import ImageAnnotation
+
+class TestSlots(unittest.TestCase):
+	def test_no_instance_dicts(self):
+		annotation = ImageAnnotation.from_json(synthetic_droplet(0, polygons = 5))
+		instance = annotation.classes["person"].instances[0]
+		assert instance.bounding_box is not None and instance.segmentation is not None
+
+		for obj in [
+			annotation,
+			annotation.image,
+			annotation.classes["person"],
+			instance,
+			instance.bounding_box,
+			instance.bounding_box.rectangle,
+			instance.bounding_box.rectangle.p1,
+			instance.segmentation,
+			instance.segmentation.mask,
+			instance.segmentation.mask.polygons[0],
+		]:
+			self.assertFalse(hasattr(obj, "__dict__"), type(obj).__name__)
+
+	def test_copy(self):
+		annotation = ImageAnnotation.from_json(synthetic_droplet(0, polygons = 5))
+		self.assertEqual(pickle.loads(pickle.dumps(annotation)), annotation)
+		self.assertEqual(copy.deepcopy(annotation), annotation)
+
+if __name__ == "__main__":
+	unittest.main()
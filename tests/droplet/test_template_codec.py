@@ -0,0 +1,92 @@
+import copy
+import pickle
+import unittest
+
+from tests._synthetic import synthetic_droplet
+from datatap.droplet import ImageAnnotation, ImageAnnotationCodec, VideoAnnotation, VideoAnnotationCodec
+from datatap.template import (ClassAnnotationTemplate, FrameAnnotationTemplate, ImageAnnotationTemplate,
+	InstanceTemplate, VideoAnnotationTemplate)
+
+_template = ImageAnnotationTemplate(classes = {
+	"person": ClassAnnotationTemplate(instances = InstanceTemplate(bounding_box = True, segmentation = True)),
+	"car": ClassAnnotationTemplate(instances = InstanceTemplate(bounding_box = True, segmentation = True)),
+})
+
+_video = {
+	"kind": "VideoAnnotation",
+	"uid": "video",
+	"video": { "paths": ["s3://bucket/video.mp4"] },
+	"frames": [
+		{ "classes": { "person": { "instances": [{ "id": "a", "boundingBox": { "rectangle": [[0.1, 0.1], [0.2, 0.2]] } }] } } },
+		{ "classes": { "person": { "instances": [], "multiInstances": [{ "count": 3 }] } } },
+	],
+}
+
+class TestTemplateCodec(unittest.TestCase):
+	def test_equals_generic(self):
+		codec = ImageAnnotationCodec(_template)
+		for i in range(10):
+			droplet = synthetic_droplet(i, polygons = 5)
+			annotation = codec.from_json(droplet)
+			self.assertEqual(annotation, ImageAnnotation.from_json(droplet))
+			self.assertEqual(codec.to_json(annotation), annotation.to_json())
+
+	def test_non_conforming(self):
+		codec = ImageAnnotationCodec(_template)
+		droplet = synthetic_droplet(0, polygons = 5)
+		# One instance with a field its template lacks, and one missing a field its template requires
+		droplet["classes"]["person"]["instances"][0]["id"] = "extra"
+		del droplet["classes"]["person"]["instances"][1]["segmentation"]
+		# And a class that is not in the template at all
+		droplet["classes"]["bicycle"] = copy.deepcopy(droplet["classes"]["car"])
+
+		annotation = codec.from_json(droplet)
+		self.assertEqual(annotation, ImageAnnotation.from_json(droplet))
+		self.assertEqual(codec.to_json(annotation), annotation.to_json())
+
+	def test_invalid_coordinates(self):
+		codec = ImageAnnotationCodec(_template)
+
+		droplet = synthetic_droplet(0, polygons = 5)
+		droplet["classes"]["person"]["instances"][0]["boundingBox"]["rectangle"] = [[0.5, 0.5], [1.5, 0.6]]
+		with self.assertRaises(AssertionError):
+			codec.from_json(droplet)
+
+		droplet = synthetic_droplet(0, polygons = 5)
+		droplet["classes"]["person"]["instances"][0]["segmentation"]["mask"][0][0] = [-0.1, 0.5]
+		with self.assertRaises(AssertionError):
+			codec.from_json(droplet)
+
+	def test_malformed_geometry(self):
+		codec = ImageAnnotationCodec(_template)
+		for field, key, value in [
+			("boundingBox", "rectangle", [[0.5, 0.5]]),
+			("boundingBox", "rectangle", [[0.5, 0.5], [0.6, 0.6], [0.7, 0.7]]),
+			("segmentation", "mask", [[[0.5, 0.5, 0.5], [0.6, 0.6], [0.6, 0.5]]]),
+			("segmentation", "mask", [[0.5, 0.5]]),
+		]:
+			droplet = synthetic_droplet(0, polygons = 5)
+			droplet["classes"]["person"]["instances"][0][field][key] = value
+			try:
+				expected = ImageAnnotation.from_json(droplet)
+			except Exception as e:
+				with self.assertRaises(type(e)):
+					codec.from_json(droplet)
+			else:
+				self.assertEqual(codec.from_json(droplet), expected)
+
+	def test_video(self):
+		codec = VideoAnnotationCodec(VideoAnnotationTemplate(frames = FrameAnnotationTemplate(classes = {
+			"person": ClassAnnotationTemplate(instances = InstanceTemplate(id = True, bounding_box = True)),
+		})))
+		annotation = codec.from_json(_video)
+		self.assertEqual(annotation, VideoAnnotation.from_json(_video))
+		self.assertEqual(codec.to_json(annotation), annotation.to_json())
+
+	def test_pickle(self):
+		codec = pickle.loads(pickle.dumps(ImageAnnotationCodec(_template)))
+		droplet = synthetic_droplet(0, polygons = 5)
+		self.assertEqual(codec.from_json(droplet), ImageAnnotation.from_json(droplet))
+
+if __name__ == "__main__":
+	unittest.main()
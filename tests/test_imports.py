@@ -0,0 +1,47 @@
+import subprocess
+import sys
+import unittest
+from typing import List
+
+def _loaded_modules(statement: str) -> List[str]:
+	return subprocess.run(
+		[sys.executable, "-c", f"import sys; {statement}; print(' '.join(sorted(sys.modules)))"],
+		stdout = subprocess.PIPE,
+		universal_newlines = True,
+		check = True,
+	).stdout.split()
+
+class TestImports(unittest.TestCase):
+	"""
+	Importing `datatap` is repeated by every spawned `DataLoader` worker, so it
+	must not pull in slow dependencies before they are needed.
+	"""
+
+	def _assert_not_loaded(self, statement: str, modules: List[str]):
+		loaded = set(_loaded_modules(statement))
+		self.assertEqual([module for module in modules if module in loaded], [], f"loaded by `{statement}`")
+
+	def test_import_datatap(self):
+		self._assert_not_loaded("import datatap", ["requests", "aiohttp", "asyncio", "shapely", "numpy", "PIL", "msgspec"])
+
+	def test_import_api(self):
+		self._assert_not_loaded("from datatap import Api", ["aiohttp", "shapely", "numpy", "PIL", "boto3"])
+
+	def test_import_droplet(self):
+		self._assert_not_loaded("import datatap.droplet", ["requests", "shapely", "numpy", "PIL", "boto3"])
+
+	def test_no_side_effects(self):
+		self.assertEqual(
+			_loaded_modules("import multiprocessing, datatap.api.endpoints; print(multiprocessing.get_start_method(allow_none = True))")[0],
+			"None"
+		)
+
+	def test_lazy_attributes(self):
+		self.assertIn("AsyncApi", _loaded_modules("import datatap; datatap.AsyncApi; print('AsyncApi')"))
+		self.assertIn("aiohttp", _loaded_modules("from datatap.api.endpoints import AsyncApiEndpoints"))
+		self.assertIn("AsyncApi", _loaded_modules("import datatap; print(' '.join(dir(datatap)))"))
+		with self.assertRaises(subprocess.CalledProcessError):
+			subprocess.run([sys.executable, "-c", "import datatap; datatap.Missing"], stderr = subprocess.DEVNULL, check = True)
+
+if __name__ == "__main__":
+	unittest.main()
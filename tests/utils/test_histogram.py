@@ -0,0 +1,44 @@
+import pickle
+import random
+import unittest
+
+from datatap.utils import Histogram
+
+class TestHistogram(unittest.TestCase):
+	def test_quantiles(self):
+		values = [random.lognormvariate(-3, 2) for _ in range(10000)]
+		histogram = Histogram(growth = 1.05)
+		for value in values:
+			histogram.record(value)
+
+		values.sort()
+		for q in [0.1, 0.5, 0.9, 0.99]:
+			exact = values[int(q * (len(values) - 1))]
+			self.assertAlmostEqual(histogram.quantile(q) / exact, 1, delta = 0.05) # type: ignore
+
+		self.assertEqual(histogram.count, 10000)
+		self.assertEqual(histogram.min, values[0])
+		self.assertEqual(histogram.max, values[-1])
+		self.assertEqual(histogram.quantile(1), values[-1])
+
+	def test_empty(self):
+		histogram = Histogram()
+		self.assertIsNone(histogram.quantile(0.5))
+		self.assertIsNone(histogram.mean)
+
+	def test_merge(self):
+		first, second = Histogram(), Histogram()
+		first.record(1)
+		second.record(3)
+		second.record(0)
+		first.merge(pickle.loads(pickle.dumps(second)))
+
+		self.assertEqual(first.count, 3)
+		self.assertEqual(first.mean, 4 / 3)
+		self.assertEqual((first.min, first.max), (0, 3))
+
+		with self.assertRaises(ValueError):
+			first.merge(Histogram(growth = 2))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,24 @@
+import unittest
+from importlib.util import find_spec
+
+from datatap.utils import get_json_backend
+
+class TestJsonBackend(unittest.TestCase):
+	def test_backends_agree(self):
+		value = { "kind": "ImageAnnotation", "text": "café ☃", "scores": [0.5, 1e-9, -3], "nested": { "empty": [], "null": None, "flag": True } }
+		names = ["json"] + [name for name in ["orjson", "msgspec"] if find_spec(name) is not None]
+
+		for name in names:
+			backend = get_json_backend(name)
+			encoded = backend.dumps(value)
+			self.assertIsInstance(encoded, bytes)
+			for other in names:
+				self.assertEqual(get_json_backend(other).loads(encoded), value)
+			self.assertEqual(backend.loads(encoded.decode("utf-8")), value)
+
+	def test_rejects_unknown_backends(self):
+		with self.assertRaises(ValueError):
+			get_json_backend("yaml")
+
+if __name__ == "__main__":
+	unittest.main()
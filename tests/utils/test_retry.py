@@ -0,0 +1,172 @@
+import time
+import unittest
+from email.utils import formatdate
+from typing import List
+
+from tests._server import StandInServer
+from datatap.api.endpoints import ApiEndpoints, SessionPool
+from datatap.utils import CircuitBreaker, CircuitOpenError, HttpError, RetryPolicy, resumable_stream
+from datatap.utils.retry import parse_retry_after
+
+_user = { "uid": "u", "username": "test", "email": "test@example.com", "defaultDatabase": None }
+
+class TestRetryPolicy(unittest.TestCase):
+	def _failing(self, errors: List[Exception]):
+		calls = []
+		def request() -> str:
+			calls.append(None)
+			if len(errors) > 0:
+				raise errors.pop(0)
+			return "ok"
+		return request, calls
+
+	def test_retries_transient_failures(self):
+		request, calls = self._failing([HttpError("busy", status = 503), ConnectionError("dropped")])
+		self.assertEqual(RetryPolicy(backoff = 0).call(request), "ok")
+		self.assertEqual(len(calls), 3)
+
+	def test_does_not_retry_client_errors(self):
+		request, calls = self._failing([HttpError("missing", status = 404)])
+		with self.assertRaises(HttpError):
+			RetryPolicy(backoff = 0).call(request)
+		self.assertEqual(len(calls), 1)
+
+	def test_gives_up(self):
+		request, calls = self._failing([HttpError("busy", status = 503)] * 10)
+		with self.assertRaises(HttpError):
+			RetryPolicy(backoff = 0, max_attempts = 3).call(request)
+		self.assertEqual(len(calls), 3)
+
+		request, calls = self._failing([HttpError("busy", status = 503, retry_after = 60)])
+		with self.assertRaises(HttpError):
+			RetryPolicy(max_elapsed = 10).call(request)
+		self.assertEqual(len(calls), 1)
+
+	def test_delays(self):
+		policy = RetryPolicy(backoff = 1, max_backoff = 5, jitter = 0.5)
+		for retry, longest in [(0, 1), (1, 2), (2, 4), (3, 5), (10, 5)]:
+			delay = policy.get_delay(retry)
+			self.assertLessEqual(delay, longest)
+			self.assertGreaterEqual(delay, longest / 2)
+
+		self.assertEqual(policy.get_delay(0, retry_after = 20), 20)
+		self.assertLessEqual(RetryPolicy(respect_retry_after = False).get_delay(0, retry_after = 20), 0.5)
+
+	def test_parse_retry_after(self):
+		self.assertEqual(parse_retry_after("12"), 12)
+		self.assertIsNone(parse_retry_after(None))
+		self.assertIsNone(parse_retry_after("soon"))
+		self.assertAlmostEqual(parse_retry_after(formatdate(time.time() + 30, usegmt = True)), 30, delta = 2) # type: ignore
+
+class TestResumableStream(unittest.TestCase):
+	def test_resumes_from_last_element(self):
+		opened: List[int] = []
+		drops = [3, 7]
+		def open_stream(skip: int):
+			opened.append(skip)
+			for i in range(skip, 10):
+				if i in drops:
+					drops.remove(i)
+					raise ConnectionError("dropped")
+				yield i
+
+		self.assertEqual(list(resumable_stream(open_stream, backoff = 0)), list(range(10)))
+		self.assertEqual(opened, [0, 3, 7])
+
+	def test_follows_policy(self):
+		opened: List[int] = []
+		def open_stream(skip: int):
+			opened.append(skip)
+			raise HttpError("busy", status = 503)
+			yield skip
+
+		with self.assertRaises(HttpError):
+			list(resumable_stream(open_stream, retry_policy = RetryPolicy(backoff = 0, max_attempts = 3)))
+		self.assertEqual(len(opened), 3)
+
+		# Only connection errors are retried by default
+		opened.clear()
+		with self.assertRaises(HttpError):
+			list(resumable_stream(open_stream, backoff = 0))
+		self.assertEqual(len(opened), 1)
+
+class TestCircuitBreaker(unittest.TestCase):
+	def test_opens_and_recovers(self):
+		breaker = CircuitBreaker(failure_threshold = 2, reset_timeout = 0.1)
+		for _ in range(2):
+			breaker.before_request("host")
+			breaker.record_failure("host")
+
+		self.assertTrue(breaker.is_open("host"))
+		with self.assertRaises(CircuitOpenError):
+			breaker.before_request("host")
+		breaker.before_request("other")
+
+		time.sleep(0.1)
+		breaker.before_request("host")
+		with self.assertRaises(CircuitOpenError):
+			breaker.before_request("host")
+		breaker.record_success("host")
+		self.assertFalse(breaker.is_open("host"))
+
+	def test_refuses_requests_while_open(self):
+		breaker = CircuitBreaker(failure_threshold = 1, reset_timeout = 60)
+		policy = RetryPolicy(backoff = 0, max_elapsed = 1)
+		calls = []
+
+		def request():
+			calls.append(None)
+			raise HttpError("busy", status = 503)
+
+		with self.assertRaises(HttpError):
+			policy.call(request, circuit_breaker = breaker, host = "host")
+		with self.assertRaises(CircuitOpenError):
+			policy.call(request, circuit_breaker = breaker, host = "host")
+		self.assertEqual(len(calls), 1)
+
+	def test_interrupted_probe_ends(self):
+		breaker = CircuitBreaker(failure_threshold = 1, reset_timeout = 0.1)
+		breaker.before_request("host")
+		breaker.record_failure("host")
+		time.sleep(0.1)
+
+		def request() -> str:
+			raise KeyboardInterrupt()
+
+		with self.assertRaises(KeyboardInterrupt):
+			RetryPolicy().call(request, circuit_breaker = breaker, host = "host")
+		self.assertEqual(RetryPolicy().call(lambda: "ok", circuit_breaker = breaker, host = "host"), "ok")
+		self.assertFalse(breaker.is_open("host"))
+
+class TestRequestRetries(unittest.TestCase):
+	def test_retries_unavailable_server(self):
+		with StandInServer() as server:
+			server.routes["/api/user"] = lambda: _user
+			server.failures["/api/user"] = [503, 429]
+			endpoints = ApiEndpoints("test-key", server.uri, SessionPool(retry_policy = RetryPolicy(backoff = 0)))
+
+			self.assertEqual(endpoints.user.current(), _user)
+			self.assertEqual(server.failures["/api/user"], [])
+
+	def test_retries_posts_only_if_idempotent(self):
+		with StandInServer() as server:
+			server.routes["/api/database/query"] = lambda: []
+			server.failures["/api/database/query"] = [503, 503]
+			endpoints = ApiEndpoints("test-key", server.uri, SessionPool(retry_policy = RetryPolicy(backoff = 0)))
+
+			with self.assertRaises(HttpError):
+				endpoints._request.post("/database/query", { "name": "test" })
+			self.assertEqual(server.failures["/api/database/query"], [503])
+
+			self.assertEqual(endpoints.database.query_by_name("test"), [])
+			self.assertEqual(server.failures["/api/database/query"], [])
+
+	def test_surfaces_status(self):
+		with StandInServer() as server:
+			endpoints = ApiEndpoints("test-key", server.uri)
+			with self.assertRaises(HttpError) as context:
+				endpoints.user.current()
+			self.assertEqual(context.exception.status, 404)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,4 @@
+class Decompressor:
+    def __init__(self) -> None: ...
+    def process(self, string: bytes) -> bytes: ...
+    def is_finished(self) -> bool: ...
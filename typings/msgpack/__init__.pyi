@@ -0,0 +1,4 @@
+from typing import Any, Union
+
+def packb(o: Any, *, use_bin_type: bool = ...) -> bytes: ...
+def unpackb(packed: Union[bytes, memoryview], *, raw: bool = ...) -> Any: ...
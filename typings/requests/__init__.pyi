@@ -1,16 +1,56 @@
-from typing import Any, Dict, Generator, Optional, overload
+from types import TracebackType
+from typing import Any, Dict, Generator, MutableMapping, Optional, Type, overload
 
 from typing_extensions import Literal
+from urllib3.response import HTTPResponse
+
+from . import adapters as adapters, exceptions as exceptions
+from .adapters import HTTPAdapter
+from .exceptions import ConnectionError as ConnectionError, RequestException as RequestException
 
 class Response:
     content: bytes
     ok: bool
+    status_code: int
+    headers: MutableMapping[str, str]
+    raw: HTTPResponse
 
     def json(self) -> Any: ...
     @overload
     def iter_lines(self, *, decode_unicode: Literal[True], chunk_size: int = ...) -> Generator[str, None, None]: ...
     @overload
     def iter_lines(self, *,  decode_unicode: Optional[Literal[False]] = ..., chunk_size: int = ...) -> Generator[bytes, None, None]: ...
+    def close(self) -> None: ...
+    def __enter__(self) -> Response: ...
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType]
+    ) -> None: ...
+
+class Session:
+    headers: MutableMapping[str, str]
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: Dict[str, str] | None = ...,
+        headers: Dict[str, str] | None = ...,
+        stream: bool = ...,
+        json: Any = ...,
+        **kwargs: Any
+    ) -> Response: ...
+    def mount(self, prefix: str, adapter: HTTPAdapter) -> None: ...
+    def close(self) -> None: ...
+    def __enter__(self) -> Session: ...
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType]
+    ) -> None: ...
 
 def get(
     url: str,
@@ -25,4 +65,4 @@ def post(
     headers: Dict[str, str | None] | None = ...,
     stream: bool = ...,
     json: Any = ...
-) -> Response: ...
\ No newline at end of file
+) -> Response: ...
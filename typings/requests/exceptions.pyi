@@ -0,0 +1,7 @@
+class RequestException(IOError): ...
+class HTTPError(RequestException): ...
+class ConnectionError(RequestException): ...
+class SSLError(ConnectionError): ...
+class Timeout(RequestException): ...
+class ChunkedEncodingError(RequestException): ...
+class ContentDecodingError(RequestException): ...